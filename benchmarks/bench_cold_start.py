@@ -0,0 +1,134 @@
+# benchmarks/bench_cold_start.py
+"""
+Cold-start benchmark for the nightly entry point
+
+Measures, each in a fresh interpreter (like a Cloud Function cold start):
+  - interpreter startup alone (baseline)
+  - `import src.nb_api_client`
+  - `import main` for nb_path_nightly
+  - first request: client construction + the connection test round-trip,
+    and client construction + the first real request (what the run pays
+    when the connection test is skipped)
+
+Requests go to a local stub server, so no network or credentials are needed.
+
+Usage:
+    python benchmarks/bench_cold_start.py --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+NIGHTLY_DIR = os.path.join(REPO_ROOT, 'nb_path_updates', 'nb_path_nightly')
+
+IMPORT_SNIPPET = """
+import time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+FIRST_REQUEST_SNIPPET = """
+import time
+t = time.perf_counter()
+from src.nb_api_client import NationBuilderClient
+client = NationBuilderClient(nation_slug='bench', access_token='bench-token')
+client.base_url = 'http://127.0.0.1:{port}/api/v2'
+if {test_connection}:
+    client.test_connection()
+client.get_signup_taggings(filters={{'tag_id': '14890'}})
+print(time.perf_counter() - t)
+"""
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every GET with an empty JSON:API page"""
+
+    def do_GET(self):
+        body = json.dumps({'data': []}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_snippet(code: str, cwd: str) -> float:
+    """Run code in a fresh interpreter and return the seconds it printed"""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=cwd, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()
+    return float(output[-1])
+
+
+def interpreter_startup() -> float:
+    """Wall time of `python -c pass`, for reference"""
+    import time
+    t = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    return time.perf_counter() - t
+
+
+def measure(label: str, fn, runs: int) -> dict:
+    samples = [fn() for _ in range(runs)]
+    return {
+        'label': label,
+        'median_ms': statistics.median(samples) * 1000,
+        'min_ms': min(samples) * 1000,
+        'max_ms': max(samples) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    try:
+        results = [
+            measure("interpreter startup", interpreter_startup, args.runs),
+            measure("import src.nb_api_client",
+                    lambda: run_snippet(IMPORT_SNIPPET.format(module='src.nb_api_client'), REPO_ROOT),
+                    args.runs),
+            measure("import nightly main",
+                    lambda: run_snippet(IMPORT_SNIPPET.format(module='main'), NIGHTLY_DIR),
+                    args.runs),
+            measure("first request (with connection test)",
+                    lambda: run_snippet(FIRST_REQUEST_SNIPPET.format(port=port, test_connection=True), REPO_ROOT),
+                    args.runs),
+            measure("first request (connection test skipped)",
+                    lambda: run_snippet(FIRST_REQUEST_SNIPPET.format(port=port, test_connection=False), REPO_ROOT),
+                    args.runs),
+        ]
+    finally:
+        server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return results
+
+    print(f"{'measurement':<42}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for r in results:
+        print(f"{r['label']:<42}{r['median_ms']:>12.1f}{r['min_ms']:>10.1f}{r['max_ms']:>10.1f}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
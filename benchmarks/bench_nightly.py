@@ -0,0 +1,192 @@
+# benchmarks/bench_nightly.py
+"""
+End-to-end benchmark of the nb_path_nightly run
+
+Runs the full nightly flow (connection check, clickers filter: tagging
+lookup, CSV export, list creation and upload, path journeys; then the
+summary report and run metrics) against the in-process mock nation from
+mock_nb_server.py, at several scales and journey concurrency settings
+(NB_JOURNEY_WORKERS). Each measurement runs in a fresh interpreter so peak
+memory is per run.
+
+Reports, per (signups, workers): wall time, API requests per second, API
+calls per signup, and peak RSS (seeded RSS is the mock nation alone).
+
+Usage:
+    python benchmarks/bench_nightly.py
+    python benchmarks/bench_nightly.py --signups 100,5000 --workers 1,2,4,8,16 --latency-ms 40 --jitter-ms 20
+    python benchmarks/bench_nightly.py --signups 5000 --workers 8 --error-rate 0.01 --json
+    python benchmarks/bench_nightly.py --signups 5000 --workers 32 --rate-limit 300 --adaptive
+
+With --adaptive the client gets an AIMD concurrency limiter
+(src/nb_concurrency.py) and --workers is its ceiling; the limit reached at
+the end of the run is reported.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+NIGHTLY_DIR = os.path.join(REPO_ROOT, 'nb_path_updates', 'nb_path_nightly')
+
+# (result key, header, width, decimals)
+COLUMNS = (
+    ('signups', 'signups', 8, 0),
+    ('workers', 'workers', 8, 0),
+    ('wall_seconds', 'wall s', 9, 2),
+    ('requests_per_second', 'req/s', 9, 1),
+    ('calls_per_signup', 'calls/signup', 13, 2),
+    ('peak_rss_mb', 'peak RSS MB', 12, 1),
+    ('seeded_rss_mb', 'seeded MB', 10, 1),
+    ('path_updates_errors', 'errors', 7, 0),
+    ('final_limit', 'limit', 6, 0),
+)
+
+
+def _int_list(value: str):
+    return [int(v) for v in value.split(',') if v]
+
+
+def run_once(args) -> dict:
+    """One measurement in this process (the --one child)"""
+    sys.path.insert(0, REPO_ROOT)
+    sys.path.insert(0, NIGHTLY_DIR)
+    import logging
+
+    from benchmarks.mock_nb_server import MockNation, mount_mock_nation
+    from nb_path_updates.nb_path_nightly import main as nightly_main
+    from nb_path_updates.nb_path_nightly.utils import profiling_utils
+    from src.nb_api_client import NationBuilderClient
+    from src.nb_concurrency import AIMDConcurrencyLimiter
+
+    logging.basicConfig(level=getattr(logging, args.log_level))
+    logger = logging.getLogger('bench_nightly')
+
+    # State and outputs (CSVs, summaries, metrics) go to a scratch dir, not the tracked outputs/
+    state_dir = tempfile.mkdtemp(prefix='bench_nightly_')
+    os.environ.update({
+        'NB_STATE_DIR': state_dir,
+        'NB_RUN_HISTORY_DB': os.path.join(state_dir, 'run_history.sqlite3'),
+        'NB_OUTPUT_DIR': os.path.join(state_dir, 'outputs'),
+        'NB_ADMIN_SIGNUP_ID': '1',
+        'NB_JOURNEY_WORKERS': str(args.workers),
+    })
+
+    seed_start = time.perf_counter()
+    nation = MockNation.synthetic(
+        tagged_signups=args.signups, journeys=args.journeys, seed=args.seed,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, rate_limit_rps=args.rate_limit,
+        throttle_rate=args.throttle_rate, error_rate=args.error_rate, token_ttl_seconds=args.token_ttl
+    )
+    seed_seconds = time.perf_counter() - seed_start
+    seeded_rss_mb = profiling_utils.peak_rss_mb()
+
+    client = NationBuilderClient(nation_slug='mock', access_token='mock-token',
+                                 refresh_token=nation.refresh_token, client_id='mock',
+                                 client_secret='mock')
+    mount_mock_nation(client, nation)
+    if args.adaptive:
+        client.concurrency_limiter = AIMDConcurrencyLimiter(max_limit=args.workers)
+
+    api_metrics = nightly_main.metrics_utils.ApiMetrics()
+    api_metrics.attach(client)
+    deadline = nightly_main.build_deadline(None)
+
+    start = time.perf_counter()
+    results = nightly_main.run_nightly(client, logger, None, deadline, api_metrics) or []
+    wall_seconds = time.perf_counter() - start
+
+    summary = api_metrics.summary()
+    result = results[0] if results else {}
+    return {
+        'signups': args.signups,
+        'workers': args.workers,
+        'journeys': args.journeys,
+        'wall_seconds': wall_seconds,
+        'seed_seconds': seed_seconds,
+        'api_calls': summary['api_calls'],
+        'api_errors': summary['api_errors'],
+        'requests_per_second': summary['api_calls'] / wall_seconds if wall_seconds else 0.0,
+        'calls_per_signup': summary['api_calls'] / args.signups if args.signups else 0.0,
+        'latency_p95_ms': summary['latency_p95_ms'],
+        'peak_rss_mb': profiling_utils.peak_rss_mb(),
+        'seeded_rss_mb': seeded_rss_mb,
+        'path_updates_successful': result.get('path_updates_successful', 0),
+        'path_updates_errors': result.get('path_updates_errors', 0),
+        'faults': nation.stats()['faults'],
+        'final_limit': client.concurrency_limiter.limit if args.adaptive else None,
+        'limiter': client.concurrency_limiter.snapshot() if args.adaptive else None,
+    }
+
+
+def measure(args, signups: int, workers: int) -> dict:
+    """Run one measurement in a fresh interpreter"""
+    command = [
+        sys.executable, os.path.abspath(__file__), '--one',
+        '--signups', str(signups), '--workers', str(workers),
+        '--journeys', str(args.journeys), '--seed', str(args.seed),
+        '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+        '--throttle-rate', str(args.throttle_rate), '--error-rate', str(args.error_rate),
+        '--log-level', args.log_level,
+    ]
+    if args.rate_limit:
+        command += ['--rate-limit', str(args.rate_limit)]
+    if args.token_ttl:
+        command += ['--token-ttl', str(args.token_ttl)]
+    if args.adaptive:
+        command.append('--adaptive')
+
+    output = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--signups', default='100,5000,50000', help="Tagged signups per run (comma-separated)")
+    parser.add_argument('--workers', default='1,4,16', help="Journey concurrency settings (comma-separated)")
+    parser.add_argument('--journeys', type=int, default=156000, help="Existing path journeys in the nation")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency-ms', type=float, default=10, help="Mock latency per request")
+    parser.add_argument('--jitter-ms', type=float, default=5, help="Extra random latency per request, up to this")
+    parser.add_argument('--rate-limit', type=float, default=None, help="Mock requests/second before 429s")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Chance of a random 429")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Chance of a random 5xx")
+    parser.add_argument('--token-ttl', type=float, default=None, help="Seconds until access tokens expire")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="Use the AIMD concurrency limiter, with --workers as its ceiling")
+    parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    parser.add_argument('--one', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.one:
+        args.signups = int(args.signups)
+        args.workers = int(args.workers)
+        print(json.dumps(run_once(args)))
+        return
+
+    results = []
+    for signups in _int_list(args.signups):
+        for workers in _int_list(args.workers):
+            results.append(measure(args, signups, workers))
+            if not args.json:
+                print(f"  signups={signups} workers={workers}: {results[-1]['wall_seconds']:.2f}s",
+                      file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return results
+
+    print(''.join(f"{label:>{width}}" for _, label, width, _ in COLUMNS))
+    for r in results:
+        print(''.join(f"{r[key] or 0:>{width}.{decimals}f}" for key, _, width, decimals in COLUMNS))
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,762 @@
+# benchmarks/mock_nb_server.py
+"""
+Local stand-in for the NationBuilder v2 endpoints NationBuilderClient uses
+
+Covers signups, signup_tags, signup_taggings, paths, path_steps,
+path_journeys (create, update, reactivate), lists (lookup, create,
+add_signups) and oauth/token, seeded from the data_sample CSVs or with
+synthetic data. Latency, rate limits, random 429s/5xx and token expiry are
+configurable, so client concurrency and retry behavior can be benchmarked
+without touching the production nation.
+
+MockNation holds the state and answers requests as plain
+(status, body, headers) tuples; create_app() wraps it in FastAPI and
+MockNationAdapter serves it in-process to a requests session (see
+mount_mock_nation), with no sockets involved.
+
+Usage:
+    python benchmarks/mock_nb_server.py --tagged 5000 --journeys 156000
+    python benchmarks/mock_nb_server.py --seed-from data_sample --latency-ms 80 --jitter-ms 40 \\
+        --rate-limit 10 --throttle-rate 0.02 --error-rate 0.01 --token-ttl 120
+
+Point the nightly run at it with the environment printed on startup
+(NB_API_BASE_URL, NB_OAUTH_URL, tokens). GET /_mock/stats shows request
+counts by endpoint and status and the faults injected; POST /_mock/reset
+clears them and POST /_mock/expire_tokens forces the next call to 401.
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from itertools import chain
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DATA_SAMPLE_DIR = os.path.join(REPO_ROOT, 'data_sample')
+
+API_PREFIX = '/api/v2'
+OAUTH_PATH = '/oauth/token'
+
+# What the clickers filter works with
+DEFAULT_TAG_ID = '14890'
+DEFAULT_TAG_NAME = 'zi-c-24h'
+DEFAULT_PATH_ID = '1109'
+DEFAULT_STEP_ID = '1380'
+
+# journey_status in the database snapshot (data_sample) vs the API's strings
+SNAPSHOT_JOURNEY_STATUS = {'0': 'active', '1': 'completed', '2': 'abandoned'}
+
+# Journeys are kept as compact lists (156k of them in the benchmarks)
+JOURNEY_FIELDS = ('signup_id', 'path_id', 'current_step_id', 'journey_status', 'created_at')
+
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+Response = Tuple[int, Optional[Dict[str, Any]], Dict[str, str]]
+
+
+def _error(status: int, title: str, detail: str = None, headers: Dict[str, str] = None) -> Response:
+    error = {'status': str(status), 'title': title}
+    if detail:
+        error['detail'] = detail
+    return status, {'errors': [error]}, headers or {}
+
+
+def _resource(resource_type: str, resource_id, attributes: Dict[str, Any]) -> Dict[str, Any]:
+    return {'type': resource_type, 'id': str(resource_id), 'attributes': attributes}
+
+
+def _parse_filters(query: Dict[str, str]) -> Dict[str, Tuple[str, str]]:
+    """{'filter[slug][prefix]': 'x', 'filter[tag_id]': '1'} -> {'slug': ('prefix', 'x'), 'tag_id': ('eq', '1')}"""
+    filters = {}
+    for key, value in query.items():
+        match = re.fullmatch(r'filter\[(\w+)\](?:\[(\w+)\])?', key)
+        if match:
+            filters[match.group(1)] = (match.group(2) or 'eq', str(value))
+    return filters
+
+
+def _matches(value, operator: str, expected: str) -> bool:
+    value = '' if value is None else str(value)
+    if operator == 'prefix':
+        return value.startswith(expected)
+    if operator in ('eq', 'in'):
+        return value in expected.split(',')
+    if operator == 'not_eq':
+        return value != expected
+    return False
+
+
+def _paginate(items: List[Any], query: Dict[str, str], default_size: int = 20) -> List[Any]:
+    size = max(1, min(int(query.get('page[size]', default_size)), 100))
+    number = max(1, int(query.get('page[number]', 1)))
+    return items[(number - 1) * size:number * size]
+
+
+def _read_sample_csv(directory: str, filename: str) -> List[Dict[str, str]]:
+    """data_sample CSVs are UTF-16 exports; missing files read as empty"""
+    path = os.path.join(directory, filename)
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='', encoding='utf-16') as f:
+        return list(csv.DictReader(f))
+
+
+class MockNation:
+    """
+    In-memory NationBuilder nation plus fault injection
+
+    latency_ms/jitter_ms: added per request by the transport (sample_latency)
+    rate_limit_rps: requests per second before answering 429 (token bucket)
+    throttle_rate/error_rate: chance of a random 429 / 5xx per request
+    token_ttl_seconds: access tokens expire (401) this long after issue
+    """
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0,
+                 rate_limit_rps: float = None, throttle_rate: float = 0.0,
+                 error_rate: float = 0.0, token_ttl_seconds: float = None,
+                 access_token: str = 'mock-token', refresh_token: str = 'mock-refresh',
+                 seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_rps = rate_limit_rps
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.token_ttl_seconds = token_ttl_seconds
+
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._bucket_tokens = rate_limit_rps or 0.0
+        self._bucket_updated = time.monotonic()
+
+        # Signups: explicit rows (from CSVs) plus 1..synthetic_signups
+        self.signups: Dict[str, Dict[str, Any]] = {}
+        self.synthetic_signups = 0
+        self.tags: Dict[str, Dict[str, Any]] = {}
+        # tag_id -> [(tagging_id, signup_id, created_at)]
+        self.taggings: Dict[str, List[tuple]] = {}
+        self.paths: Dict[str, Dict[str, Any]] = {}
+        self.path_steps: Dict[str, Dict[str, Any]] = {}
+        self.journeys: Dict[int, list] = {}
+        self.journeys_by_signup: Dict[str, List[int]] = {}
+        self.lists: Dict[str, Dict[str, Any]] = {}
+        self.list_members: Dict[str, set] = {}
+        self._next_id = {'tagging': 1, 'journey': 1, 'list': 1}
+
+        # access token -> monotonic expiry (None = never)
+        self.tokens: Dict[str, Optional[float]] = {}
+        self.refresh_token = refresh_token
+        self._tokens_issued = 0
+        self._issue_token(access_token)
+
+        self.reset_stats()
+
+    # ---- seeding ---------------------------------------------------------
+
+    @classmethod
+    def synthetic(cls, tagged_signups: int = 100, journeys: int = 0, tag_id: str = DEFAULT_TAG_ID,
+                  path_id: str = DEFAULT_PATH_ID, step_id: str = DEFAULT_STEP_ID,
+                  seed: int = 0, **kwargs) -> 'MockNation':
+        """
+        tagged_signups signups carry tag_id; journeys are spread over a
+        population at least twice that size, about a third of them on the
+        target path (a mix of active and inactive, some already on step_id)
+        """
+        nation = cls(seed=seed, **kwargs)
+        rng = random.Random(seed)
+        population = max(tagged_signups * 2, journeys // 2, 1)
+        nation.synthetic_signups = population
+
+        other_paths = [str(int(path_id) + offset) for offset in (-1, 1, 2, 3)]
+        nation.add_tag(tag_id, DEFAULT_TAG_NAME if tag_id == DEFAULT_TAG_ID else f"tag-{tag_id}")
+        for pid in [path_id] + other_paths:
+            steps = [step_id] if pid == path_id else []
+            steps += [str(int(pid) * 10 + n) for n in range(1, 4)]
+            nation.add_path(pid, steps)
+
+        start = datetime(2025, 1, 1)
+        for signup_id in range(1, tagged_signups + 1):
+            created_at = start + timedelta(seconds=rng.randint(0, 86400 * 30))
+            nation.add_tagging(str(signup_id), tag_id, created_at.isoformat())
+
+        seen = set()
+        attempts = 0
+        while len(seen) < journeys and attempts < journeys * 3:
+            attempts += 1
+            signup_id = str(rng.randint(1, population))
+            pid = path_id if rng.random() < 0.33 else rng.choice(other_paths)
+            if (signup_id, pid) in seen:
+                continue
+            seen.add((signup_id, pid))
+            status = 'active' if rng.random() < 0.8 else 'abandoned'
+            step = rng.choice(nation.paths[pid]['step_ids'])
+            nation.add_journey(signup_id, pid, step, status)
+
+        return nation
+
+    @classmethod
+    def from_data_sample(cls, directory: str = DATA_SAMPLE_DIR, tag_id: str = DEFAULT_TAG_ID,
+                         path_id: str = DEFAULT_PATH_ID, step_id: str = DEFAULT_STEP_ID,
+                         **kwargs) -> 'MockNation':
+        """
+        Seed from the data_sample CSVs (signups, signup_taggings, path_journeys)
+
+        If no sampled tagging has tag_id, every sampled signup and every
+        signup with a sampled journey is tagged with it, so the clickers
+        flow has work to do.
+        """
+        nation = cls(**kwargs)
+        nation.add_tag(tag_id, DEFAULT_TAG_NAME if tag_id == DEFAULT_TAG_ID else f"tag-{tag_id}")
+        nation.add_path(path_id, [step_id])
+
+        for row in _read_sample_csv(directory, 'signups_sample.csv'):
+            nation.signups[row['id']] = {
+                'first_name': row.get('first_name'),
+                'last_name': row.get('last_name'),
+                'email': row.get('email1'),
+                'created_at': row.get('created_at'),
+            }
+
+        for row in _read_sample_csv(directory, 'signup_taggings_sample.csv'):
+            if row['tag_id'] not in nation.tags:
+                nation.add_tag(row['tag_id'], f"tag-{row['tag_id']}")
+            nation.add_tagging(row['signup_id'], row['tag_id'], row.get('created_at'))
+
+        for row in _read_sample_csv(directory, 'path_journeys_sample.csv'):
+            if row['path_id'] not in nation.paths:
+                nation.add_path(row['path_id'], [])
+            if row['current_step_id'] not in nation.paths[row['path_id']]['step_ids']:
+                nation.paths[row['path_id']]['step_ids'].append(row['current_step_id'])
+            status = SNAPSHOT_JOURNEY_STATUS.get(row.get('journey_status'), 'active')
+            nation.add_journey(row['signup_id'], row['path_id'], row['current_step_id'], status,
+                               created_at=row.get('created_at'))
+
+        if not nation.taggings.get(tag_id):
+            for signup_id in list(nation.signups) + list(nation.journeys_by_signup):
+                nation.add_tagging(signup_id, tag_id, datetime.now().isoformat())
+
+        return nation
+
+    def add_tag(self, tag_id: str, name: str):
+        self.tags[str(tag_id)] = {'name': name}
+
+    def add_path(self, path_id: str, step_ids: List[str]):
+        path_id = str(path_id)
+        self.paths[path_id] = {'name': f"Path {path_id}", 'step_ids': list(step_ids)}
+        for step_id in step_ids:
+            self.path_steps[str(step_id)] = {'path_id': path_id, 'name': f"Step {step_id}"}
+
+    def add_tagging(self, signup_id: str, tag_id: str, created_at: str = None):
+        tagging_id = self._next_id['tagging']
+        self._next_id['tagging'] += 1
+        self.taggings.setdefault(str(tag_id), []).append((tagging_id, str(signup_id), created_at))
+
+    def add_journey(self, signup_id: str, path_id: str, step_id: str, status: str = 'active',
+                    created_at: str = None) -> int:
+        journey_id = self._next_id['journey']
+        self._next_id['journey'] += 1
+        signup_id = str(signup_id)
+        self.journeys[journey_id] = [signup_id, str(path_id), str(step_id), status,
+                                     created_at or datetime.now().isoformat()]
+        self.journeys_by_signup.setdefault(signup_id, []).append(journey_id)
+        return journey_id
+
+    def signup_exists(self, signup_id: str) -> bool:
+        signup_id = str(signup_id)
+        if signup_id in self.signups or signup_id in self.journeys_by_signup:
+            return True
+        return signup_id.isdigit() and 1 <= int(signup_id) <= self.synthetic_signups
+
+    def _signup_attributes(self, signup_id: str) -> Dict[str, Any]:
+        if signup_id in self.signups:
+            return dict(self.signups[signup_id])
+        return {'first_name': 'Mock', 'last_name': f"Signup {signup_id}",
+                'email': f"signup{signup_id}@example.invalid"}
+
+    def _all_signup_ids(self):
+        """Explicit signups, then synthetic 1..synthetic_signups (lazily)"""
+        explicit = set(self.signups) | set(self.journeys_by_signup)
+        synthetic = (str(i) for i in range(1, self.synthetic_signups + 1))
+        return chain(sorted(explicit, key=lambda s: (len(s), s)),
+                     (signup_id for signup_id in synthetic if signup_id not in explicit))
+
+    # ---- faults, tokens, stats ---------------------------------------------
+
+    def sample_latency(self) -> float:
+        """Seconds the transport should wait before answering"""
+        if not self.latency_ms and not self.jitter_ms:
+            return 0.0
+        with self._lock:
+            jitter = self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        return (self.latency_ms + jitter) / 1000.0
+
+    def _issue_token(self, token: str = None) -> str:
+        self._tokens_issued += 1
+        token = token or f"mock-token-{self._tokens_issued}"
+        expires_at = time.monotonic() + self.token_ttl_seconds if self.token_ttl_seconds else None
+        self.tokens[token] = expires_at
+        return token
+
+    def expire_tokens(self):
+        """Make every issued access token invalid (next API call gets a 401)"""
+        with self._lock:
+            for token in self.tokens:
+                self.tokens[token] = 0.0
+
+    def _token_valid(self, headers: Dict[str, str]) -> bool:
+        auth = headers.get('authorization', '')
+        if not auth.startswith('Bearer '):
+            return False
+        token = auth[len('Bearer '):]
+        if token not in self.tokens:
+            return False
+        expires_at = self.tokens[token]
+        return expires_at is None or time.monotonic() < expires_at
+
+    def _rate_limited(self) -> bool:
+        """Token bucket refilled at rate_limit_rps, burst of one second's worth"""
+        if not self.rate_limit_rps:
+            return False
+        now = time.monotonic()
+        self._bucket_tokens = min(self.rate_limit_rps,
+                                  self._bucket_tokens + (now - self._bucket_updated) * self.rate_limit_rps)
+        self._bucket_updated = now
+        if self._bucket_tokens < 1:
+            return True
+        self._bucket_tokens -= 1
+        return False
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats: Dict[str, int] = {}
+            self._faults = {'rate_limited': 0, 'throttled': 0, 'server_errors': 0,
+                            'unauthorized': 0, 'token_refreshes': 0}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': sum(self._stats.values()),
+                'by_endpoint': dict(sorted(self._stats.items())),
+                'faults': dict(self._faults),
+                'journeys': len(self.journeys),
+                'lists': len(self.lists),
+                'list_members': sum(len(m) for m in self.list_members.values()),
+            }
+
+    # ---- dispatch --------------------------------------------------------
+
+    def handle(self, method: str, path: str, query: Dict[str, str] = None,
+               body: bytes = b'', headers: Dict[str, str] = None) -> Response:
+        """
+        Answer one request: (status, JSON body or None, response headers)
+
+        path is the URL path (e.g. /api/v2/signups); headers are matched
+        case-insensitively.
+        """
+        method = method.upper()
+        query = query or {}
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        with self._lock:
+            response = self._handle(method, path, query, body or b'', headers)
+            key = f"{method} {_ID_SEGMENT.sub('/{id}', path)} {response[0]}"
+            self._stats[key] = self._stats.get(key, 0) + 1
+        return response
+
+    def _handle(self, method: str, path: str, query: Dict[str, str], body: bytes,
+                headers: Dict[str, str]) -> Response:
+        if path == OAUTH_PATH and method == 'POST':
+            return self._oauth_token(body, headers)
+
+        if self._rate_limited():
+            self._faults['rate_limited'] += 1
+            return _error(429, 'Too Many Requests', 'Rate limit exceeded', {'Retry-After': '1'})
+        if self.throttle_rate and self._rng.random() < self.throttle_rate:
+            self._faults['throttled'] += 1
+            return _error(429, 'Too Many Requests', 'Throttled', {'Retry-After': '1'})
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self._faults['server_errors'] += 1
+            status = self._rng.choice((500, 502, 503))
+            return _error(status, 'Server Error', 'Injected failure')
+
+        if not self._token_valid(headers):
+            self._faults['unauthorized'] += 1
+            return _error(401, 'Unauthorized', 'The access token is invalid or has expired')
+
+        if not path.startswith(API_PREFIX + '/'):
+            return _error(404, 'Not Found', path)
+        parts = path[len(API_PREFIX) + 1:].strip('/').split('/')
+
+        payload = {}
+        if body:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                return _error(400, 'Bad Request', 'Body is not valid JSON')
+
+        resource = parts[0]
+        if resource == 'signups' and method == 'GET':
+            return self._get_signups(parts, query)
+        if resource == 'signup_tags' and method == 'GET':
+            return self._get_signup_tags(query)
+        if resource == 'signup_taggings' and method == 'GET':
+            return self._get_signup_taggings(query)
+        if resource == 'paths' and method == 'GET':
+            return self._get_paths()
+        if resource == 'path_steps' and method == 'GET':
+            return self._get_path_steps(query)
+        if resource == 'path_journeys':
+            if method == 'GET' and len(parts) == 1:
+                return self._get_path_journeys(query)
+            if method == 'POST' and len(parts) == 1:
+                return self._create_path_journey(payload)
+            if method == 'PATCH' and len(parts) == 2:
+                return self._update_path_journey(parts[1], payload, reactivate=False)
+            if method == 'PATCH' and len(parts) == 3 and parts[2] == 'reactivate':
+                return self._update_path_journey(parts[1], payload, reactivate=True)
+        if resource == 'lists':
+            if method == 'GET' and len(parts) == 1:
+                return self._get_lists(query)
+            if method == 'POST' and len(parts) == 1:
+                return self._create_list(payload)
+            if method == 'PATCH' and len(parts) == 3 and parts[2] == 'add_signups':
+                return self._add_signups(parts[1], payload)
+
+        return _error(404, 'Not Found', f"{method} {path}")
+
+    def _oauth_token(self, body: bytes, headers: Dict[str, str]) -> Response:
+        if 'json' in headers.get('content-type', ''):
+            form = json.loads(body or b'{}')
+        else:
+            form = {k: v[0] for k, v in parse_qs(body.decode('utf-8')).items()}
+
+        if form.get('grant_type') != 'refresh_token' or form.get('refresh_token') != self.refresh_token:
+            return 400, {'error': 'invalid_grant',
+                         'error_description': 'The refresh token is invalid or was already used'}, {}
+
+        self._faults['token_refreshes'] += 1
+        access_token = self._issue_token()
+        # Refresh tokens rotate: the one just spent is no longer valid
+        self.refresh_token = f"mock-refresh-{self._tokens_issued}"
+        return 200, {
+            'access_token': access_token,
+            'refresh_token': self.refresh_token,
+            'token_type': 'Bearer',
+            'expires_in': int(self.token_ttl_seconds or 86400),
+        }, {}
+
+    def _get_signups(self, parts: List[str], query: Dict[str, str]) -> Response:
+        if len(parts) == 2:
+            if not self.signup_exists(parts[1]):
+                return _error(404, 'Not Found', f"Signup {parts[1]} not found")
+            return 200, {'data': _resource('signups', parts[1], self._signup_attributes(parts[1]))}, {}
+
+        filters = _parse_filters(query)
+        page_size = max(1, min(int(query.get('page[size]', 20)), 100))
+        page_number = max(1, int(query.get('page[number]', 1)))
+        skip = (page_number - 1) * page_size
+        data = []
+        for signup_id in self._all_signup_ids():
+            attributes = self._signup_attributes(signup_id)
+            if all(_matches(signup_id if field == 'id' else attributes.get(field), op, value)
+                   for field, (op, value) in filters.items()):
+                if skip:
+                    skip -= 1
+                    continue
+                data.append(_resource('signups', signup_id, attributes))
+                if len(data) >= page_size:
+                    break
+        return 200, {'data': data}, {}
+
+    def _get_signup_tags(self, query: Dict[str, str]) -> Response:
+        filters = _parse_filters(query)
+        tags = [
+            _resource('signup_tags', tag_id, attrs)
+            for tag_id, attrs in sorted(self.tags.items())
+            if all(_matches(tag_id if field == 'id' else attrs.get(field), op, value)
+                   for field, (op, value) in filters.items())
+        ]
+        return 200, {'data': _paginate(tags, query)}, {}
+
+    def _get_signup_taggings(self, query: Dict[str, str]) -> Response:
+        filters = _parse_filters(query)
+        if 'tag_id' in filters:
+            tag_ids = filters['tag_id'][1].split(',')
+        else:
+            tag_ids = sorted(self.taggings)
+
+        if len(tag_ids) == 1 and 'signup_id' not in filters:
+            # Common case (one tag, paging through it): taggings are stored
+            # in id order, so slice the page straight out
+            tag_id = tag_ids[0]
+            rows = [(tagging_id, tag_id, signup_id, created_at)
+                    for tagging_id, signup_id, created_at in _paginate(self.taggings.get(tag_id, []), query)]
+        else:
+            rows = [(tagging_id, tag_id, signup_id, created_at)
+                    for tag_id in tag_ids
+                    for tagging_id, signup_id, created_at in self.taggings.get(tag_id, [])]
+            if 'signup_id' in filters:
+                op, value = filters['signup_id']
+                rows = [row for row in rows if _matches(row[2], op, value)]
+            rows = _paginate(sorted(rows), query)
+
+        data = [
+            _resource('signup_taggings', tagging_id,
+                      {'tag_id': tag_id, 'signup_id': signup_id, 'created_at': created_at})
+            for tagging_id, tag_id, signup_id, created_at in rows
+        ]
+        return 200, {'data': data}, {}
+
+    def _get_paths(self) -> Response:
+        data = [_resource('paths', path_id, {'name': attrs['name']})
+                for path_id, attrs in sorted(self.paths.items())]
+        return 200, {'data': data}, {}
+
+    def _get_path_steps(self, query: Dict[str, str]) -> Response:
+        filters = _parse_filters(query)
+        data = [
+            _resource('path_steps', step_id, dict(attrs))
+            for step_id, attrs in sorted(self.path_steps.items())
+            if all(_matches(attrs.get(field), op, value) for field, (op, value) in filters.items())
+        ]
+        return 200, {'data': _paginate(data, query, default_size=100)}, {}
+
+    def _journey_resource(self, journey_id: int) -> Dict[str, Any]:
+        return _resource('path_journeys', journey_id, dict(zip(JOURNEY_FIELDS, self.journeys[journey_id])))
+
+    def _get_path_journeys(self, query: Dict[str, str]) -> Response:
+        filters = _parse_filters(query)
+        if 'signup_id' in filters and filters['signup_id'][0] == 'eq':
+            candidates = [jid for signup_id in filters['signup_id'][1].split(',')
+                          for jid in self.journeys_by_signup.get(signup_id, [])]
+        else:
+            candidates = sorted(self.journeys)
+        matching = []
+        for journey_id in candidates:
+            attrs = dict(zip(JOURNEY_FIELDS, self.journeys[journey_id]))
+            if all(_matches(journey_id if field == 'id' else attrs.get(field), op, value)
+                   for field, (op, value) in filters.items()):
+                matching.append(journey_id)
+        data = [self._journey_resource(jid) for jid in _paginate(matching, query)]
+        return 200, {'data': data}, {}
+
+    def _create_path_journey(self, payload: Dict[str, Any]) -> Response:
+        attrs = payload.get('data', {}).get('attributes', {})
+        signup_id = str(attrs.get('signup_id') or '')
+        step_id = str(attrs.get('current_step_id') or attrs.get('path_step_id') or '')
+        path_id = str(attrs.get('path_id') or self.path_steps.get(step_id, {}).get('path_id') or '')
+
+        if not self.signup_exists(signup_id):
+            return _error(422, 'Unprocessable Entity', f"Signup {signup_id} not found")
+        if path_id not in self.paths or step_id not in self.paths[path_id]['step_ids']:
+            return _error(422, 'Unprocessable Entity', f"Step {step_id} is not on path {path_id}")
+        for journey_id in self.journeys_by_signup.get(signup_id, []):
+            if self.journeys[journey_id][1] == path_id:
+                return _error(422, 'Unprocessable Entity',
+                              f"Signup {signup_id} already has a journey on path {path_id}")
+
+        journey_id = self.add_journey(signup_id, path_id, step_id)
+        return 201, {'data': self._journey_resource(journey_id)}, {}
+
+    def _update_path_journey(self, journey_id: str, payload: Dict[str, Any], reactivate: bool) -> Response:
+        journey = self.journeys.get(int(journey_id)) if journey_id.isdigit() else None
+        if journey is None:
+            return _error(404, 'Not Found', f"Path journey {journey_id} not found")
+
+        step_id = str(payload.get('data', {}).get('attributes', {}).get('current_step_id') or '')
+        if step_id not in self.paths[journey[1]]['step_ids']:
+            return _error(422, 'Unprocessable Entity', f"Step {step_id} is not on path {journey[1]}")
+        if reactivate:
+            if journey[3] == 'active':
+                return _error(422, 'Unprocessable Entity', f"Path journey {journey_id} is already active")
+            journey[3] = 'active'
+        elif journey[3] != 'active':
+            return _error(422, 'Unprocessable Entity', f"Path journey {journey_id} is not active")
+        journey[2] = step_id
+        return 200, {'data': self._journey_resource(int(journey_id))}, {}
+
+    def _get_lists(self, query: Dict[str, str]) -> Response:
+        filters = _parse_filters(query)
+        data = [
+            _resource('lists', list_id, dict(attrs))
+            for list_id, attrs in self.lists.items()
+            if all(_matches(list_id if field == 'id' else attrs.get(field), op, value)
+                   for field, (op, value) in filters.items())
+        ]
+        body = {'data': _paginate(data, query)}
+        size = max(1, min(int(query.get('page[size]', 20)), 100))
+        number = max(1, int(query.get('page[number]', 1)))
+        if number * size < len(data):
+            body['links'] = {'next': f"{API_PREFIX}/lists?{urlencode({**query, 'page[number]': number + 1})}"}
+        return 200, body, {}
+
+    def _create_list(self, payload: Dict[str, Any]) -> Response:
+        data = payload.get('data', {})
+        attrs = data.get('attributes', {})
+        slug = attrs.get('slug')
+        author_id = data.get('relationships', {}).get('author', {}).get('data', {}).get('id')
+        if not slug:
+            return _error(422, 'Unprocessable Entity', 'slug is required')
+        if any(existing['slug'] == slug for existing in self.lists.values()):
+            return _error(422, 'Unprocessable Entity', f"Slug {slug} has already been taken")
+        if not author_id:
+            return _error(422, 'Unprocessable Entity', 'author is required')
+
+        list_id = str(self._next_id['list'])
+        self._next_id['list'] += 1
+        self.lists[list_id] = {'slug': slug, 'name': attrs.get('name') or slug, 'author_id': str(author_id)}
+        self.list_members[list_id] = set()
+        return 201, {'data': _resource('lists', list_id, dict(self.lists[list_id]))}, {}
+
+    def _add_signups(self, list_id: str, payload: Dict[str, Any]) -> Response:
+        if list_id not in self.lists:
+            return _error(404, 'Not Found', f"List {list_id} not found")
+        signup_ids = payload.get('data', {}).get('signup_ids', [])
+        self.list_members[list_id].update(str(s) for s in signup_ids)
+        # The real endpoint queues the work and answers with an empty body
+        return 202, None, {}
+
+
+class MockNationAdapter(BaseAdapter):
+    """
+    requests transport answering from a MockNation in the same process
+
+    Latency is slept on the calling thread, so concurrent callers overlap
+    the way they would against a real server.
+    """
+
+    def __init__(self, nation: MockNation):
+        super().__init__()
+        self.nation = nation
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        url = urlsplit(request.url)
+        query = {key: values[-1] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+        body = request.body or b''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        delay = self.nation.sample_latency()
+        if delay:
+            time.sleep(delay)
+        status, payload, headers = self.nation.handle(request.method, url.path, query, body,
+                                                      dict(request.headers))
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = HTTPStatus(status).phrase
+        response._content = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        response.headers = CaseInsensitiveDict({'Content-Type': 'application/json', **headers})
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def mount_mock_nation(client, nation: MockNation,
+                      base: str = 'http://mock.nationbuilder.invalid') -> MockNationAdapter:
+    """Point a NationBuilderClient at nation through an in-process adapter"""
+    client.base_url = f"{base}{API_PREFIX}"
+    client.oauth_url = f"{base}{OAUTH_PATH}"
+    adapter = MockNationAdapter(nation)
+    client.mount_transport(adapter)
+    return adapter
+
+
+def create_app(nation: MockNation):
+    """FastAPI app serving nation (latency is awaited, so slow requests overlap)"""
+    import asyncio
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, Response as FastAPIResponse
+
+    app = FastAPI(title="Mock NationBuilder v2")
+
+    @app.get('/_mock/stats')
+    def mock_stats():
+        return nation.stats()
+
+    @app.post('/_mock/reset')
+    def mock_reset():
+        nation.reset_stats()
+        return {'reset': True}
+
+    @app.post('/_mock/expire_tokens')
+    def mock_expire_tokens():
+        nation.expire_tokens()
+        return {'expired': len(nation.tokens)}
+
+    @app.api_route('/{path:path}', methods=['GET', 'POST', 'PATCH', 'PUT', 'DELETE'])
+    async def dispatch(path: str, request: Request):
+        body = await request.body()
+        delay = nation.sample_latency()
+        if delay:
+            await asyncio.sleep(delay)
+        status, payload, headers = nation.handle(request.method, request.url.path,
+                                                 dict(request.query_params), body, dict(request.headers))
+        if payload is None:
+            return FastAPIResponse(status_code=status, headers=headers)
+        return JSONResponse(payload, status_code=status, headers=headers)
+
+    return app
+
+
+def build_nation(args) -> MockNation:
+    faults = {
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'rate_limit_rps': args.rate_limit,
+        'throttle_rate': args.throttle_rate,
+        'error_rate': args.error_rate,
+        'token_ttl_seconds': args.token_ttl,
+        'seed': args.seed,
+    }
+    if args.seed_from:
+        return MockNation.from_data_sample(args.seed_from, **faults)
+    return MockNation.synthetic(tagged_signups=args.tagged, journeys=args.journeys, **faults)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed-from', metavar='DIR', help="Seed from data_sample-style CSVs instead of synthetic data")
+    parser.add_argument('--tagged', type=int, default=100, help="Synthetic: signups carrying the clickers tag")
+    parser.add_argument('--journeys', type=int, default=1000, help="Synthetic: existing path journeys")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for data and faults")
+    parser.add_argument('--latency-ms', type=float, default=0, help="Base latency per request")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="Extra uniform random latency, up to this")
+    parser.add_argument('--rate-limit', type=float, default=None, help="Requests/second before 429s")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Chance of a random 429")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Chance of a random 5xx")
+    parser.add_argument('--token-ttl', type=float, default=None, help="Seconds until access tokens expire")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    nation = build_nation(args)
+    base = f"http://{args.host}:{args.port}"
+    print(f"Mock nation: {sum(len(t) for t in nation.taggings.values())} taggings, "
+          f"{len(nation.journeys)} journeys")
+    print("Environment for the nightly run:")
+    print(f"  NB_API_BASE_URL={base}{API_PREFIX}")
+    print(f"  NB_OAUTH_URL={base}{OAUTH_PATH}")
+    print(f"  NB_NATION_SLUG=mock NB_PA_TOKEN=mock-token NB_PA_TOKEN_REFRESH={nation.refresh_token}")
+    print("  NB_PA_ID=mock NB_PA_SECRET=mock NB_ADMIN_SIGNUP_ID=1")
+    uvicorn.run(create_app(nation), host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
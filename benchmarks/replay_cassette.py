@@ -0,0 +1,143 @@
+# benchmarks/replay_cassette.py
+"""
+Replay a recorded nightly run offline and compare it with the recording
+
+Record a real run first (the cassette holds no bearer tokens or OAuth
+secrets, but does hold the nation's API responses - keep it private):
+    NB_CASSETTE_RECORD=nightly.cassette.json.gz python nb_path_updates/nb_path_nightly/main.py
+
+Then, with no network or credentials:
+    python benchmarks/replay_cassette.py nightly.cassette.json.gz
+    python benchmarks/replay_cassette.py nightly.cassette.json.gz --latency-scale 0.1 --max-extra-calls 0
+
+Reports API calls per endpoint (recorded vs replayed) and the replay's
+wall time; with --latency-scale > 0 recorded latencies are slept (scaled)
+and the simulated wall time at the original latencies is estimated as
+replay wall time / scale. Exits 1 if the replay makes more than
+--max-extra-calls calls beyond the recording, or hits requests the
+cassette doesn't have.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+NIGHTLY_DIR = os.path.join(REPO_ROOT, 'nb_path_updates', 'nb_path_nightly')
+
+
+@contextmanager
+def _scoped_environ(**values):
+    """Set environment variables for the duration of the block, then restore them"""
+    saved = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def replay(cassette_path: str, latency_scale: float = 0.0, log_level: str = 'WARNING',
+           output_dir: str = None) -> dict:
+    """
+    Run the nightly flow against the cassette; returns the comparison
+
+    State goes to a temporary directory, reports and metrics to output_dir
+    (default: a temporary directory too, so replays never mix with real
+    runs' outputs).
+    """
+    for path in (REPO_ROOT, NIGHTLY_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    import logging
+
+    logging.basicConfig(level=getattr(logging, log_level))
+
+    state_dir = tempfile.mkdtemp(prefix='replay_cassette_')
+    with _scoped_environ(NB_STATE_DIR=state_dir,
+                         NB_RUN_HISTORY_DB=os.path.join(state_dir, 'run_history.sqlite3'),
+                         NB_OUTPUT_DIR=output_dir or os.path.join(state_dir, 'outputs'),
+                         NB_ADMIN_SIGNUP_ID=os.getenv('NB_ADMIN_SIGNUP_ID', '1')):
+        return _replay(cassette_path, latency_scale, logging.getLogger('replay_cassette'))
+
+
+def _replay(cassette_path: str, latency_scale: float, logger) -> dict:
+    from nb_path_updates.nb_path_nightly import main as nightly_main
+    from src.nb_api_client import NationBuilderClient
+    from src.nb_cassette import CassetteReplayer
+
+    replayer = CassetteReplayer(cassette_path, latency_scale=latency_scale)
+    client = NationBuilderClient(nation_slug='replay', access_token='replay-token',
+                                 refresh_token='replay-refresh', client_id='replay',
+                                 client_secret='replay', transport=replayer)
+
+    api_metrics = nightly_main.metrics_utils.ApiMetrics()
+    api_metrics.attach(client)
+    start = time.perf_counter()
+    results = nightly_main.run_nightly(client, logger, None, nightly_main.build_deadline(None),
+                                       api_metrics) or []
+    wall_seconds = time.perf_counter() - start
+
+    comparison = replayer.summary()
+    comparison['replay_wall_seconds'] = round(wall_seconds, 3)
+    comparison['latency_scale'] = latency_scale
+    comparison['simulated_wall_seconds'] = round(wall_seconds / latency_scale, 3) if latency_scale else None
+    comparison['results'] = [
+        {key: r.get(key) for key in ('filter_name', 'success', 'people_count',
+                                     'path_updates_successful', 'path_updates_errors')}
+        for r in results
+    ]
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('cassette', help="Cassette file (.json or .json.gz)")
+    parser.add_argument('--latency-scale', type=float, default=0.0,
+                        help="Sleep recorded latencies times this (default: 0, no sleeping)")
+    parser.add_argument('--max-extra-calls', type=int, default=None,
+                        help="Fail if the replay makes more than this many calls beyond the recording")
+    parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument('--output-dir', default=None,
+                        help="Keep the replay's reports and metrics here (default: a temporary directory)")
+    parser.add_argument('--json', action='store_true', help="Print the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    comparison = replay(args.cassette, args.latency_scale, args.log_level, args.output_dir)
+
+    if args.json:
+        print(json.dumps(comparison, indent=2))
+    else:
+        print(f"{'endpoint':<48}{'recorded':>10}{'replayed':>10}")
+        for endpoint, counts in comparison['endpoints'].items():
+            marker = '' if counts['recorded'] == counts['replayed'] else '  *'
+            print(f"{endpoint:<48}{counts['recorded']:>10}{counts['replayed']:>10}{marker}")
+        print(f"{'total':<48}{comparison['recorded_calls']:>10}{comparison['replayed_calls']:>10}")
+        print(f"Recorded run: {comparison['recorded_seconds']}s "
+              f"({comparison['recorded_latency_seconds']}s of API latency)")
+        print(f"Replay: {comparison['replay_wall_seconds']}s wall", end='')
+        if comparison['simulated_wall_seconds'] is not None:
+            print(f", ~{comparison['simulated_wall_seconds']}s simulated at recorded latency")
+        else:
+            print()
+        if comparison['fallback_matches']:
+            print(f"{comparison['fallback_matches']} request(s) matched by endpoint only (query/body changed)")
+        for request in comparison['unmatched']:
+            print(f"Not in cassette: {request}")
+
+    extra_calls = comparison['replayed_calls'] - comparison['recorded_calls']
+    if comparison['unmatched'] or (args.max_extra_calls is not None and extra_calls > args.max_extra_calls):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,89 +1,143 @@
-import asyncpg
 import asyncio
-import os
 import csv
-from dotenv import load_dotenv
 from datetime import datetime
 
-load_dotenv()
-
-DB_CONFIG = {
-    "user": os.getenv("POSTGRES_USER", "dev_user"),
-    "password": os.getenv("POSTGRES_PASSWORD", "dev_password"),
-    "database": os.getenv("POSTGRES_DB", "campaign_buddy_ai"),
-    "host": os.getenv("POSTGRES_HOST", "localhost"),
-    "port": os.getenv("POSTGRES_PORT", "5432"),
-}
+from src import db
+from src.event_exports import copy_query_to_csv, export_path
 
 SCHEMA = "nbuild_larouchepac"
 DATE_CUTOFF = datetime(2025, 1, 1)
+EXCLUDED_BROADCASTER_ID = 1062
+
+# Mailings sent since the cutoff (excluding the broadcaster); opens only
+# count for these mailings
+SENT_MAILINGS_SQL = f"""
+    SELECT mailing_id
+    FROM {SCHEMA}.mailing_events_sent
+    WHERE created_at >= $1 AND broadcaster_id <> $2
+"""
+
+# NB records machine opens (e.g. Apple Mail Privacy Protection
+# prefetches) in mailing_events_opened too. An open counts only if its
+# (signup, mailing) pair has more opens than machine opens, i.e. at least
+# one a person made. The comparison is per pair, so it doesn't rely on the
+# two tables' created_at values matching exactly. Both tables are
+# aggregated to pairs once and hash-joined, rather than counted per open.
+PAIR_OPENS_CTES = f"""
+    open_counts AS (
+        SELECT signup_id, mailing_id, count(*) AS opens
+        FROM {SCHEMA}.mailing_events_opened
+        WHERE broadcaster_id <> $2
+          AND mailing_id IN ({SENT_MAILINGS_SQL})
+        GROUP BY signup_id, mailing_id
+    ),
+    machine_counts AS (
+        SELECT signup_id, mailing_id, count(*) AS machine_opens
+        FROM {SCHEMA}.mailing_events_machine_opened
+        WHERE mailing_id IN ({SENT_MAILINGS_SQL})
+        GROUP BY signup_id, mailing_id
+    ),
+    pair_opens AS (
+        SELECT open_counts.signup_id, open_counts.mailing_id, open_counts.opens,
+               COALESCE(machine_counts.machine_opens, 0) AS machine_opens
+        FROM open_counts
+        LEFT JOIN machine_counts USING (signup_id, mailing_id)
+    )
+"""
+
+# Opens of the sent mailings, less machine opens
+OPENED_EXPORT_SQL = f"""
+    WITH {PAIR_OPENS_CTES}
+    SELECT o.mailing_id, o.signup_id, o.created_at, o.broadcaster_id
+    FROM {SCHEMA}.mailing_events_opened o
+    JOIN pair_opens ON pair_opens.signup_id = o.signup_id AND pair_opens.mailing_id = o.mailing_id
+    WHERE o.broadcaster_id <> $2
+      AND pair_opens.opens > pair_opens.machine_opens
+"""
+
+# Opens of the sent mailings left out as machine opens
+MACHINE_OPENS_SQL = f"""
+    WITH {PAIR_OPENS_CTES}
+    SELECT COALESCE(sum(opens), 0)::bigint
+    FROM pair_opens
+    WHERE opens <= machine_opens
+"""
+
+# Per-signup distinct sent / opened / clicked mailings, open frequency
+# and click-to-open rate, computed in Postgres so only one row per signup
+# comes back
+OPEN_FREQUENCY_SQL = f"""
+    WITH sent AS (
+        SELECT signup_id, COUNT(DISTINCT mailing_id) AS sent_count
+        FROM {SCHEMA}.mailing_events_sent
+        WHERE created_at >= $1 AND broadcaster_id <> $2
+        GROUP BY signup_id
+    ),
+    {PAIR_OPENS_CTES},
+    opened AS (
+        -- One row per pair, so this counts distinct mailings
+        SELECT signup_id, count(*) AS opened_count
+        FROM pair_opens
+        WHERE opens > machine_opens
+        GROUP BY signup_id
+    ),
+    clicked AS (
+        SELECT signup_id, COUNT(DISTINCT mailing_id) AS clicked_count
+        FROM {SCHEMA}.mailing_events_clicked
+        WHERE broadcaster_id <> $2
+          AND mailing_id IN ({SENT_MAILINGS_SQL})
+        GROUP BY signup_id
+    )
+    SELECT sent.signup_id,
+           sent.sent_count,
+           COALESCE(opened.opened_count, 0) AS opened_count,
+           COALESCE(opened.opened_count, 0)::float8 / sent.sent_count AS open_frequency,
+           COALESCE(clicked.clicked_count, 0) AS clicked_count,
+           COALESCE(COALESCE(clicked.clicked_count, 0)::float8 / NULLIF(opened.opened_count, 0), 0) AS click_to_open_rate
+    FROM sent
+    LEFT JOIN opened USING (signup_id)
+    LEFT JOIN clicked USING (signup_id)
+    ORDER BY open_frequency DESC, sent.signup_id
+"""
+
+
+async def fetch_open_frequencies(conn, cutoff=DATE_CUTOFF, excluded_broadcaster_id=EXCLUDED_BROADCASTER_ID):
+    """
+    (signup_id, sent_count, opened_count, open_frequency, clicked_count,
+    click_to_open_rate) rows, highest frequency first
+    """
+    return await conn.fetch(OPEN_FREQUENCY_SQL, cutoff, excluded_broadcaster_id)
+
 
 async def main():
-    conn = await asyncpg.connect(**DB_CONFIG)
+    conn = await db.connect()
 
-    # 1. Filter mailing_events_sent by created_at >= 2025-01-01
-    sent_rows = await conn.fetch(f"""
+    # 1. Export mailing_events_sent since the cutoff (COPY; gzipped if EXPORT_GZIP is set)
+    await copy_query_to_csv(conn, export_path("mailing_events_sent_filtered"), f"""
         SELECT mailing_id, signup_id, created_at, broadcaster_id
         FROM {SCHEMA}.mailing_events_sent
-        WHERE created_at >= $1 AND broadcaster_id <> 1062
-    """, DATE_CUTOFF)
+        WHERE created_at >= $1 AND broadcaster_id <> $2
+    """, DATE_CUTOFF, EXCLUDED_BROADCASTER_ID)
 
-    # Export filtered mailing_events_sent
-    with open("mailing_events_sent_filtered.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["mailing_id", "signup_id", "created_at", "broadcaster_id"])
-        for row in sent_rows:
-            writer.writerow([row["mailing_id"], row["signup_id"], row["created_at"], row["broadcaster_id"]])
-
-    # 2. For each unique signup_id, count unique mailing_id in sent
-    sent_counts = {}
-    sent_mailing_ids = set()
-    for row in sent_rows:
-        signup_id = row["signup_id"]
-        mailing_id = row["mailing_id"]
-        sent_mailing_ids.add(mailing_id)
-        sent_counts.setdefault(signup_id, set()).add(mailing_id)
-    sent_counts = {k: len(v) for k, v in sent_counts.items()}
-
-    # 3. Filter mailing_events_opened by mailing_id in sent_mailing_ids
-    opened_rows = await conn.fetch(f"""
-        SELECT mailing_id, signup_id, created_at, broadcaster_id
-        FROM {SCHEMA}.mailing_events_opened
-        WHERE mailing_id = ANY($1::bigint[]) AND broadcaster_id <> 1062
-    """, list(sent_mailing_ids))
+    # 2. Export mailing_events_opened for those mailings, less machine opens
+    # (the sent mailings are a subquery, not an array sent back from Python)
+    await copy_query_to_csv(conn, export_path("mailing_events_opened_filtered"), OPENED_EXPORT_SQL,
+                            DATE_CUTOFF, EXCLUDED_BROADCASTER_ID)
 
-    # Export filtered mailing_events_opened
-    with open("mailing_events_opened_filtered.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["mailing_id", "signup_id", "created_at", "broadcaster_id"])
-        for row in opened_rows:
-            writer.writerow([row["mailing_id"], row["signup_id"], row["created_at"], row["broadcaster_id"]])
-
-    # 4. For each unique signup_id, count unique mailing_id in opened
-    opened_counts = {}
-    for row in opened_rows:
-        signup_id = row["signup_id"]
-        mailing_id = row["mailing_id"]
-        opened_counts.setdefault(signup_id, set()).add(mailing_id)
-    opened_counts = {k: len(v) for k, v in opened_counts.items()}
-
-    # 5. Calculate open frequency for each signup_id
-    results = []
-    for signup_id in sent_counts:
-        sent_count = sent_counts.get(signup_id, 0)
-        opened_count = opened_counts.get(signup_id, 0)
-        frequency = opened_count / sent_count if sent_count else 0
-        results.append([signup_id, sent_count, opened_count, frequency])
-
-    # Sort results by frequency descending
-    results.sort(key=lambda x: x[3], reverse=True)
+    machine_opens = await conn.fetchval(MACHINE_OPENS_SQL, DATE_CUTOFF, EXCLUDED_BROADCASTER_ID)
+    print(f"Dropped {machine_opens} machine opens")
+
+    # 3. Open frequency for each signup_id, aggregated in Postgres
+    results = await fetch_open_frequencies(conn)
 
     # Export frequencies
     with open("email_open_frequency.csv", "w", newline="") as f:
         writer = csv.writer(f)
-        writer.writerow(["signup_id", "sent_count", "opened_count", "open_frequency"])
+        writer.writerow(["signup_id", "sent_count", "opened_count", "open_frequency",
+                         "clicked_count", "click_to_open_rate"])
         for row in results:
-            writer.writerow(row)
+            writer.writerow([row["signup_id"], row["sent_count"], row["opened_count"], row["open_frequency"],
+                             row["clicked_count"], row["click_to_open_rate"]])
 
     await conn.close()
 
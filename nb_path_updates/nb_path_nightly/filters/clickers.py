@@ -10,14 +10,22 @@ import os
 # sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
 
 # from nb_api_client import NationBuilderClient, NationBuilderAPIError
-from src.nb_api_client import NationBuilderClient, NationBuilderAPIError
-from typing import Dict, List, Any
+from src.nb_api_client import NationBuilderClient, NationBuilderAPIError, CircuitOpenError
+from nb_path_updates.nb_path_nightly.utils import dead_letter_utils, scheduling_utils
+from typing import Dict, List, Any, Optional, Tuple
 import csv
+import time
 from datetime import datetime
 
 # Filter configuration
 FILTER_NAME = "Email Clickers Filter"
 FILTER_DESCRIPTION = "People with tag ID 14890 (zi-c-24h - email clickers within 24h)"
+FILTER_KEY = "clickers"
+# Relative cost used by the orchestrator to run cheap filters first
+FILTER_COST = 1
+
+# Save the unprocessed remainder every N signups, so a killed run can resume
+CHECKPOINT_EVERY = 25
 
 # Target tag ID to find
 TARGET_TAG_ID = "14890"
@@ -29,35 +37,38 @@ PATH_STEP_ID = "1380"
 
 
 def find_signup_ids_with_tag_id(client: NationBuilderClient, tag_id: str, logger) -> List[str]:
-    """Find all signup IDs who have the specified tag ID"""
+    """
+    Find all signup IDs who have the specified tag ID
+    
+    Most recently tagged first, so a time-budgeted run handles the newest
+    clickers before older ones
+    """
     logger.info(f"     Finding signup IDs with tag ID: {tag_id} ({TARGET_TAG_NAME})")
     
     try:
-        signup_ids = []
+        taggings_found = []
         page = 1
-        total_processed = 0
         
         while True:
             taggings_result = client.get_signup_taggings(
                 filters={'tag_id': tag_id}, 
-                page_size=100
+                page_size=100,
+                page_number=page
             )
             taggings = taggings_result.get('data', [])
             
             if not taggings:
                 break
             
-            page_signup_ids = []
+            page_count = 0
             for tagging in taggings:
                 tagging_attrs = tagging.get('attributes', {})
                 signup_id = tagging_attrs.get('signup_id')
                 if signup_id:
-                    page_signup_ids.append(str(signup_id))
+                    taggings_found.append((tagging_attrs.get('created_at') or '', str(signup_id)))
+                    page_count += 1
             
-            signup_ids.extend(page_signup_ids)
-            total_processed += len(taggings)
-            
-            logger.debug(f"         Page {page}: Found {len(page_signup_ids)} signup IDs, total so far: {len(signup_ids)}")
+            logger.debug(f"         Page {page}: Found {page_count} signup IDs, total so far: {len(taggings_found)}")
             
             if len(taggings) < 100:
                 break
@@ -68,7 +79,9 @@ def find_signup_ids_with_tag_id(client: NationBuilderClient, tag_id: str, logger
                 logger.warning(f"      Reached safety limit of 1000 pages")
                 break
         
-        unique_signup_ids = list(set(signup_ids))
+        # Newest tagging first, then de-duplicate keeping that order
+        taggings_found.sort(key=lambda t: t[0], reverse=True)
+        unique_signup_ids = list(dict.fromkeys(signup_id for _, signup_id in taggings_found))
         logger.info(f"    Found {len(unique_signup_ids)} unique signup IDs with tag ID {tag_id}")
         
         return unique_signup_ids
@@ -82,8 +95,7 @@ def export_signup_ids_to_csv(signup_ids: List[str], tag_id: str, logger) -> str:
     """Export signup IDs to CSV for record-keeping"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     date_str = datetime.now().strftime("%Y%m%d")
-    output_dir = os.path.join(os.path.dirname(__file__), "..", "outputs")
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = scheduling_utils.get_output_dir()
     filename = f"{date_str}_clickers_update_tag_{timestamp}.csv"
     filepath = os.path.join(output_dir, filename)
 
@@ -106,7 +118,91 @@ def export_signup_ids_to_csv(signup_ids: List[str], tag_id: str, logger) -> str:
         return None
 
 
-def process_signup_path_journey(client: NationBuilderClient, signup_id: str, logger) -> bool:
+def resolve_list_slug(client: NationBuilderClient, base_slug: str, logger) -> str:
+    """
+    Pick the next free list slug for base_slug (e.g. _250813i_c_1, _2, ...)
+    from a single prefix lookup of existing lists, instead of probing
+    each suffix with its own request
+    """
+    taken_slugs = client.get_list_slugs_with_prefix(base_slug)
+    suffix = 1
+    while f"{base_slug}{suffix}" in taken_slugs:
+        suffix += 1
+    logger.debug(f"    {len(taken_slugs)} existing list(s) with prefix {base_slug}")
+    return f"{base_slug}{suffix}"
+
+
+def describe_path_step(client: NationBuilderClient, logger) -> Optional[str]:
+    """
+    Name of PATH_STEP_ID from the steps of PATH_ID (None if it can't be
+    looked up). The steps come from the client's reference cache, so warm
+    invocations don't refetch them; a step missing from its path is logged,
+    since every journey write to it would fail.
+    """
+    try:
+        steps = client.get_path_steps(PATH_ID).get('data', [])
+    except Exception as e:
+        logger.warning(f"    Could not look up the steps of path {PATH_ID}: {e}")
+        return None
+    for step in steps:
+        if str(step.get('id')) == PATH_STEP_ID:
+            return step.get('attributes', {}).get('name')
+    if steps:
+        logger.error(f"    Step {PATH_STEP_ID} is not one of the {len(steps)} steps of path {PATH_ID}")
+    return None
+
+
+def plan_path_journey(signup_id: str, journey: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Decide the write for one signup, given its journey on PATH_ID (None if
+    it has none): 'none' if already active on PATH_STEP_ID, 'update' an
+    active journey's step, 'reactivate' an inactive one, or 'create'
+    """
+    plan = {
+        'signup_id': str(signup_id),
+        'action': 'create',
+        'journey_id': None,
+        'path_id': PATH_ID,
+        'step_id': str(PATH_STEP_ID)
+    }
+    if journey:
+        attrs = journey['attributes']
+        plan['journey_id'] = journey['id']
+        if attrs.get('journey_status') != 'active':
+            plan['action'] = 'reactivate'
+        elif attrs.get('current_step_id') == PATH_STEP_ID:
+            plan['action'] = 'none'
+        else:
+            plan['action'] = 'update'
+    return plan
+
+
+def apply_path_journey_plan(client: NationBuilderClient, plan: Dict[str, Any], logger):
+    """Make the write from plan_path_journey (raises on API errors)"""
+    signup_id, journey_id, step_id = plan['signup_id'], plan['journey_id'], plan['step_id']
+    if plan['action'] == 'none':
+        logger.info(f"       Signup {signup_id} already on correct step {PATH_STEP_ID} and active")
+    elif plan['action'] == 'update':
+        # Active journey, just update the step
+        logger.info(f"       Updating active journey {journey_id} to step {step_id}")
+        update_result = client.update_path_journey_step(journey_id, step_id)
+        logger.info(f"       Update result: {update_result}")
+        logger.info(f"       Journey updated successfully")
+    elif plan['action'] == 'reactivate':
+        # Inactive journey, reactivate it at the new step
+        logger.info(f"       Reactivating inactive journey {journey_id} at step {step_id}")
+        reactivate_result = client.reactivate_path_journey(journey_id, step_id)
+        logger.info(f"       Reactivate result: {reactivate_result}")
+        logger.info(f"       Journey reactivated successfully")
+    else:
+        # They have no journey on the path, create new journey
+        logger.info(f"       Signup {signup_id} has NO journey on path {PATH_ID} - creating new journey")
+        create_result = client.create_path_journey(signup_id, plan['path_id'], step_id)
+        logger.info(f"       Create result: {create_result}")
+        logger.info(f"       New journey created successfully")
+
+
+def attempt_signup_path_journey(client: NationBuilderClient, signup_id: str, logger) -> Optional[Dict[str, Any]]:
     """
     Enhanced logic: 
     1. Check if signup has ANY journey on path 1109 (active or inactive)
@@ -114,11 +210,10 @@ def process_signup_path_journey(client: NationBuilderClient, signup_id: str, log
     3. If inactive journey → reactivate at step 1380
     4. If no journey → create new journey at step 1380
     
-    Returns True if successful, False if failed
+    Returns None if successful, else the failure: signup_id, error_class,
+    error and payload (the planned write, None if planning failed)
     """
-    # DEBUG: Check what values we're working with
-    logger.info(f" PATH_STEP_ID value: '{PATH_STEP_ID}' (type: {type(PATH_STEP_ID)})")
-    
+    plan = None
     try:
         # First, let's see ALL path journeys for this signup to understand what's happening
         logger.info(f"       Checking all path journeys for signup {signup_id}")
@@ -144,91 +239,308 @@ def process_signup_path_journey(client: NationBuilderClient, signup_id: str, log
                 target_journey = journey
         
         if target_journey:
-            # They have a journey on path 1109 (might be active or inactive)
-            journey_id = target_journey['id']
-            current_step = target_journey['attributes'].get('current_step_id')
-            current_status = target_journey['attributes'].get('journey_status')
-            
             logger.info(f"       Signup {signup_id} HAS a journey on path {PATH_ID}")
-            logger.info(f"         Journey ID: {journey_id}")
-            logger.info(f"         Current step: {current_step}")
-            logger.info(f"         Current status: {current_status}")
-            
-            if current_step == PATH_STEP_ID and current_status == 'active':
-                logger.info(f"       Signup {signup_id} already on correct step {PATH_STEP_ID} and active")
-                return True
-            elif current_status == 'active':
-                # Active journey, just update the step
-                logger.info(f"       Updating active journey {journey_id} from step {current_step} to step {PATH_STEP_ID}")
-                step_id_to_send = str(PATH_STEP_ID)
-                logger.info(f"       About to call update_path_journey_step with step_id='{step_id_to_send}'")
-                
-                update_result = client.update_path_journey_step(journey_id, step_id_to_send)
-                logger.info(f"       Update result: {update_result}")
-                logger.info(f"       Journey updated successfully")
-                return True
-            else:
-                # Inactive journey, reactivate it at the new step
-                logger.info(f"       Reactivating inactive journey {journey_id} at step {PATH_STEP_ID}")
-                step_id_to_send = str(PATH_STEP_ID)
-                logger.info(f"       About to call reactivate_path_journey with step_id='{step_id_to_send}'")
-                
-                reactivate_result = client.reactivate_path_journey(journey_id, step_id_to_send)
-                logger.info(f"       Reactivate result: {reactivate_result}")
-                logger.info(f"       Journey reactivated successfully")
-                return True
-        else:
-            # They have no journey on path 1109, create new journey
-            logger.info(f"       Signup {signup_id} has NO journey on path {PATH_ID} - creating new journey")
-            step_id_to_send = str(PATH_STEP_ID)
-            logger.info(f"       About to call create_path_journey with step_id='{step_id_to_send}'")
-            
-            create_result = client.create_path_journey(signup_id, PATH_ID, step_id_to_send)
-            logger.info(f"       Create result: {create_result}")
-            logger.info(f"       New journey created successfully")
-            return True
+            logger.info(f"         Journey ID: {target_journey['id']}")
+            logger.info(f"         Current step: {target_journey['attributes'].get('current_step_id')}")
+            logger.info(f"         Current status: {target_journey['attributes'].get('journey_status')}")
+        
+        plan = plan_path_journey(signup_id, target_journey)
+        apply_path_journey_plan(client, plan, logger)
+        return None
             
     except NationBuilderAPIError as e:
         logger.error(f"       API error for signup {signup_id}: {e}")
-        return False
+        return _failure(signup_id, e, plan)
     except Exception as e:
         logger.error(f"       Unexpected error for signup {signup_id}: {e}")
-        return False
+        return _failure(signup_id, e, plan)
 
 
-def run_filter(client: NationBuilderClient, logger) -> Dict[str, Any]:
-    """Main function that implements the filter interface"""
+def _failure(signup_id: str, error: Exception, plan: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        'signup_id': str(signup_id),
+        'error_class': type(error).__name__,
+        'error': str(error),
+        'payload': plan
+    }
+
+
+def process_signup_path_journey(client: NationBuilderClient, signup_id: str, logger) -> bool:
+    """
+    Update, reactivate or create the signup's journey on PATH_ID at PATH_STEP_ID
+    
+    Returns True if successful, False if failed
+    """
+    return attempt_signup_path_journey(client, signup_id, logger) is None
+
+
+def process_path_journeys(client: NationBuilderClient, signup_ids: List[str], logger,
+                          deadline=None, max_workers: int = 1) -> Tuple[int, int, List[str]]:
+    """
+    Run process_signup_path_journey for each signup, up to max_workers at a time
+    
+    Signups are started in order; the pending checkpoint is everything from
+    the first unfinished signup on (so a kill may redo a few finished ones,
+    which is harmless - they're already on the step). Failures go to the
+    dead-letter store for retry_dead_letters; successes clear any entry an
+    earlier run left for the signup. Once the client's circuit
+    breaker opens no more signups are started, and those not yet written
+    are deferred like a deadline stop.
+    
+    Returns (successful, errors, deferred signup IDs)
+    """
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    def timed_journey(signup_id):
+        unit_start = time.monotonic()
+        failure = attempt_signup_path_journey(client, signup_id, logger)
+        if failure is None:
+            return 'success', time.monotonic() - unit_start
+        if failure['error_class'] == CircuitOpenError.__name__:
+            # Never sent - not a failure of this signup
+            return 'circuit_open', time.monotonic() - unit_start
+        dead_letter_utils.record_failure(FILTER_KEY, **failure)
+        return 'error', time.monotonic() - unit_start
+
+    max_workers = max(1, max_workers)
+    successful_updates = 0
+    successful_ids = []
+    errors = 0
+    deferred_ids = []
+    circuit_open_indexes = []
+    in_flight = {}
+    finished = set()
+    next_index = 0
+    # Every signup before this index has finished
+    watermark = 0
+    last_checkpoint = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while next_index < len(signup_ids) or in_flight:
+            while next_index < len(signup_ids) and len(in_flight) < max_workers:
+                if deadline is not None and not deadline.can_start():
+                    deferred_ids = signup_ids[next_index:]
+                    logger.warning(f"    Time budget running low ({deadline.remaining():.0f}s left) - "
+                                   f"deferring {len(deferred_ids)} signups to the next run")
+                    next_index = len(signup_ids)
+                    break
+
+                if next_index % 10 == 0:  # Progress logging every 10 people
+                    logger.info(f"      Progress: {next_index+1}/{len(signup_ids)} processed")
+                logger.debug(f"   Processing signup {next_index+1}/{len(signup_ids)}: {signup_ids[next_index]}")
+
+                in_flight[executor.submit(timed_journey, signup_ids[next_index])] = next_index
+                next_index += 1
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                outcome, seconds = future.result()
+                if outcome == 'circuit_open':
+                    # Left out of `finished` so checkpoints keep it
+                    circuit_open_indexes.append(index)
+                    continue
+                finished.add(index)
+                if deadline is not None:
+                    deadline.record_unit(seconds)
+                if outcome == 'success':
+                    successful_updates += 1
+                    successful_ids.append(signup_ids[index])
+                else:
+                    errors += 1
+
+            if circuit_open_indexes and next_index < len(signup_ids):
+                logger.error(f"    NationBuilder API failing repeatedly (circuit breaker open) - "
+                             f"stopping after {next_index} of {len(signup_ids)} signups")
+                deferred_ids = signup_ids[next_index:]
+                next_index = len(signup_ids)
+
+            while watermark in finished:
+                finished.discard(watermark)
+                watermark += 1
+            if watermark - last_checkpoint >= CHECKPOINT_EVERY:
+                scheduling_utils.save_pending(FILTER_KEY, signup_ids[watermark:], reason="in progress")
+                last_checkpoint = watermark
+
+    # Done now, so the retry pass doesn't write (and count as recovered) them again
+    dead_letter_utils.resolve(FILTER_KEY, successful_ids)
+
+    if circuit_open_indexes:
+        deferred_ids = [signup_ids[i] for i in sorted(circuit_open_indexes)] + deferred_ids
+        logger.warning(f"    Deferring {len(deferred_ids)} unprocessed signups to the next run")
+
+    return successful_updates, errors, deferred_ids
+
+
+def retry_dead_letters(client: NationBuilderClient, logger, deadline=None,
+                       max_workers: int = 1, before: datetime = None) -> Dict[str, int]:
+    """
+    Retry the dead-lettered signups that last failed before `before` (the
+    run's start, so tonight's failures wait for the next run) and are below
+    the attempt limit: re-plan them all from batched journey lookups (100
+    signups per request), then apply the writes, up to max_workers at a
+    time. Recovered signups leave the store; failures are recorded again
+    with their attempt count. Writes refused by an open circuit breaker
+    were never sent and don't count as an attempt.
+    
+    Returns counts: retried, recovered, failed, exhausted (reached the limit
+    during this run - reported once, then left in the store untouched)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    if before is None:
+        before = datetime.now()
+    counts = {'retried': 0, 'recovered': 0, 'failed': 0, 'exhausted': 0}
+    entries = dead_letter_utils.load_dead_letters(FILTER_KEY)
+    limit = dead_letter_utils.max_attempts()
+    retry_ids = []
+    for signup_id, entry in entries.items():
+        earlier_run = datetime.fromisoformat(entry['failed_at']) < before
+        if entry['attempts'] < limit:
+            if earlier_run:
+                retry_ids.append(signup_id)
+        elif not earlier_run:
+            # Hit the limit in this run's journey pass; earlier runs
+            # already reported the rest
+            counts['exhausted'] += 1
+    if not retry_ids:
+        _log_exhausted(logger, counts['exhausted'], limit)
+        return counts
+    if _circuit_open(client):
+        logger.warning(f"    Circuit breaker open - leaving {len(retry_ids)} dead-lettered signups for the next run")
+        _log_exhausted(logger, counts['exhausted'], limit)
+        return counts
+    if deadline is not None and not deadline.can_start(len(retry_ids)):
+        logger.warning(f"    Time budget running low - leaving {len(retry_ids)} dead-lettered signups for the next run")
+        _log_exhausted(logger, counts['exhausted'], limit)
+        return counts
+
+    logger.info(f"     Retrying {len(retry_ids)} dead-lettered signups...")
+    try:
+        journeys = client.get_path_journeys_for_signups(retry_ids, PATH_ID)
+    except Exception as e:
+        logger.error(f"    Could not re-plan dead-lettered signups: {e}")
+        _log_exhausted(logger, counts['exhausted'], limit)
+        return counts
+
+    def retry(signup_id):
+        plan = plan_path_journey(signup_id, journeys.get(signup_id))
+        try:
+            apply_path_journey_plan(client, plan, logger)
+            return None
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                logger.error(f"       Retry failed for signup {signup_id}: {e}")
+            return _failure(signup_id, e, plan)
+
+    recovered_ids = []
+    circuit_open = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for signup_id, failure in zip(retry_ids, executor.map(retry, retry_ids)):
+            if failure and failure['error_class'] == CircuitOpenError.__name__:
+                # Never sent - stays in the store with its attempt count
+                circuit_open += 1
+                continue
+            counts['retried'] += 1
+            if not failure:
+                recovered_ids.append(signup_id)
+                continue
+            dead_letter_utils.record_failure(FILTER_KEY, **failure)
+            if entries[signup_id]['attempts'] + 1 >= limit:
+                counts['exhausted'] += 1
+            else:
+                counts['failed'] += 1
+    dead_letter_utils.resolve(FILTER_KEY, recovered_ids)
+    counts['recovered'] = len(recovered_ids)
+
+    if circuit_open:
+        logger.warning(f"    Circuit breaker open - leaving {circuit_open} dead-lettered signups for the next run")
+    logger.info(f"    Dead-letter retry: {counts['recovered']} recovered, {counts['failed']} still failing")
+    _log_exhausted(logger, counts['exhausted'], limit)
+    return counts
+
+
+def _log_exhausted(logger, exhausted: int, limit: int):
+    if exhausted:
+        logger.warning(f"    {exhausted} dead-lettered signups reached {limit} attempts - no longer retrying")
+
+
+def _circuit_open(client: NationBuilderClient) -> bool:
+    breaker = getattr(client, 'circuit_breaker', None)
+    return breaker is not None and breaker.is_open
+
+
+def run_filter(client: NationBuilderClient, logger, deadline=None,
+               max_workers: int = None) -> Dict[str, Any]:
+    """
+    Main function that implements the filter interface
+    
+    deadline: optional scheduling_utils.RunDeadline; when the budget runs low
+    no new writes are started and the unprocessed signups are saved for the
+    next run
+    max_workers: path journeys processed concurrently (default: the
+    NB_JOURNEY_WORKERS environment variable, else the client's adaptive
+    concurrency ceiling if it has a limiter, else 1)
+    """
+    run_started = datetime.now()
+    if max_workers is None:
+        limiter = getattr(client, 'concurrency_limiter', None)
+        max_workers = int(os.getenv("NB_JOURNEY_WORKERS", limiter.max_limit if limiter else 1))
     logger.info(f" {FILTER_NAME}")
     logger.info(f"   {FILTER_DESCRIPTION}")
     logger.info(f"   Target tag ID: {TARGET_TAG_ID} ({TARGET_TAG_NAME})")
-    logger.info(f"   Target path: {PATH_ID}, step: {PATH_STEP_ID}")
+    step_name = describe_path_step(client, logger)
+    logger.info(f"   Target path: {PATH_ID}, step: {PATH_STEP_ID}" + (f" ({step_name})" if step_name else ""))
     logger.info("    Enhanced logic: Update, reactivate, or create journeys")
 
     # Find signup IDs with the target tag ID
     signup_ids = find_signup_ids_with_tag_id(client, TARGET_TAG_ID, logger)
 
+    # Pick up anything a previous run didn't get to (after tonight's clickers)
+    found_ids = set(signup_ids)
+    carried_over = [sid for sid in scheduling_utils.load_pending(FILTER_KEY) if sid not in found_ids]
+    if carried_over:
+        logger.info(f"    Carrying over {len(carried_over)} signups left unfinished by the previous run")
+        signup_ids = signup_ids + carried_over
+
     if not signup_ids:
         logger.warning(f"   No signup IDs found with tag ID {TARGET_TAG_ID}")
+        # Still work through failures left by earlier runs
+        retry_counts = retry_dead_letters(client, logger, deadline=deadline, max_workers=max_workers,
+                                          before=run_started)
         return {
             'people_count': 0,
             'csv_filename': None,
             'list_slug': None,
-            'list_id': None
+            'list_id': None,
+            'path_updates_recovered': retry_counts['recovered'],
+            'path_updates_dead_lettered': retry_counts['failed'] + retry_counts['exhausted']
         }
 
     # Export signup IDs to CSV
     csv_filename = export_signup_ids_to_csv(signup_ids, TARGET_TAG_ID, logger)
 
+    if deadline is not None and not deadline.can_start():
+        logger.warning(f"    Time budget running low ({deadline.remaining():.0f}s left) - "
+                       f"deferring all {len(signup_ids)} signups to the next run")
+        scheduling_utils.save_pending(FILTER_KEY, signup_ids, reason="deadline")
+        return {
+            'people_count': len(signup_ids),
+            'csv_filename': csv_filename,
+            'list_slug': None,
+            'list_id': None,
+            'path_updates_successful': 0,
+            'path_updates_errors': 0,
+            'path_updates_deferred': len(signup_ids)
+        }
+
     # Create a unique list and add people
     date_str = datetime.now().strftime("%y%m%d")
     base_slug = f"_{date_str}i_c_"
-    suffix = 1
-    while True:
-        list_slug = f"{base_slug}{suffix}"
-        existing_list = client.list_exists(list_slug)
-        if not existing_list:
-            break
-        suffix += 1
+    list_slug = resolve_list_slug(client, base_slug, logger)
 
     logger.info(f"    Creating new list with slug: {list_slug}")
     admin_signup_id = os.getenv("NB_ADMIN_SIGNUP_ID")
@@ -249,7 +561,11 @@ def run_filter(client: NationBuilderClient, logger) -> Dict[str, Any]:
         # Add people to the list
         logger.info(f"    Adding {len(signup_ids)} people to list {list_slug}")
         add_result = client.add_people_to_list(list_id, signup_ids)
-        logger.info(f"    People added to list")
+        failed_list_ids = add_result.get('failed_signup_ids', [])
+        if failed_list_ids:
+            logger.warning(f"    {len(failed_list_ids)} people could not be added to list {list_slug}")
+        else:
+            logger.info(f"    People added to list")
 
     except Exception as e:
         logger.error(f"    Error creating/populating list: {e}")
@@ -258,26 +574,31 @@ def run_filter(client: NationBuilderClient, logger) -> Dict[str, Any]:
     # Process path journeys with enhanced logic
     logger.info(f"     Processing path journeys for {len(signup_ids)} people...")
     
-    successful_updates = 0
-    errors = 0
+    # Checkpoint the full set before any journey writes, so a kill never loses it
+    scheduling_utils.save_pending(FILTER_KEY, signup_ids, reason="in progress")
 
-    for i, signup_id in enumerate(signup_ids):
-        if i % 10 == 0:  # Progress logging every 10 people
-            logger.info(f"      Progress: {i+1}/{len(signup_ids)} processed")
-        
-        logger.debug(f"   Processing signup {i+1}/{len(signup_ids)}: {signup_id}")
-        
-        success = process_signup_path_journey(client, signup_id, logger)
-        
-        if success:
-            successful_updates += 1
-        else:
-            errors += 1
+    successful_updates, errors, deferred_ids = process_path_journeys(
+        client, signup_ids, logger, deadline=deadline, max_workers=max_workers
+    )
+
+    # Whatever is left (if anything) is picked up by the next run
+    scheduling_utils.save_pending(FILTER_KEY, deferred_ids,
+                                  reason="circuit open" if _circuit_open(client) else "deadline")
+
+    # One bulk retry of the failures left by earlier runs (tonight's wait for the next)
+    retry_counts = retry_dead_letters(client, logger, deadline=deadline, max_workers=max_workers,
+                                      before=run_started)
 
     # Summary
     logger.info(f"    Path Journey Results:")
     logger.info(f"       Successful: {successful_updates}")
     logger.info(f"       Errors: {errors}")
+    if retry_counts['recovered']:
+        logger.info(f"       Recovered on retry: {retry_counts['recovered']}")
+    if retry_counts['failed'] or retry_counts['exhausted']:
+        logger.info(f"       Dead-lettered: {retry_counts['failed'] + retry_counts['exhausted']}")
+    if deferred_ids:
+        logger.info(f"       Deferred to next run: {len(deferred_ids)}")
 
     logger.info(f"    COMPLETE: Created list '{list_slug}', added {len(signup_ids)} people, processed path journeys")
 
@@ -287,5 +608,8 @@ def run_filter(client: NationBuilderClient, logger) -> Dict[str, Any]:
         'list_slug': list_slug,
         'list_id': list_id,
         'path_updates_successful': successful_updates,
-        'path_updates_errors': errors
+        'path_updates_errors': errors,
+        'path_updates_deferred': len(deferred_ids),
+        'path_updates_recovered': retry_counts['recovered'],
+        'path_updates_dead_lettered': retry_counts['failed'] + retry_counts['exhausted']
     }
\ No newline at end of file
@@ -6,23 +6,35 @@ Updated to run ONLY the clickers filter module for testing
 
 import sys
 import os
+import json
+import time
 import logging
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
-# Add src to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+# Add the repo root to path (src.* and the filters' absolute imports)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from dotenv import load_dotenv
 load_dotenv()
 
-from nb_api_client import NationBuilderClient
+# Same module path as the filters use, so the client is only imported once
+from src.nb_api_client import CircuitBreaker, NationBuilderClient
 
 # Import ONLY the clickers filter for testing
 from filters import clickers
 
 # Import utilities
-from utils import logging_utils, reporting_utils
+from utils import logging_utils, metrics_utils, profiling_utils, reporting_utils, scheduling_utils
+
+# Filters to run, in no particular order; see prioritize_filters()
+FILTER_MODULES = [clickers]
+
+# Default safety margin kept back from the deadline (e.g. Cloud Function timeout)
+DEFAULT_DEADLINE_MARGIN_SECONDS = 60
+
+# Skip the connection test if the same token worked this recently
+TOKEN_RECENT_SECONDS = int(os.getenv('NB_TOKEN_RECENT_SECONDS', '3600'))
 
 
 def setup_logging():
@@ -31,50 +43,184 @@ def setup_logging():
     date_str = datetime.now().strftime("%Y%m%d")
     
     # Ensure outputs directory exists
-    output_dir = os.path.join(os.path.dirname(__file__), "outputs")
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = scheduling_utils.get_output_dir()
     
     log_filename = f"{date_str}_clickers_log_{timestamp}.log"
     log_filepath = os.path.join(output_dir, log_filename)
 
-    # Clear any existing handlers to avoid conflicts
+    # File and console writes happen on a background thread, so the
+    # per-signup log lines don't block the run on file I/O
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler = logging_utils.buffered_rotating_file_handler(log_filepath, formatter, level=logging.INFO)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    # Replaces any existing root handlers to avoid conflicts
     root_logger = logging.getLogger()
-    for handler in root_logger.handlers[:]:
-        root_logger.removeHandler(handler)
-
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_filepath),
-            logging.StreamHandler()
-        ]
-    )
+    root_logger.setLevel(logging.INFO)
+    logging_utils.setup_queue_logging(root_logger, [file_handler, console_handler])
+
     logger = logging.getLogger(__name__)
     return logger, log_filepath
 
 
-def load_client():
-    """Initialize NationBuilder client"""
-    return NationBuilderClient(
-        nation_slug=os.getenv('NB_NATION_SLUG'),
+# Warm Cloud Function instances keep module state between invocations, so
+# the client (HTTP connection pool, refreshed token, cached paths/steps/tags)
+# is kept here and reused instead of rebuilt each time
+_client_cache: Dict[tuple, NationBuilderClient] = {}
+
+
+def load_client(reuse: bool = True) -> NationBuilderClient:
+    """Initialize NationBuilder client, reusing the one from a previous invocation if there is one"""
+    nation_slug = os.getenv('NB_NATION_SLUG')
+    client_id = os.getenv('NB_PA_ID')
+    cache_key = (nation_slug, client_id, os.getenv('NB_API_BASE_URL'),
+                 os.getenv('NB_CASSETTE_RECORD'), os.getenv('NB_CASSETTE_REPLAY'),
+                 os.getenv('NB_ADAPTIVE_CONCURRENCY'))
+    
+    if reuse and cache_key in _client_cache:
+        client = _client_cache[cache_key]
+        # Keep the session, tokens and reference data (within its TTL); list
+        # slugs may have been taken elsewhere since the last invocation, and
+        # the last run's open breaker mustn't block this one
+        client.reset_run_state()
+        return client
+    
+    client = NationBuilderClient(
+        nation_slug=nation_slug,
         access_token=os.getenv('NB_PA_TOKEN'),
         refresh_token=os.getenv('NB_PA_TOKEN_REFRESH'),
-        client_id=os.getenv('NB_PA_ID'),
-        client_secret=os.getenv('NB_PA_SECRET')
+        client_id=client_id,
+        client_secret=os.getenv('NB_PA_SECRET'),
+        # Only set when running against a stand-in (benchmarks/mock_nb_server.py)
+        base_url=os.getenv('NB_API_BASE_URL'),
+        oauth_url=os.getenv('NB_OAUTH_URL'),
+        request_timeout=float(os.getenv('NB_REQUEST_TIMEOUT_SECONDS', '60')),
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv('NB_CIRCUIT_FAILURE_THRESHOLD', '5')),
+            reset_timeout=float(os.getenv('NB_CIRCUIT_RESET_SECONDS', '30'))
+        )
     )
+    
+    # Let the in-flight request limit follow the API's latency and 429s
+    # instead of a fixed NB_JOURNEY_WORKERS (see src/nb_concurrency.py)
+    if os.getenv('NB_ADAPTIVE_CONCURRENCY', '').lower() in ('1', 'true', 'yes'):
+        from src import nb_concurrency
+        client.concurrency_limiter = nb_concurrency.AIMDConcurrencyLimiter(
+            initial_limit=int(os.getenv('NB_ADAPTIVE_INITIAL_CONCURRENCY', '4')),
+            max_limit=int(os.getenv('NB_ADAPTIVE_MAX_CONCURRENCY', '16'))
+        )
+    
+    # Record this run's HTTP traffic, or replay a recording offline (see src/nb_cassette.py)
+    if os.getenv('NB_CASSETTE_REPLAY'):
+        from src import nb_cassette
+        client.mount_transport(nb_cassette.CassetteReplayer(
+            os.getenv('NB_CASSETTE_REPLAY'),
+            latency_scale=float(os.getenv('NB_CASSETTE_LATENCY_SCALE', '0'))
+        ))
+    elif os.getenv('NB_CASSETTE_RECORD'):
+        from src import nb_cassette
+        client.mount_transport(nb_cassette.CassetteRecorder(os.getenv('NB_CASSETTE_RECORD')))
+    
+    _client_cache[cache_key] = client
+    return client
+
+
+def reset_client_cache():
+    """Forget the reused client (next load_client() builds a fresh one)"""
+    for client in _client_cache.values():
+        client.session.close()
+    _client_cache.clear()
+
+
+def _token_fingerprint(access_token: str) -> str:
+    """Short hash identifying a token without storing it"""
+    import hashlib
+    
+    return hashlib.sha256((access_token or '').encode('utf-8')).hexdigest()[:16]
 
 
-def run_filter_module(filter_module, client: NationBuilderClient, logger) -> Dict[str, Any]:
+def _token_state_filepath() -> str:
+    return os.path.join(scheduling_utils.get_state_dir(), "token_last_used.json")
+
+
+def token_recently_used(access_token: str, max_age_seconds: float = TOKEN_RECENT_SECONDS) -> bool:
+    """True if this token made a successful API call within max_age_seconds"""
+    try:
+        with open(_token_state_filepath(), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if state.get('token') != _token_fingerprint(access_token):
+        return False
+    return time.time() - state.get('last_success_at', 0) < max_age_seconds
+
+
+def record_token_use(client: NationBuilderClient):
+    """Remember when the client's current token last worked, for the next cold start"""
+    if not client.last_success_at:
+        return
+    try:
+        with open(_token_state_filepath(), 'w', encoding='utf-8') as f:
+            json.dump({
+                'token': _token_fingerprint(client.access_token),
+                'last_success_at': client.last_success_at
+            }, f)
+    except OSError:
+        pass  # Only an optimization for the next run
+
+
+def prioritize_filters(filter_modules: List[Any]) -> List[Any]:
+    """Order filters cheapest first (FILTER_COST), so a tight budget still covers the most filters"""
+    return sorted(filter_modules, key=lambda module: getattr(module, 'FILTER_COST', 1))
+
+
+def build_deadline(deadline_seconds: Optional[float],
+                   margin_seconds: float = DEFAULT_DEADLINE_MARGIN_SECONDS) -> scheduling_utils.RunDeadline:
+    """
+    Build the run's time budget: deadline_seconds (e.g. the Cloud Function
+    timeout) minus a safety margin. None means no budget.
+    """
+    if deadline_seconds is None:
+        return scheduling_utils.RunDeadline(None)
+    return scheduling_utils.RunDeadline(max(0.0, deadline_seconds - margin_seconds))
+
+
+def run_filter_module(filter_module, client: NationBuilderClient, logger,
+                      deadline: scheduling_utils.RunDeadline = None,
+                      profile: bool = False, profile_top: int = 25) -> Dict[str, Any]:
     """
     Run a single filter module and return results
+    
+    With profile=True the filter runs under cProfile and tracemalloc, and the
+    .prof file and top-N allocation report are written to outputs/
     """
     filter_name = filter_module.FILTER_NAME
     logger.info(f" Starting filter: {filter_name}")
     
-    try:
+    def call_filter():
         # Each filter module implements this interface
-        result = filter_module.run_filter(client, logger)
+        if deadline is not None and not deadline.unlimited:
+            return filter_module.run_filter(client, logger, deadline=deadline)
+        return filter_module.run_filter(client, logger)
+    
+    filter_metrics = logging_utils.FilterMetrics(logger, filter_name)
+    filter_metrics.attach(client)
+    profile_info = {}
+    try:
+        if profile:
+            label = getattr(filter_module, 'FILTER_KEY', filter_name)
+            result, profile_info = profiling_utils.profile_call(call_filter, label, top_n=profile_top)
+            logger.info(f"   Profile saved: {profile_info['prof_file']}")
+            logger.info(f"   Allocation report saved: {profile_info['alloc_file']} "
+                        f"(traced peak {profile_info['traced_peak_mb']} MB)")
+        else:
+            result = call_filter()
+        
+        filter_metrics.people_with_tags = result.get('people_count', 0)
+        filter_metrics.people_assigned = result.get('path_updates_successful', 0)
+        filter_metrics.errors_encountered = result.get('path_updates_errors', 0)
+        filter_metrics.log_final_summary()
         
         logger.info(f" {filter_name} completed successfully")
         logger.info(f"   Found: {result.get('people_count', 0)} people")
@@ -84,6 +230,12 @@ def run_filter_module(filter_module, client: NationBuilderClient, logger) -> Dic
         if 'path_updates_successful' in result:
             logger.info(f"   Path updates successful: {result.get('path_updates_successful', 0)}")
             logger.info(f"   Path updates errors: {result.get('path_updates_errors', 0)}")
+        if result.get('path_updates_deferred'):
+            logger.info(f"   Path updates deferred to next run: {result['path_updates_deferred']}")
+        if result.get('path_updates_recovered'):
+            logger.info(f"   Path updates recovered on retry: {result['path_updates_recovered']}")
+        if result.get('path_updates_dead_lettered'):
+            logger.info(f"   Path updates dead-lettered: {result['path_updates_dead_lettered']}")
         
         return {
             'filter_name': filter_name,
@@ -93,6 +245,13 @@ def run_filter_module(filter_module, client: NationBuilderClient, logger) -> Dic
             'list_slug': result.get('list_slug'),
             'path_updates_successful': result.get('path_updates_successful', 0),
             'path_updates_errors': result.get('path_updates_errors', 0),
+            'path_updates_deferred': result.get('path_updates_deferred', 0),
+            'path_updates_recovered': result.get('path_updates_recovered', 0),
+            'path_updates_dead_lettered': result.get('path_updates_dead_lettered', 0),
+            'api_calls': filter_metrics.api_calls_made,
+            'duration_seconds': round(filter_metrics.duration_seconds(), 3),
+            'peak_rss_mb': profiling_utils.peak_rss_mb(),
+            'profile_file': profile_info.get('prof_file'),
             'error': None
         }
         
@@ -106,72 +265,225 @@ def run_filter_module(filter_module, client: NationBuilderClient, logger) -> Dic
             'list_slug': None,
             'path_updates_successful': 0,
             'path_updates_errors': 0,
+            'path_updates_deferred': 0,
+            'path_updates_recovered': 0,
+            'path_updates_dead_lettered': 0,
+            'api_calls': filter_metrics.api_calls_made,
+            'duration_seconds': round(filter_metrics.duration_seconds(), 3),
+            'peak_rss_mb': profiling_utils.peak_rss_mb(),
+            'profile_file': None,
             'error': str(e)
         }
+    
+    finally:
+        filter_metrics.detach(client)
+
 
+def skipped_filter_result(filter_module) -> Dict[str, Any]:
+    """Result for a filter that was not started because the time budget ran out"""
+    return {
+        'filter_name': filter_module.FILTER_NAME,
+        'success': False,
+        'people_count': 0,
+        'csv_filename': None,
+        'list_slug': None,
+        'path_updates_successful': 0,
+        'path_updates_errors': 0,
+        'path_updates_deferred': 0,
+        'path_updates_recovered': 0,
+        'path_updates_dead_lettered': 0,
+        'api_calls': 0,
+        'duration_seconds': 0.0,
+        'peak_rss_mb': profiling_utils.peak_rss_mb(),
+        'profile_file': None,
+        'error': 'Skipped: time budget exhausted'
+    }
 
-def main():
-    """Main orchestrator function - CLICKERS with simple path logic"""
+
+def main(deadline_seconds: Optional[float] = None,
+         margin_seconds: float = DEFAULT_DEADLINE_MARGIN_SECONDS,
+         profile: bool = False, profile_top: int = 25):
+    """
+    Main orchestrator function - CLICKERS with simple path logic
+    
+    deadline_seconds: total time allowed for the run (e.g. the Cloud Function
+    timeout); writes stop margin_seconds before it and the remainder is
+    carried over to the next run
+    profile: run each filter under cProfile/tracemalloc (see profiling_utils)
+    """
     # Setup
     logger, log_filename = setup_logging()
+    deadline = build_deadline(deadline_seconds, margin_seconds)
     logger.info(" Starting Clickers Filter Run")
+    if not deadline.unlimited:
+        logger.info(f" Time budget: {deadline.budget_seconds:.0f}s "
+                    f"(deadline {deadline_seconds:.0f}s - margin {margin_seconds:.0f}s)")
     logger.info("=" * 60)
     
     # Initialize client
     try:
         client = load_client()
-        logger.info(" NationBuilder client initialized")
-        
-        # Test connection
-        if not client.test_connection():
-            logger.error(" Failed to connect to NationBuilder API")
-            return
+        if client.last_success_at:
+            logger.info(" Reusing NationBuilder client from previous invocation")
+        else:
+            logger.info(" NationBuilder client initialized")
             
     except Exception as e:
         logger.error(f" Failed to initialize client: {e}")
         return
     
-    # Run the clickers filter
+    # Every API call from here on is counted in the run metrics
+    api_metrics = metrics_utils.ApiMetrics()
+    api_metrics.attach(client)
+    try:
+        return run_nightly(client, logger, log_filename, deadline, api_metrics,
+                           profile=profile, profile_top=profile_top)
+    finally:
+        # The client may be reused by the next invocation; don't keep our hook on it
+        api_metrics.detach(client)
+        if hasattr(client.transport, 'save'):
+            try:
+                logger.info(f" HTTP cassette saved: {client.transport.save()}")
+            except Exception as e:
+                logger.error(f"  Could not save HTTP cassette: {e}")
+
+
+def run_nightly(client: NationBuilderClient, logger, log_filename: str,
+                deadline: scheduling_utils.RunDeadline,
+                api_metrics: metrics_utils.ApiMetrics, profile: bool = False,
+                profile_top: int = 25) -> Optional[List[Dict[str, Any]]]:
+    """Connection check, filters, and reporting for one run"""
+    # Test connection, unless this token worked recently (saves a
+    # full signups round-trip on every cold start)
+    with api_metrics.phase('connect'):
+        if client.last_success_at and time.time() - client.last_success_at < TOKEN_RECENT_SECONDS:
+            logger.info(" Client made a successful call recently - skipping connection test")
+        elif token_recently_used(client.access_token):
+            logger.info(" Token used successfully recently - skipping connection test")
+        elif not client.test_connection():
+            logger.error(" Failed to connect to NationBuilder API")
+            return
+    
+    # Run the filters, cheapest first, without starting new ones past the deadline
     logger.info(" Running CLICKERS filter with simple path logic")
     
-    result = run_filter_module(clickers, client, logger)
+    results = []
+    for filter_module in prioritize_filters(FILTER_MODULES):
+        if not deadline.can_start():
+            logger.warning(f"  Skipping {filter_module.FILTER_NAME}: time budget exhausted")
+            results.append(skipped_filter_result(filter_module))
+            continue
+        with api_metrics.phase(f"filter:{getattr(filter_module, 'FILTER_KEY', filter_module.FILTER_NAME)}"):
+            results.append(run_filter_module(filter_module, client, logger, deadline=deadline,
+                                             profile=profile, profile_top=profile_top))
+    
+    record_token_use(client)
     
     # Generate summary report
     logger.info("\n" + "=" * 60)
     logger.info(" CLICKERS RUN SUMMARY")
     logger.info("=" * 60)
     
-    if result['success']:
-        logger.info(f" {result['filter_name']}: {result['people_count']} people found")
-        logger.info(f" CSV exported: {result['csv_filename']}")
-        logger.info(f" List created: {result['list_slug']}")
-        logger.info(f"  Path updates - Success: {result['path_updates_successful']}, "
-                   f"Errors: {result['path_updates_errors']}")
-    else:
-        logger.info(f" {result['filter_name']}: FAILED - {result['error']}")
+    for result in results:
+        if result['success']:
+            logger.info(f" {result['filter_name']}: {result['people_count']} people found")
+            logger.info(f" CSV exported: {result['csv_filename']}")
+            logger.info(f" List created: {result['list_slug']}")
+            logger.info(f"  Path updates - Success: {result['path_updates_successful']}, "
+                       f"Errors: {result['path_updates_errors']}, "
+                       f"Deferred: {result['path_updates_deferred']}")
+        else:
+            logger.info(f" {result['filter_name']}: FAILED - {result['error']}")
+    
+    run_summary = api_metrics.summary()
+    logger.info(f" API calls: {run_summary['api_calls']} ({run_summary['api_errors']} errors), "
+                f"p95 latency: {run_summary['latency_p95_ms']} ms")
+    if getattr(client, 'concurrency_limiter', None) is not None:
+        limiter_state = client.concurrency_limiter.snapshot()
+        logger.info(f" Adaptive concurrency: ended at {limiter_state['limit']} "
+                    f"(peak in flight {limiter_state['peak_in_flight']}, "
+                    f"{limiter_state['increases']} increases, decreases {limiter_state['decreases'] or 'none'})")
     
     # Generate and save summary report
+    with api_metrics.phase('report'):
+        try:
+            report_filename = reporting_utils.generate_summary_report(results, log_filename, run_summary)
+            logger.info(f" Summary report saved: {report_filename}")
+        except Exception as e:
+            logger.error(f"  Could not generate summary report: {e}")
+    
     try:
-        report_filename = reporting_utils.generate_summary_report([result], log_filename)
-        logger.info(f" Summary report saved: {report_filename}")
+        metrics_files = metrics_utils.write_run_metrics(api_metrics, results)
+        logger.info(f" Run metrics saved: {metrics_files['json']}")
     except Exception as e:
-        logger.error(f"  Could not generate summary report: {e}")
+        logger.error(f"  Could not write run metrics: {e}")
     
     # Log completion
-    if result['success']:
+    if all(result['success'] for result in results):
         logger.info(" Clickers filter run completed successfully!")
     else:
         logger.warning("  Clickers filter run had issues - check logs for details")
     
-    logger.info(" Run completed")
+    logger.info(f" Run completed in {deadline.elapsed():.1f}s")
     
-    return [result]
+    return results
+
+
+def cloud_function_entry(request=None):
+    """
+    HTTP entry point for the Cloud Function deployment (functions-framework)
+    
+    Module state survives between invocations on a warm instance, so the
+    client and its reference data from load_client() are reused (list slugs
+    and the circuit breaker start over). The time budget comes from
+    NB_RUN_DEADLINE_SECONDS (set it to the function timeout).
+    """
+    env_deadline = os.getenv('NB_RUN_DEADLINE_SECONDS')
+    try:
+        results = main(deadline_seconds=float(env_deadline) if env_deadline else None) or []
+    finally:
+        # The instance may be frozen once we return; get the logs out first
+        logging_utils.stop_queue_logging()
+    return json.dumps({
+        'success': bool(results) and all(result['success'] for result in results),
+        'results': results
+    })
+
+
+def parse_args(argv: List[str] = None):
+    """Command line options for the nightly run"""
+    # Imported here: only the command line entry point needs it
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Nightly NationBuilder path updates")
+    env_deadline = os.getenv('NB_RUN_DEADLINE_SECONDS')
+    parser.add_argument(
+        '--deadline-seconds', type=float,
+        default=float(env_deadline) if env_deadline else None,
+        help="Total time allowed for the run, e.g. the Cloud Function timeout "
+             "(default: NB_RUN_DEADLINE_SECONDS, or no limit)"
+    )
+    parser.add_argument(
+        '--deadline-margin', type=float, default=DEFAULT_DEADLINE_MARGIN_SECONDS,
+        help="Seconds kept back from the deadline for wrap-up (default: %(default)s)"
+    )
+    parser.add_argument(
+        '--profile', action='store_true',
+        help="Profile each filter (cProfile + tracemalloc, including its worker threads); reports go to outputs/"
+    )
+    parser.add_argument(
+        '--profile-top', type=int, default=25,
+        help="Entries in the allocation/cumulative-time reports (default: %(default)s)"
+    )
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
     try:
-        main()
+        args = parse_args()
+        main(deadline_seconds=args.deadline_seconds, margin_seconds=args.deadline_margin,
+             profile=args.profile, profile_top=args.profile_top)
     except Exception as e:
         print(f" Fatal error in main: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
@@ -1,3 +1,3 @@
 """Utilities package"""
 
-__all__ = ['reporting_utils', 'logging_utils']
\ No newline at end of file
+__all__ = ['dead_letter_utils', 'reporting_utils', 'logging_utils', 'metrics_utils', 'profiling_utils', 'run_history', 'scheduling_utils']
\ No newline at end of file
@@ -0,0 +1,96 @@
+# nb_path_updates/nb_path_nightly/utils/dead_letter_utils.py
+"""
+Dead-letter store for failed per-signup writes
+
+Each failure is appended as one JSON line (signup, error class and message,
+the planned write) to <state dir>/<filter>_dead_letters.jsonl, so failures
+survive a killed run and can be retried in bulk without re-scanning.
+A signup's attempt count is the number of failure lines it has.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from . import scheduling_utils
+
+# Stop retrying a signup after this many failed attempts (override with
+# NB_DEAD_LETTER_MAX_ATTEMPTS); exhausted entries stay for inspection
+MAX_ATTEMPTS = 5
+
+_lock = threading.Lock()
+
+
+def max_attempts() -> int:
+    return int(os.getenv("NB_DEAD_LETTER_MAX_ATTEMPTS", MAX_ATTEMPTS))
+
+
+def _dead_letter_filepath(filter_key: str) -> str:
+    return os.path.join(scheduling_utils.get_state_dir(), f"{filter_key}_dead_letters.jsonl")
+
+
+def record_failure(filter_key: str, signup_id: str, error_class: str, error: str,
+                   payload: Optional[Dict[str, Any]] = None):
+    """Append one failed attempt for a signup (safe to call from worker threads)"""
+    line = json.dumps({
+        'signup_id': str(signup_id),
+        'error_class': error_class,
+        'error': error,
+        'payload': payload,
+        'failed_at': datetime.now().isoformat()
+    })
+    with _lock:
+        with open(_dead_letter_filepath(filter_key), 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+
+def load_dead_letters(filter_key: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Current dead letters by signup ID: the latest failure's details plus
+    attempts and first_failed_at
+    """
+    filepath = _dead_letter_filepath(filter_key)
+    entries: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(filepath):
+        return entries
+    with _lock:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    for line in lines:
+        try:
+            failure = json.loads(line)
+        except ValueError:
+            # A line cut short by a killed run
+            continue
+        previous = entries.get(failure['signup_id'])
+        failure['attempts'] = (previous['attempts'] if previous else 0) + 1
+        failure['first_failed_at'] = previous['first_failed_at'] if previous else failure['failed_at']
+        entries[failure['signup_id']] = failure
+    return entries
+
+
+def resolve(filter_key: str, signup_ids: Iterable[str]):
+    """Drop every failure recorded for these signups"""
+    resolved = {str(signup_id) for signup_id in signup_ids}
+    filepath = _dead_letter_filepath(filter_key)
+    if not resolved or not os.path.exists(filepath):
+        return
+    with _lock:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            kept = [line for line in f if _signup_id(line) not in resolved]
+        if not kept:
+            os.remove(filepath)
+            return
+        tmp_filepath = f"{filepath}.tmp"
+        with open(tmp_filepath, 'w', encoding='utf-8') as f:
+            f.writelines(kept)
+        os.replace(tmp_filepath, filepath)
+
+
+def _signup_id(line: str) -> Optional[str]:
+    try:
+        return json.loads(line)['signup_id']
+    except (ValueError, KeyError):
+        return None
@@ -3,12 +3,24 @@
 Comprehensive logging utilities for NationBuilder filter operations
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
+# Defaults for the background log pipeline
+LOG_MAX_BYTES = 20 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_BUFFER_CAPACITY = 200
+
+# Logger name -> (logger, its QueueHandler, the listener draining that
+# queue), for the loggers set up by setup_queue_logging()
+_queue_listeners: Dict[str, Tuple[logging.Logger, logging.Handler, logging.handlers.QueueListener]] = {}
 
 class FilterFormatter(logging.Formatter):
     """Custom formatter with color coding for different log levels"""
@@ -24,6 +36,9 @@ class FilterFormatter(logging.Formatter):
     }
     
     def format(self, record):
+        # Color a copy: the same record may still be written to the log file
+        record = logging.makeLogRecord(record.__dict__)
+        
         # Add color for console output
         if hasattr(record, 'levelname'):
             color = self.COLORS.get(record.levelname, '')
@@ -33,6 +48,74 @@ class FilterFormatter(logging.Formatter):
         return super().format(record)
 
 
+def setup_queue_logging(logger: logging.Logger, handlers: List[logging.Handler]) -> logging.handlers.QueueListener:
+    """
+    Route logger's records through a queue to handlers on a background thread
+    
+    The calling thread only enqueues the record; formatting and file/console
+    writes happen on the listener thread. A listener already started for
+    this logger is stopped first, so repeated setup (e.g. warm invocations)
+    doesn't leave threads behind; other loggers' listeners keep running.
+    """
+    stop_queue_logging(logger)
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    logger.handlers.clear()
+    logger.addHandler(queue_handler)
+    
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _queue_listeners[logger.name] = (logger, queue_handler, listener)
+    return listener
+
+
+def stop_queue_logging(logger: Optional[logging.Logger] = None):
+    """
+    Drain queued records, flush buffered file output and stop the listener
+    thread of logger (default: of every logger set up with
+    setup_queue_logging). The logger's QueueHandler is removed, so nothing
+    is queued with no listener left to drain it.
+    """
+    names = [logger.name] if logger is not None else list(_queue_listeners)
+    for name in names:
+        entry = _queue_listeners.pop(name, None)
+        if entry is None:
+            continue
+        queued_logger, queue_handler, listener = entry
+        queued_logger.removeHandler(queue_handler)
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
+            handler.close()
+
+
+atexit.register(stop_queue_logging)
+
+
+def buffered_rotating_file_handler(log_filepath: str, formatter: logging.Formatter,
+                                   level: int = logging.DEBUG,
+                                   max_bytes: int = LOG_MAX_BYTES,
+                                   backup_count: int = LOG_BACKUP_COUNT,
+                                   buffer_capacity: int = LOG_BUFFER_CAPACITY) -> logging.Handler:
+    """
+    Size-rotated log file behind a memory buffer
+    
+    Records are written in batches of buffer_capacity, or straight away for
+    ERROR and above.
+    """
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_filepath, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+    )
+    file_handler.setFormatter(formatter)
+    
+    buffered_handler = logging.handlers.MemoryHandler(
+        buffer_capacity, flushLevel=logging.ERROR, target=file_handler
+    )
+    buffered_handler.setLevel(level)
+    return buffered_handler
+
+
 def setup_main_logger(log_level: str = "INFO") -> tuple[logging.Logger, str]:
     """
     Set up the main logger for the nightly run
@@ -51,17 +134,12 @@ def setup_main_logger(log_level: str = "INFO") -> tuple[logging.Logger, str]:
     logger = logging.getLogger("nightly_runner")
     logger.setLevel(getattr(logging, log_level.upper()))
     
-    # Clear any existing handlers
-    logger.handlers.clear()
-    
-    # File handler - detailed logging
-    file_handler = logging.FileHandler(log_filename, encoding='utf-8')
-    file_handler.setLevel(logging.DEBUG)
+    # File handler - detailed logging, buffered and size-rotated
     file_formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
-    file_handler.setFormatter(file_formatter)
+    file_handler = buffered_rotating_file_handler(log_filename, file_formatter, level=logging.DEBUG)
     
     # Console handler - cleaner output with colors
     console_handler = logging.StreamHandler(sys.stdout)
@@ -71,9 +149,8 @@ def setup_main_logger(log_level: str = "INFO") -> tuple[logging.Logger, str]:
     )
     console_handler.setFormatter(console_formatter)
     
-    # Add handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Both written from a background thread (clears any existing handlers)
+    setup_queue_logging(logger, [file_handler, console_handler])
     
     return logger, log_filename
 
@@ -131,6 +208,7 @@ class FilterMetrics:
         self.logger = logger
         self.filter_name = filter_name
         self.start_time = datetime.now()
+        self._lock = threading.Lock()
         
         # Metrics
         self.people_with_tags = 0
@@ -148,11 +226,29 @@ class FilterMetrics:
     
     def increment_api_calls(self):
         """Track API call count"""
-        self.api_calls_made += 1
+        with self._lock:
+            self.api_calls_made += 1
     
     def increment_errors(self):
         """Track error count"""
-        self.errors_encountered += 1
+        with self._lock:
+            self.errors_encountered += 1
+    
+    def record_request(self, event: dict):
+        """NationBuilderClient request hook: count every API call this filter makes"""
+        self.increment_api_calls()
+    
+    def attach(self, client):
+        """Start counting the client's API calls (no-op for clients without hooks)"""
+        if hasattr(client, 'add_request_hook'):
+            client.add_request_hook(self.record_request)
+    
+    def detach(self, client):
+        if hasattr(client, 'remove_request_hook'):
+            client.remove_request_hook(self.record_request)
+    
+    def duration_seconds(self) -> float:
+        return (datetime.now() - self.start_time).total_seconds()
     
     def log_final_summary(self):
         """Log final metrics summary"""
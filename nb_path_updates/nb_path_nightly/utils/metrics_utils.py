@@ -0,0 +1,255 @@
+# nb_path_updates/nb_path_nightly/utils/metrics_utils.py
+"""
+Run metrics: per-endpoint API call counts, status codes, bytes and latency
+histograms (fed by NationBuilderClient request hooks), plus per-phase
+timings. Written at the end of each run as JSON and as a Prometheus
+textfile.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from . import scheduling_utils
+
+# The Prometheus textfile keeps one name, so a textfile collector always
+# reads the latest run (and old runs don't pile up)
+PROMETHEUS_FILENAME = "clickers_metrics.prom"
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Numeric path segments become {id}, so /path_journeys/123/reactivate and
+# /path_journeys/456/reactivate count as one endpoint
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def normalize_endpoint(path: str) -> str:
+    """Collapse IDs in an API path, e.g. /lists/789/add_signups -> /lists/{id}/add_signups"""
+    return _ID_SEGMENT.sub('/{id}', path or '/')
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of samples (None if empty)"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class EndpointStats:
+    """Counters and latency histogram for one (method, endpoint)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.status_codes: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_sum = 0.0
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.latencies: List[float] = []
+
+    def record(self, event: Dict[str, Any]):
+        elapsed = event.get('elapsed', 0.0)
+        status = event.get('status_code')
+        status_key = str(status) if status is not None else (event.get('error') or 'error')
+
+        self.calls += 1
+        if status is None or status >= 400:
+            self.errors += 1
+        self.status_codes[status_key] = self.status_codes.get(status_key, 0) + 1
+        self.bytes_sent += event.get('bytes_sent', 0)
+        self.bytes_received += event.get('bytes_received', 0)
+        self.latency_sum += elapsed
+        self.latencies.append(elapsed)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed <= bound:
+                self.bucket_counts[i] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        p50 = percentile(self.latencies, 50)
+        p95 = percentile(self.latencies, 95)
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'status_codes': dict(self.status_codes),
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'latency_sum_seconds': round(self.latency_sum, 6),
+            'latency_p50_ms': round(p50 * 1000, 2) if p50 is not None else None,
+            'latency_p95_ms': round(p95 * 1000, 2) if p95 is not None else None,
+            'latency_buckets': {str(b): c for b, c in zip(LATENCY_BUCKETS, self.bucket_counts)},
+        }
+
+
+class ApiMetrics:
+    """
+    Collects API call metrics and phase timings for one run
+
+    Thread-safe: requests may be recorded from worker threads.
+    """
+
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.started_at = datetime.now()
+        self.endpoints: Dict[tuple, EndpointStats] = {}
+        self.phases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, event: Dict[str, Any]):
+        """Request hook: record one HTTP request"""
+        key = (event.get('method', 'GET').upper(), normalize_endpoint(event.get('path')))
+        with self._lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats()
+            stats.record(event)
+
+    def attach(self, client):
+        """Start receiving the client's requests (no-op for clients without hooks)"""
+        if hasattr(client, 'add_request_hook'):
+            client.add_request_hook(self.record)
+
+    def detach(self, client):
+        if hasattr(client, 'remove_request_hook'):
+            client.remove_request_hook(self.record)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a phase of the run (accumulates if the same phase runs twice)"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + time.monotonic() - start
+
+    def summary(self) -> Dict[str, Any]:
+        """Run-level totals across all endpoints"""
+        with self._lock:
+            all_latencies = [lat for stats in self.endpoints.values() for lat in stats.latencies]
+            calls = sum(stats.calls for stats in self.endpoints.values())
+            errors = sum(stats.errors for stats in self.endpoints.values())
+            bytes_sent = sum(stats.bytes_sent for stats in self.endpoints.values())
+            bytes_received = sum(stats.bytes_received for stats in self.endpoints.values())
+        p50 = percentile(all_latencies, 50)
+        p95 = percentile(all_latencies, 95)
+        return {
+            'duration_seconds': round(time.monotonic() - self.start_time, 3),
+            'api_calls': calls,
+            'api_errors': errors,
+            'bytes_sent': bytes_sent,
+            'bytes_received': bytes_received,
+            'latency_p50_ms': round(p50 * 1000, 2) if p50 is not None else None,
+            'latency_p95_ms': round(p95 * 1000, 2) if p95 is not None else None,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        summary = self.summary()
+        with self._lock:
+            endpoints = [
+                {'method': method, 'endpoint': endpoint, **stats.to_dict()}
+                for (method, endpoint), stats in sorted(self.endpoints.items())
+            ]
+            phases = {name: round(seconds, 3) for name, seconds in self.phases.items()}
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'summary': summary,
+            'phases': phases,
+            'endpoints': endpoints,
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus textfile-collector format"""
+        lines = [
+            '# HELP nb_api_requests_total NationBuilder API requests by endpoint and status',
+            '# TYPE nb_api_requests_total counter',
+        ]
+        with self._lock:
+            items = sorted(self.endpoints.items())
+            phases = dict(self.phases)
+        for (method, endpoint), stats in items:
+            for status, count in sorted(stats.status_codes.items()):
+                lines.append(f'nb_api_requests_total{{method="{method}",endpoint="{endpoint}",'
+                             f'status="{status}"}} {count}')
+
+        lines += [
+            '# HELP nb_api_request_duration_seconds NationBuilder API request latency',
+            '# TYPE nb_api_request_duration_seconds histogram',
+        ]
+        for (method, endpoint), stats in items:
+            labels = f'method="{method}",endpoint="{endpoint}"'
+            for bound, count in zip(LATENCY_BUCKETS, stats.bucket_counts):
+                lines.append(f'nb_api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'nb_api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.calls}')
+            lines.append(f'nb_api_request_duration_seconds_sum{{{labels}}} {stats.latency_sum:.6f}')
+            lines.append(f'nb_api_request_duration_seconds_count{{{labels}}} {stats.calls}')
+
+        lines += [
+            '# HELP nb_api_bytes_total NationBuilder API payload bytes',
+            '# TYPE nb_api_bytes_total counter',
+        ]
+        for (method, endpoint), stats in items:
+            labels = f'method="{method}",endpoint="{endpoint}"'
+            lines.append(f'nb_api_bytes_total{{{labels},direction="sent"}} {stats.bytes_sent}')
+            lines.append(f'nb_api_bytes_total{{{labels},direction="received"}} {stats.bytes_received}')
+
+        lines += [
+            '# HELP nb_run_phase_duration_seconds Wall time per run phase',
+            '# TYPE nb_run_phase_duration_seconds gauge',
+        ]
+        for name, seconds in sorted(phases.items()):
+            lines.append(f'nb_run_phase_duration_seconds{{phase="{name}"}} {seconds:.3f}')
+
+        lines += [
+            '# HELP nb_run_duration_seconds Wall time of the whole run',
+            '# TYPE nb_run_duration_seconds gauge',
+            f'nb_run_duration_seconds {time.monotonic() - self.start_time:.3f}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+def write_run_metrics(metrics: ApiMetrics, results: List[Dict[str, Any]],
+                      output_dir: str = None) -> Dict[str, str]:
+    """
+    Write the run's metrics next to the other outputs:
+    <date>_clickers_metrics_<timestamp>.json, and clickers_metrics.prom
+    (replaced each run)
+
+    Returns {'json': path, 'prometheus': path}
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    date_str = datetime.now().strftime("%Y%m%d")
+    if output_dir is None:
+        output_dir = scheduling_utils.get_output_dir()
+    os.makedirs(output_dir, exist_ok=True)
+
+    json_filepath = os.path.join(output_dir, f"{date_str}_clickers_metrics_{timestamp}.json")
+    prom_filepath = os.path.join(output_dir, PROMETHEUS_FILENAME)
+
+    data = metrics.to_dict()
+    data['filters'] = [
+        {key: result.get(key) for key in (
+            'filter_name', 'success', 'people_count', 'path_updates_successful',
+            'path_updates_errors', 'path_updates_deferred', 'path_updates_recovered',
+            'path_updates_dead_lettered', 'api_calls', 'duration_seconds', 'peak_rss_mb'
+        )}
+        for result in results
+    ]
+    with open(json_filepath, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+    # Write then rename, so a textfile collector never reads a partial file
+    tmp_filepath = f"{prom_filepath}.tmp"
+    with open(tmp_filepath, 'w', encoding='utf-8') as f:
+        f.write(metrics.to_prometheus())
+    os.replace(tmp_filepath, prom_filepath)
+
+    return {'json': json_filepath, 'prometheus': prom_filepath}
@@ -0,0 +1,168 @@
+# nb_path_updates/nb_path_nightly/utils/profiling_utils.py
+"""
+Profiling helpers for filter runs (main.py --profile)
+
+Each profiled call writes, next to the other outputs:
+  <date>_<label>_profile_<timestamp>.prof   cProfile stats (snakeviz, pstats)
+  <date>_<label>_alloc_<timestamp>.txt      top-N allocation sites (tracemalloc)
+                                            followed by the top-N functions by
+                                            cumulative time
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import scheduling_utils
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MB (None if unavailable)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return round(peak / divisor, 1)
+    except ImportError:
+        pass
+
+    if sys.platform == 'win32':
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class ProcessMemoryCounters(ctypes.Structure):
+                _fields_ = [
+                    ('cb', wintypes.DWORD),
+                    ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t),
+                    ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t),
+                    ('PeakPagefileUsage', ctypes.c_size_t),
+                ]
+
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return round(counters.PeakWorkingSetSize / (1024 * 1024), 1)
+        except (AttributeError, OSError):
+            pass
+
+    return None
+
+
+def _safe_label(label: str) -> str:
+    return label.lower().replace(' ', '_').replace('-', '_')
+
+
+def profile_call(fn: Callable[[], Any], label: str, output_dir: str = None,
+                 top_n: int = 25) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Run fn() under cProfile and tracemalloc
+
+    Before Python 3.12 cProfile only sees the thread it is enabled on, so
+    threads started during the call (e.g. the journey workers) get a
+    profiler each, via threading.setprofile; their stats are merged into
+    the .prof file. Threads that already existed (and keep running in the
+    background) are not profiled. From 3.12 cProfile runs on
+    sys.monitoring and sees every thread, and a second profiler can't be
+    enabled while it runs.
+
+    Returns (fn's result, info) where info has prof_file, alloc_file,
+    traced_peak_mb, peak_rss_mb and profiled_threads (None from 3.12: all
+    of them). Reports are written even if fn raises.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    date_str = datetime.now().strftime("%Y%m%d")
+    if output_dir is None:
+        output_dir = scheduling_utils.get_output_dir()
+    os.makedirs(output_dir, exist_ok=True)
+
+    safe_label = _safe_label(label)
+    prof_filepath = os.path.join(output_dir, f"{date_str}_{safe_label}_profile_{timestamp}.prof")
+    alloc_filepath = os.path.join(output_dir, f"{date_str}_{safe_label}_alloc_{timestamp}.txt")
+
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    thread_profilers = []
+    thread_profilers_lock = threading.Lock()
+
+    def profile_new_thread(frame, event, arg):
+        # First profile event of a new thread: hand the thread to its own
+        # profiler (enable() replaces this hook for the thread)
+        thread_profiler = cProfile.Profile()
+        with thread_profilers_lock:
+            thread_profilers.append(thread_profiler)
+        thread_profiler.enable()
+
+    per_thread = sys.version_info < (3, 12)
+    if per_thread:
+        previous_thread_hook = threading.getprofile()
+        threading.setprofile(profile_new_thread)
+    profiler.enable()
+    try:
+        result = fn()
+    finally:
+        profiler.disable()
+        if per_thread:
+            threading.setprofile(previous_thread_hook)
+        snapshot = tracemalloc.take_snapshot()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+
+        stats = pstats.Stats(profiler)
+        with thread_profilers_lock:
+            for thread_profiler in thread_profilers:
+                stats.add(thread_profiler)
+        stats.dump_stats(prof_filepath)
+        info = {
+            'prof_file': prof_filepath,
+            'alloc_file': alloc_filepath,
+            'traced_peak_mb': round(traced_peak / (1024 * 1024), 2),
+            'peak_rss_mb': peak_rss_mb(),
+            'profiled_threads': 1 + len(thread_profilers) if per_thread else None,
+        }
+        _write_report(alloc_filepath, label, snapshot, stats, info, top_n)
+
+    return result, info
+
+
+def _write_report(filepath: str, label: str, snapshot: tracemalloc.Snapshot,
+                  stats: pstats.Stats, info: Dict[str, Any], top_n: int):
+    """Top-N allocation sites, then top-N functions by cumulative time"""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    stats_text = io.StringIO()
+    stats.stream = stats_text
+    stats.sort_stats('cumulative').print_stats(top_n)
+
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(f"Profile: {label}\n")
+        f.write(f"Traced peak: {info['traced_peak_mb']} MB\n")
+        f.write(f"Process peak RSS: {info['peak_rss_mb']} MB\n")
+        f.write(f"Threads profiled: {info['profiled_threads'] or 'all'}\n\n")
+        f.write(f"Top {top_n} allocation sites (still allocated at end of run)\n")
+        f.write("=" * 60 + "\n")
+        for stat in snapshot.statistics('lineno')[:top_n]:
+            f.write(f"{stat}\n")
+        f.write(f"\nTop {top_n} functions by cumulative time\n")
+        f.write("=" * 60 + "\n")
+        f.write(stats_text.getvalue())
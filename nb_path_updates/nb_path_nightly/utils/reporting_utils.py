@@ -6,21 +6,31 @@ Updated for testing mode - no path assignments
 import os
 import csv
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
+from . import run_history, scheduling_utils
 
-def generate_summary_report(results: List[Dict[str, Any]], log_filename: str) -> str:
-    """Generate a summary report of all filter results"""
+
+def generate_summary_report(results: List[Dict[str, Any]], log_filename: str,
+                            run_summary: Optional[Dict[str, Any]] = None,
+                            history_db: str = None, record_history: bool = True) -> str:
+    """
+    Generate a summary report of all filter results
+
+    Also appends the run (with run_summary, e.g. ApiMetrics.summary()) to the
+    run-history store unless record_history is False.
+    """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     date_str = datetime.now().strftime("%Y%m%d")
-    output_dir = os.path.join(os.path.dirname(__file__), "..", "outputs")
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = scheduling_utils.get_output_dir()
     report_filename = f"{date_str}_clickers_test_summary_{timestamp}.csv"
     report_filepath = os.path.join(output_dir, report_filename)
 
     with open(report_filepath, 'w', newline='', encoding='utf-8') as csvfile:
         fieldnames = [
-            'Filter Name', 'Success', 'People Found', 'CSV Filename', 'Error'
+            'Filter Name', 'Success', 'People Found', 'CSV Filename',
+            'Path Updates Successful', 'Path Updates Errors', 'Path Updates Deferred',
+            'Path Updates Recovered', 'Path Updates Dead-Lettered', 'Peak RSS MB', 'Profile File', 'Error'
         ]
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         
@@ -32,11 +42,22 @@ def generate_summary_report(results: List[Dict[str, Any]], log_filename: str) ->
                 'Success': 'YES' if result['success'] else 'NO',
                 'People Found': result['people_count'],
                 'CSV Filename': result['csv_filename'],
+                'Path Updates Successful': result.get('path_updates_successful', 0),
+                'Path Updates Errors': result.get('path_updates_errors', 0),
+                'Path Updates Deferred': result.get('path_updates_deferred', 0),
+                'Path Updates Recovered': result.get('path_updates_recovered', 0),
+                'Path Updates Dead-Lettered': result.get('path_updates_dead_lettered', 0),
+                'Peak RSS MB': result.get('peak_rss_mb') or '',
+                'Profile File': result.get('profile_file') or '',
                 'Error': result['error'] or ''
             })
     
         pass
 
+    if record_history:
+        run_history.record_run(results, run_summary, log_filename=log_filename,
+                               report_filepath=report_filepath, db_path=history_db)
+
     return report_filepath
 
 # def generate_summary_report(results: List[Dict[str, Any]], log_filename: str) -> str:
@@ -0,0 +1,236 @@
+# nb_path_updates/nb_path_nightly/utils/run_history.py
+"""
+Run-history store (SQLite) and performance regression checks
+
+Every nightly run appends one row to `runs` (plus one row per filter to
+`filter_runs`), so trends across nights can be queried directly instead of
+stitched together from the per-run summary CSVs.
+
+Compare recent runs against the trailing median:
+    python -m nb_path_updates.nb_path_nightly.utils.run_history compare
+    python -m nb_path_updates.nb_path_nightly.utils.run_history compare --window 14 --factor 2 --last 5
+    python -m nb_path_updates.nb_path_nightly.utils.run_history list --last 10
+
+`compare` exits with status 1 if the most recent run is flagged.
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .scheduling_utils import get_state_dir
+
+# Metrics compared against the trailing median ("slower or more expensive")
+REGRESSION_METRICS = ('duration_seconds', 'api_calls', 'api_calls_per_person', 'p95_latency_ms', 'errors')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded_at TEXT NOT NULL,
+    duration_seconds REAL,
+    filters INTEGER,
+    success INTEGER,
+    people_found INTEGER,
+    writes INTEGER,
+    errors INTEGER,
+    deferred INTEGER,
+    api_calls INTEGER,
+    api_errors INTEGER,
+    p95_latency_ms REAL,
+    peak_rss_mb REAL,
+    log_file TEXT,
+    report_file TEXT
+);
+CREATE TABLE IF NOT EXISTS filter_runs (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    filter_name TEXT NOT NULL,
+    success INTEGER,
+    people_count INTEGER,
+    path_updates_successful INTEGER,
+    path_updates_errors INTEGER,
+    path_updates_deferred INTEGER,
+    api_calls INTEGER,
+    duration_seconds REAL,
+    peak_rss_mb REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_filter_runs_run_id ON filter_runs(run_id);
+"""
+
+
+def default_db_path() -> str:
+    """SQLite file for run history (override with NB_RUN_HISTORY_DB)"""
+    return os.getenv("NB_RUN_HISTORY_DB") or os.path.join(get_state_dir(), "run_history.sqlite3")
+
+
+def connect(db_path: str = None) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path or default_db_path())
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def record_run(results: List[Dict[str, Any]], metrics: Optional[Dict[str, Any]] = None,
+               log_filename: str = None, report_filepath: str = None,
+               db_path: str = None) -> int:
+    """
+    Append one run to the history
+
+    results: the per-filter result dicts from main.run_filter_module
+    metrics: run-level totals, e.g. metrics_utils.ApiMetrics.summary()
+    Returns the new run's id.
+    """
+    metrics = metrics or {}
+    peak_rss_values = [r['peak_rss_mb'] for r in results if r.get('peak_rss_mb')]
+    row = {
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'duration_seconds': metrics.get('duration_seconds',
+                                        sum(r.get('duration_seconds') or 0 for r in results)),
+        'filters': len(results),
+        'success': int(bool(results) and all(r.get('success') for r in results)),
+        'people_found': sum(r.get('people_count') or 0 for r in results),
+        'writes': sum(r.get('path_updates_successful') or 0 for r in results),
+        'errors': (sum(r.get('path_updates_errors') or 0 for r in results)
+                   + sum(1 for r in results if not r.get('success'))),
+        'deferred': sum(r.get('path_updates_deferred') or 0 for r in results),
+        'api_calls': metrics.get('api_calls', sum(r.get('api_calls') or 0 for r in results)),
+        'api_errors': metrics.get('api_errors'),
+        'p95_latency_ms': metrics.get('latency_p95_ms'),
+        'peak_rss_mb': max(peak_rss_values) if peak_rss_values else None,
+        'log_file': log_filename,
+        'report_file': report_filepath,
+    }
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            cursor = conn.execute(
+                f"INSERT INTO runs ({', '.join(row)}) VALUES ({', '.join('?' for _ in row)})",
+                list(row.values())
+            )
+            run_id = cursor.lastrowid
+            conn.executemany(
+                """INSERT INTO filter_runs (run_id, filter_name, success, people_count,
+                       path_updates_successful, path_updates_errors, path_updates_deferred,
+                       api_calls, duration_seconds, peak_rss_mb, error)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(run_id, r.get('filter_name'), int(bool(r.get('success'))), r.get('people_count'),
+                  r.get('path_updates_successful'), r.get('path_updates_errors'),
+                  r.get('path_updates_deferred'), r.get('api_calls'), r.get('duration_seconds'),
+                  r.get('peak_rss_mb'), r.get('error'))
+                 for r in results]
+            )
+        return run_id
+    finally:
+        conn.close()
+
+
+def load_runs(db_path: str = None, limit: int = None) -> List[Dict[str, Any]]:
+    """Runs oldest first (the most recent `limit` runs if given)"""
+    conn = connect(db_path)
+    try:
+        query = "SELECT * FROM runs ORDER BY id DESC"
+        params = ()
+        if limit:
+            query += " LIMIT ?"
+            params = (limit,)
+        runs = [dict(row) for row in conn.execute(query, params)]
+    finally:
+        conn.close()
+
+    runs.reverse()
+    for run in runs:
+        people = run.get('people_found') or 0
+        run['api_calls_per_person'] = (run['api_calls'] / people
+                                       if people and run.get('api_calls') is not None else None)
+    return runs
+
+
+def compare_to_trailing_median(runs: List[Dict[str, Any]], window: int = 7, factor: float = 1.5,
+                               min_history: int = 3) -> List[Dict[str, Any]]:
+    """
+    Flag runs whose metrics exceed factor x the median of the previous
+    `window` runs (runs given oldest first)
+
+    Returns one dict per run that has enough history:
+    {'run_id', 'recorded_at', 'flags': [{'metric', 'value', 'median', 'ratio'}]}
+    """
+    comparisons = []
+    for i, run in enumerate(runs):
+        history = runs[max(0, i - window):i]
+        if len(history) < min_history:
+            continue
+
+        flags = []
+        for metric in REGRESSION_METRICS:
+            value = run.get(metric)
+            past = [h[metric] for h in history if h.get(metric) is not None]
+            if value is None or len(past) < min_history:
+                continue
+            median = statistics.median(past)
+            if median > 0 and value > factor * median:
+                flags.append({'metric': metric, 'value': value, 'median': median,
+                              'ratio': round(value / median, 2)})
+            elif median == 0 and metric == 'errors' and value > 0:
+                flags.append({'metric': metric, 'value': value, 'median': median, 'ratio': None})
+
+        comparisons.append({'run_id': run['id'], 'recorded_at': run['recorded_at'], 'flags': flags})
+    return comparisons
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Nightly run history and regression checks")
+    parser.add_argument('--db', default=None, help="SQLite file (default: NB_RUN_HISTORY_DB or state dir)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = subparsers.add_parser('list', help="Show recent runs")
+    list_parser.add_argument('--last', type=int, default=10)
+
+    compare_parser = subparsers.add_parser('compare', help="Flag runs much slower/costlier than the trailing median")
+    compare_parser.add_argument('--window', type=int, default=7, help="Trailing runs in the median (default: %(default)s)")
+    compare_parser.add_argument('--factor', type=float, default=1.5, help="Flag above factor x median (default: %(default)s)")
+    compare_parser.add_argument('--last', type=int, default=1, help="How many recent runs to report (default: %(default)s)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        columns = ('id', 'recorded_at', 'duration_seconds', 'people_found', 'writes', 'errors',
+                   'api_calls', 'p95_latency_ms')
+        print('  '.join(f"{c:>16}" for c in columns))
+        for run in load_runs(args.db, limit=args.last):
+            print('  '.join(f"{_format_value(run.get(c)):>16}" for c in columns))
+        return 0
+
+    runs = load_runs(args.db, limit=args.window + args.last)
+    comparisons = compare_to_trailing_median(runs, window=args.window, factor=args.factor)[-args.last:]
+    if not comparisons:
+        print(f"Not enough history to compare (have {len(runs)} runs)")
+        return 0
+
+    for comparison in comparisons:
+        if not comparison['flags']:
+            print(f" Run {comparison['run_id']} ({comparison['recorded_at']}): OK")
+            continue
+        print(f" Run {comparison['run_id']} ({comparison['recorded_at']}): REGRESSION")
+        for flag in comparison['flags']:
+            ratio = f" ({flag['ratio']}x)" if flag['ratio'] else ""
+            print(f"    {flag['metric']}: {_format_value(flag['value'])} vs median "
+                  f"{_format_value(flag['median'])}{ratio}")
+
+    return 1 if comparisons[-1]['flags'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# nb_path_updates/nb_path_nightly/utils/scheduling_utils.py
+"""
+Deadline and carry-over utilities for time-budgeted nightly runs
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import List, Optional
+
+
+class RunDeadline:
+    """
+    Tracks a wall-clock budget for a run (e.g. Cloud Function timeout minus a margin)
+    
+    Work loops call can_start() before each write and record_unit() after it;
+    once the remaining budget can't cover the reserve plus the average cost of
+    one more unit, new writes should stop.
+    """
+    
+    def __init__(self, budget_seconds: Optional[float], reserve_seconds: float = 15.0):
+        self.budget_seconds = budget_seconds
+        self.reserve_seconds = reserve_seconds
+        self.start = time.monotonic()
+        self._units_done = 0
+        self._unit_seconds_total = 0.0
+    
+    @property
+    def unlimited(self) -> bool:
+        return self.budget_seconds is None
+    
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start
+    
+    def remaining(self) -> float:
+        if self.unlimited:
+            return float('inf')
+        return self.budget_seconds - self.elapsed()
+    
+    def average_unit_seconds(self) -> float:
+        if not self._units_done:
+            return 0.0
+        return self._unit_seconds_total / self._units_done
+    
+    def record_unit(self, seconds: float):
+        """Record how long one unit of work (e.g. one signup) took"""
+        self._units_done += 1
+        self._unit_seconds_total += seconds
+    
+    def can_start(self, units: int = 1) -> bool:
+        """True if there is budget left to start `units` more units of work"""
+        if self.unlimited:
+            return True
+        needed = self.reserve_seconds + self.average_unit_seconds() * units
+        return self.remaining() > needed
+    
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def get_output_dir() -> str:
+    """Directory for reports, exports, metrics and logs (override with NB_OUTPUT_DIR)"""
+    output_dir = os.getenv("NB_OUTPUT_DIR") or os.path.join(os.path.dirname(__file__), "..", "outputs")
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+
+def get_state_dir() -> str:
+    """Directory for state carried between runs (override with NB_STATE_DIR)"""
+    state_dir = os.getenv("NB_STATE_DIR") or os.path.join(
+        os.path.dirname(__file__), "..", "outputs", "state"
+    )
+    os.makedirs(state_dir, exist_ok=True)
+    return state_dir
+
+
+def _pending_filepath(filter_key: str) -> str:
+    return os.path.join(get_state_dir(), f"{filter_key}_pending.json")
+
+
+def load_pending(filter_key: str) -> List[str]:
+    """Return signup IDs left unfinished by a previous run of this filter"""
+    filepath = _pending_filepath(filter_key)
+    if not os.path.exists(filepath):
+        return []
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return [str(signup_id) for signup_id in json.load(f).get('signup_ids', [])]
+    except (OSError, ValueError):
+        return []
+
+
+def save_pending(filter_key: str, signup_ids: List[str], reason: str = ""):
+    """
+    Persist the signup IDs still to be processed, so a deadline stop or a
+    killed run can be picked up by the next invocation
+    """
+    if not signup_ids:
+        clear_pending(filter_key)
+        return
+    filepath = _pending_filepath(filter_key)
+    tmp_filepath = f"{filepath}.tmp"
+    with open(tmp_filepath, 'w', encoding='utf-8') as f:
+        json.dump({
+            'filter': filter_key,
+            'saved_at': datetime.now().isoformat(timespec='seconds'),
+            'reason': reason,
+            'signup_ids': list(signup_ids)
+        }, f)
+    os.replace(tmp_filepath, filepath)
+
+
+def clear_pending(filter_key: str):
+    """Forget any carried-over work for this filter"""
+    filepath = _pending_filepath(filter_key)
+    if os.path.exists(filepath):
+        os.remove(filepath)
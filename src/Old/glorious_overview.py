@@ -1,12 +1,13 @@
 import os
+import sys
 import asyncio
-import asyncpg
 import csv
-from dotenv import load_dotenv
 
-# Load environment variables from .env
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Add the repo root to path (src.*)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src import db
+
 SCHEMA = "nbuild_larouchepac"
 OUTPUT_CSV = "data/glorious_overview.csv"
 MAX_ROWS = 5
@@ -51,16 +52,19 @@ def transpose_table(table_name, cols, data):
     return transposed
 
 async def main():
-    conn = await asyncpg.connect(DATABASE_URL)
-    table_names = await get_table_names(conn)
+    async with db.pool_session() as pool:
+        async with pool.acquire() as conn:
+            table_names = await get_table_names(conn)
+        # Sample every table at once, each on its own pooled connection
+        samples = await db.run_concurrently(pool, *(
+            lambda conn, table_name=table_name: get_table_sample(conn, table_name) for table_name in table_names
+        ))
     all_rows = []
-    for table_name in table_names:
-        cols, data = await get_table_sample(conn, table_name)
+    for table_name, (cols, data) in zip(table_names, samples):
         if cols is None:
             continue
         transposed = transpose_table(table_name, cols, data)
         all_rows.extend(transposed)
-    await conn.close()
     # Write to CSV
     with open(OUTPUT_CSV, "w", newline='', encoding="utf-8") as f:
         writer = csv.writer(f)
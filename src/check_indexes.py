@@ -0,0 +1,373 @@
+# src/check_indexes.py
+"""
+Create the indexes our scripts need on a restored NationBuilder snapshot
+
+NB dumps arrive without secondary indexes, so every analysis of
+nbuild_larouchepac is a sequential scan. WANTED_INDEXES lists the access
+patterns of our scripts (email_open_frequency*.py, engagement_rollup.py,
+export_signup_ids.py, tag lookups) and the index serving each. Run this
+after every restore: it reports which are present, creates the missing
+ones, and times each pattern with EXPLAIN ANALYZE before and after.
+
+An existing btree index counts as present when its leading key columns
+match and it holds the included columns, whatever its name. Tables or
+columns missing from the snapshot are skipped. An invalid index left
+under a wanted name by a failed --concurrently build is dropped and
+rebuilt.
+
+Usage:
+    python src/check_indexes.py              # report, create missing, time
+    python src/check_indexes.py --dry-run    # report and print the DDL only
+    python src/check_indexes.py --concurrently --no-explain
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+# Add the repo root to path (src.*)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import db
+
+SCHEMA = "nbuild_larouchepac"
+
+# Memory for sorting during index builds (session only)
+MAINTENANCE_WORK_MEM = os.getenv("INDEX_MAINTENANCE_WORK_MEM", "512MB")
+
+EVENT_COLUMNS = ("signup_id", "mailing_id", "broadcaster_id")
+
+
+
+def _created_at_index(table: str) -> Dict[str, Any]:
+    """Date-range scans (cutoffs, rollup watermarks) as index-only scans"""
+    return {
+        'table': table,
+        'columns': ("created_at",),
+        'include': EVENT_COLUMNS,
+        'used_by': "date cutoffs (email_open_frequency*, exports), engagement_rollup watermark ranges",
+        # A month of events, as read by a recent cutoff
+        'probe': "SELECT count(DISTINCT (signup_id, mailing_id)) FROM {schema}.{table} WHERE created_at > $1",
+        'window': timedelta(days=30),
+    }
+
+
+def _mailing_signup_index(table: str) -> Dict[str, Any]:
+    """Per-mailing lookups; with signup_id and created_at it also answers the rollup anti-join"""
+    return {
+        'table': table,
+        'columns': ("mailing_id", "signup_id", "created_at"),
+        'include': (),
+        'used_by': "mailing_id joins/IN lists (email_open_frequency*), engagement_rollup earlier-event check",
+        # A nightly rollup update: a day of events checked for earlier ones
+        'probe': """
+            SELECT count(*) FROM {schema}.{table} recent
+            WHERE recent.created_at > $1
+              AND NOT EXISTS (
+                  SELECT 1 FROM {schema}.{table} seen
+                  WHERE seen.mailing_id = recent.mailing_id
+                    AND seen.signup_id = recent.signup_id
+                    AND seen.created_at < recent.created_at
+              )
+        """,
+        'window': timedelta(days=1),
+    }
+
+
+WANTED_INDEXES: List[Dict[str, Any]] = [
+    _created_at_index("mailing_events_sent"),
+    _created_at_index("mailing_events_opened"),
+    _created_at_index("mailing_events_clicked"),
+    _mailing_signup_index("mailing_events_sent"),
+    _mailing_signup_index("mailing_events_opened"),
+    _mailing_signup_index("mailing_events_clicked"),
+    {
+        'table': "mailing_events_machine_opened",
+        'columns': ("mailing_id", "signup_id", "created_at"),
+        'include': (),
+        'used_by': "machine-open pair counts (email_open_frequency_v2)",
+        # A day of opens, counted per pair against the pairs' machine opens
+        'probe': """
+            WITH open_counts AS (
+                SELECT signup_id, mailing_id, count(*) AS opens
+                FROM {schema}.mailing_events_opened
+                WHERE created_at > $1
+                GROUP BY signup_id, mailing_id
+            ),
+            machine_counts AS (
+                SELECT signup_id, mailing_id, count(*) AS machine_opens
+                FROM {schema}.{table}
+                WHERE mailing_id IN (SELECT mailing_id FROM open_counts)
+                GROUP BY signup_id, mailing_id
+            )
+            SELECT count(*)
+            FROM open_counts
+            LEFT JOIN machine_counts USING (signup_id, mailing_id)
+            WHERE open_counts.opens > COALESCE(machine_counts.machine_opens, 0)
+        """,
+        'window': timedelta(days=1),
+    },
+    {
+        'table': "signup_taggings",
+        'columns': ("tag_id", "signup_id"),
+        'include': (),
+        'used_by': "signups with a tag",
+        'probe': """
+            SELECT count(*) FROM {schema}.{table}
+            WHERE tag_id = (SELECT min(tag_id) FROM {schema}.{table})
+        """,
+    },
+    {
+        'table': "path_journeys",
+        'columns': ("path_id", "signup_id"),
+        'include': (),
+        'used_by': "signups on a path (export_signup_ids)",
+        'probe': "SELECT count(*) FROM {schema}.{table} WHERE path_id = 1110",
+    },
+]
+
+COLUMNS_SQL = """
+    SELECT table_name, array_agg(column_name::text) AS columns
+    FROM information_schema.columns
+    WHERE table_schema = $1
+    GROUP BY table_name
+"""
+
+# Valid, non-partial btree indexes on plain columns, with their key and
+# INCLUDE columns in order
+INDEXES_SQL = """
+    SELECT t.relname AS table_name,
+           i.relname AS index_name,
+           x.indnkeyatts AS key_count,
+           array(
+               SELECT a.attname::text
+               FROM unnest(x.indkey::int2[]) WITH ORDINALITY AS k(attnum, position)
+               JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+               ORDER BY k.position
+           ) AS columns
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_class t ON t.oid = x.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    JOIN pg_am am ON am.oid = i.relam
+    WHERE n.nspname = $1
+      AND am.amname = 'btree'
+      AND x.indisvalid
+      AND x.indpred IS NULL
+      AND NOT 0 = ANY (x.indkey::int2[])
+"""
+
+# Indexes a failed CREATE INDEX CONCURRENTLY left behind: never used by
+# the planner, but their names make CREATE INDEX IF NOT EXISTS a no-op
+INVALID_INDEXES_SQL = """
+    SELECT i.relname AS index_name
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_namespace n ON n.oid = i.relnamespace
+    WHERE n.nspname = $1
+      AND NOT x.indisvalid
+"""
+
+
+def index_name(wanted: Dict[str, Any]) -> str:
+    name = f"{wanted['table']}_{'_'.join(wanted['columns'])}_idx"
+    if len(name) > 63:
+        # Postgres truncates identifiers at 63 bytes; shorten column names instead (mailing_id -> mailing)
+        name = f"{wanted['table']}_{'_'.join(column.split('_')[0] for column in wanted['columns'])}_idx"
+    return name
+
+
+def create_index_sql(wanted: Dict[str, Any], schema: str = SCHEMA, concurrently: bool = False) -> str:
+    include = f" INCLUDE ({', '.join(wanted['include'])})" if wanted['include'] else ""
+    return (f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {index_name(wanted)} "
+            f"ON {schema}.{wanted['table']} ({', '.join(wanted['columns'])}){include}")
+
+
+def drop_index_sql(wanted: Dict[str, Any], schema: str = SCHEMA, concurrently: bool = False) -> str:
+    return f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {schema}.{index_name(wanted)}"
+
+
+def index_satisfies(existing: Dict[str, Any], wanted: Dict[str, Any]) -> bool:
+    """Whether an existing index (key_count, columns) serves the wanted one"""
+    key = tuple(existing['columns'][:existing['key_count']])
+    return (key[:len(wanted['columns'])] == tuple(wanted['columns'])
+            and set(wanted['include']) <= set(existing['columns']))
+
+
+def _scans(plan: Dict[str, Any]) -> List[str]:
+    """Scan nodes in an EXPLAIN (FORMAT JSON) plan, e.g. 'Index Only Scan using x'"""
+    scans = []
+    if "Scan" in plan["Node Type"] and "Relation Name" in plan:
+        scan = plan["Node Type"]
+        if "Index Name" in plan:
+            scan += f" using {plan['Index Name']}"
+        scans.append(scan)
+    for child in plan.get("Plans", []):
+        scans.extend(_scans(child))
+    return scans
+
+
+async def explain_analyze(conn, query: str, *args, runs: int = 2) -> Dict[str, Any]:
+    """
+    Best execution time (ms) over runs, so the first run's cold cache
+    doesn't flatter the after timings, and the scans used
+    """
+    best = None
+    for _ in range(runs):
+        raw = await conn.fetchval(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}", *args)
+        explained = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+        if best is None or explained["Execution Time"] < best["Execution Time"]:
+            best = explained
+    return {
+        'ms': round(best["Execution Time"], 1),
+        'scans': sorted(set(_scans(best["Plan"]))),
+    }
+
+
+async def inspect(conn, schema: str = SCHEMA) -> List[Dict[str, Any]]:
+    """
+    Status of every wanted index: 'present' (with the existing index's
+    name), 'missing', 'invalid' (missing, with an invalid index under its
+    name to drop first) or 'skipped' (with the reason)
+    """
+    columns = {row['table_name']: set(row['columns']) for row in await conn.fetch(COLUMNS_SQL, schema)}
+    existing = [dict(row) for row in await conn.fetch(INDEXES_SQL, schema)]
+    invalid = {row['index_name'] for row in await conn.fetch(INVALID_INDEXES_SQL, schema)}
+
+    report = []
+    for wanted in WANTED_INDEXES:
+        entry = {
+            'table': wanted['table'],
+            'index': index_name(wanted),
+            'definition': create_index_sql(wanted, schema),
+            'used_by': wanted['used_by'],
+        }
+        table_columns = columns.get(wanted['table'])
+        missing_columns = set(wanted['columns']) | set(wanted['include'])
+        if table_columns is not None:
+            missing_columns -= table_columns
+        match = next((index for index in existing
+                      if index['table_name'] == wanted['table'] and index_satisfies(index, wanted)), None)
+        if table_columns is None:
+            entry.update(status='skipped', reason="table not in snapshot")
+        elif missing_columns:
+            entry.update(status='skipped', reason=f"missing columns: {', '.join(sorted(missing_columns))}")
+        elif match:
+            entry.update(status='present', index=match['index_name'])
+        elif entry['index'] in invalid:
+            entry.update(status='invalid', reason="left invalid by a failed concurrent build")
+        else:
+            entry['status'] = 'missing'
+        report.append(entry)
+    return report
+
+
+async def _vacuum_analyze(conn, schema: str, tables: List[str]):
+    """
+    Restored tables have no statistics and no visibility map, so the
+    planner misjudges row counts and index-only scans still visit the heap
+    """
+    for table in tables:
+        await conn.execute(f"VACUUM (ANALYZE) {schema}.{table}")
+
+
+async def _time_probe(conn, wanted: Dict[str, Any], schema: str) -> Dict[str, Any]:
+    """EXPLAIN ANALYZE the index's access pattern, over the table's most recent window when it has one"""
+    query = wanted['probe'].format(schema=schema, table=wanted['table'])
+    if 'window' not in wanted:
+        return await explain_analyze(conn, query)
+    latest = await conn.fetchval(f"SELECT max(created_at) FROM {schema}.{wanted['table']}")
+    if latest is None:
+        return await explain_analyze(conn, query, datetime.min)
+    return await explain_analyze(conn, query, latest - wanted['window'])
+
+
+async def ensure_indexes(conn, schema: str = SCHEMA, concurrently: bool = False,
+                         explain: bool = True) -> List[Dict[str, Any]]:
+    """
+    Create the missing wanted indexes (dropping invalid ones under the same
+    name first), timing each one's access pattern with EXPLAIN ANALYZE
+    before and after (both on vacuumed, analyzed tables). Returns
+    inspect()'s report with before/after timings and build seconds for
+    the created indexes.
+    """
+    report = await inspect(conn, schema)
+    missing = [(entry, wanted) for entry, wanted in zip(report, WANTED_INDEXES)
+               if entry['status'] in ('missing', 'invalid')]
+    if not missing:
+        return report
+
+    await conn.execute(f"SET maintenance_work_mem = '{MAINTENANCE_WORK_MEM}'")
+    tables = sorted({wanted['table'] for _, wanted in missing})
+    await _vacuum_analyze(conn, schema, tables)
+
+    if explain:
+        for entry, wanted in missing:
+            entry['before'] = await _time_probe(conn, wanted, schema)
+
+    for entry, wanted in missing:
+        start = time.perf_counter()
+        if entry['status'] == 'invalid':
+            await conn.execute(drop_index_sql(wanted, schema, concurrently))
+        await conn.execute(create_index_sql(wanted, schema, concurrently))
+        entry['status'] = 'rebuilt' if entry['status'] == 'invalid' else 'created'
+        entry['build_seconds'] = round(time.perf_counter() - start, 2)
+
+    await _vacuum_analyze(conn, schema, tables)
+
+    if explain:
+        for entry, wanted in missing:
+            entry['after'] = await _time_probe(conn, wanted, schema)
+    return report
+
+
+def print_report(report: List[Dict[str, Any]]):
+    for entry in report:
+        line = f"{entry['status']:>8}  {entry['table']}: {entry['index']}"
+        if entry['status'] in ('skipped', 'invalid'):
+            line += f" ({entry['reason']})"
+        if 'build_seconds' in entry:
+            line += f" built in {entry['build_seconds']}s"
+        print(line)
+        if 'before' in entry and 'after' in entry:
+            before, after = entry['before'], entry['after']
+            speedup = before['ms'] / after['ms'] if after['ms'] else float('inf')
+            print(f"          {before['ms']} ms -> {after['ms']} ms ({speedup:.1f}x) for {entry['used_by']}")
+            print(f"          before: {', '.join(before['scans'])}")
+            print(f"          after:  {', '.join(after['scans'])}")
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--schema', default=SCHEMA)
+    parser.add_argument('--dry-run', action='store_true', help="Report and print the DDL without creating anything")
+    parser.add_argument('--concurrently', action='store_true',
+                        help="CREATE INDEX CONCURRENTLY (slower, but doesn't block writes)")
+    parser.add_argument('--no-explain', action='store_true', help="Skip the EXPLAIN ANALYZE timings")
+    args = parser.parse_args(argv)
+
+    # One connection: the build settings are per session and the timings
+    # shouldn't compete with other queries
+    conn = await db.connect()
+    try:
+        if args.dry_run:
+            report = await inspect(conn, args.schema)
+            print_report(report)
+            for entry, wanted in zip(report, WANTED_INDEXES):
+                if entry['status'] == 'invalid':
+                    print(f"{drop_index_sql(wanted, args.schema)};")
+                if entry['status'] in ('missing', 'invalid'):
+                    print(f"{entry['definition']};")
+        else:
+            print_report(await ensure_indexes(conn, args.schema, args.concurrently, not args.no_explain))
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+# src/db.py
+"""
+Shared asyncpg connection pool for the analysis scripts
+
+Connection settings come from DATABASE_URL when set, otherwise from the
+POSTGRES_* variables (the docker-compose defaults). Every connection
+gets the analytics session settings (work_mem big enough for the event
+aggregates to hash and sort in memory) and a prepared-statement cache.
+
+Independent queries run at the same time on separate pooled connections
+with run_concurrently / fetch_concurrently, e.g. the sent and opened
+counts of an open-frequency analysis.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import asyncpg
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_CONFIG = {
+    "user": os.getenv("POSTGRES_USER", "dev_user"),
+    "password": os.getenv("POSTGRES_PASSWORD", "dev_password"),
+    "database": os.getenv("POSTGRES_DB", "campaign_buddy_ai"),
+    "host": os.getenv("POSTGRES_HOST", "localhost"),
+    "port": os.getenv("POSTGRES_PORT", "5432"),
+}
+
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 4))
+
+# Prepared statements kept per connection (asyncpg's default is 100)
+STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 256))
+
+# work_mem is per sort/hash step and per connection; 256MB keeps the
+# COUNT(DISTINCT mailing_id) sorts in memory rather than spilling to disk
+ANALYTICS_SETTINGS = {
+    "application_name": os.getenv("DB_APPLICATION_NAME", "campaign_buddy_analytics"),
+    "work_mem": os.getenv("DB_WORK_MEM", "256MB"),
+}
+
+
+def connect_kwargs(**overrides) -> Dict[str, Any]:
+    """asyncpg.connect / create_pool arguments from the environment, plus overrides"""
+    database_url = os.getenv("DATABASE_URL")
+    kwargs: Dict[str, Any] = {"dsn": database_url} if database_url else dict(DB_CONFIG)
+    kwargs["statement_cache_size"] = STATEMENT_CACHE_SIZE
+    kwargs["server_settings"] = {**ANALYTICS_SETTINGS, **overrides.pop("server_settings", {})}
+    kwargs.update(overrides)
+    return kwargs
+
+
+async def connect(**overrides) -> asyncpg.Connection:
+    """A single connection with the shared settings (for one-off scripts)"""
+    return await asyncpg.connect(**connect_kwargs(**overrides))
+
+
+async def create_pool(min_size: Optional[int] = None, max_size: Optional[int] = None, **overrides) -> asyncpg.Pool:
+    return await asyncpg.create_pool(
+        min_size=POOL_MIN_SIZE if min_size is None else min_size,
+        max_size=POOL_MAX_SIZE if max_size is None else max_size,
+        **connect_kwargs(**overrides)
+    )
+
+
+@asynccontextmanager
+async def pool_session(**kwargs):
+    """A pool for the duration of a script: async with pool_session() as pool: ..."""
+    pool = await create_pool(**kwargs)
+    try:
+        yield pool
+    finally:
+        await pool.close()
+
+
+async def run_concurrently(pool: asyncpg.Pool, *jobs: Callable[[asyncpg.Connection], Awaitable[Any]]) -> list:
+    """
+    Run each job (an async function of a connection) on its own pooled
+    connection, all at once; returns their results in order. At most the
+    pool's max_size run at a time.
+    """
+    async def run(job):
+        async with pool.acquire() as conn:
+            return await job(conn)
+
+    return await asyncio.gather(*(run(job) for job in jobs))
+
+
+async def fetch_concurrently(pool: asyncpg.Pool, queries: Dict[str, Tuple]) -> Dict[str, list]:
+    """Run {name: (query, *args)} at the same time; returns {name: rows}"""
+    names = list(queries)
+    results = await run_concurrently(pool, *(
+        lambda conn, query=queries[name]: conn.fetch(*query) for name in names
+    ))
+    return dict(zip(names, results))
@@ -1,15 +1,14 @@
 import asyncio
-import asyncpg
 import os
+import sys
 import csv
-from dotenv import load_dotenv
 from datetime import datetime
 
-# Load environment variables from .env
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL not set in .env file")
+# Add the repo root to path (src.*)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import db
+from src.event_exports import copy_query_to_csv, export_path
 
 async def get_counts(conn, table, date):
     query = f"""
@@ -22,48 +21,36 @@ async def get_counts(conn, table, date):
     return {row['signup_id']: row['mailing_count'] for row in rows}
 
 async def main():
-    conn = await asyncpg.connect(DATABASE_URL)
-    try:
+    async with db.pool_session() as pool:
         date_filter = datetime.strptime('2025-01-01', '%Y-%m-%d')
+        sent_path = export_path('mailing_events_sent_filtered')
+        opened_path = export_path('mailing_events_opened_filtered')
 
-        # Export filtered mailing_events_sent
-        sent_rows = await conn.fetch(
-            """
-            SELECT * FROM nbuild_larouchepac.mailing_events_sent WHERE created_at >= $1
-            """, date_filter
-        )
-        with open('mailing_events_sent_filtered.csv', 'w', newline='') as csvfile:
-            if sent_rows:
-                fieldnames = list(sent_rows[0].keys())
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                for row in sent_rows:
-                    writer.writerow(dict(row))
-            else:
-                csvfile.write('')
-
-        # Export filtered mailing_events_opened by sent date
-        opened_rows = await conn.fetch(
-            """
-            SELECT o.*, s.created_at AS created_at_sent
-            FROM nbuild_larouchepac.mailing_events_opened o
-            JOIN nbuild_larouchepac.mailing_events_sent s ON o.mailing_id = s.mailing_id
-            WHERE s.created_at >= $1
-            """, date_filter
+        # The exports and both counts are independent: run them at once, each
+        # on its own pooled connection
+        _, _, sent_counts, opened_counts = await db.run_concurrently(
+            pool,
+            # Export filtered mailing_events_sent (COPY straight to disk; gzipped if EXPORT_GZIP is set)
+            lambda conn: copy_query_to_csv(
+                conn, sent_path,
+                """
+                SELECT * FROM nbuild_larouchepac.mailing_events_sent WHERE created_at >= $1
+                """, date_filter
+            ),
+            # Export filtered mailing_events_opened by sent date
+            lambda conn: copy_query_to_csv(
+                conn, opened_path,
+                """
+                SELECT o.*, s.created_at AS created_at_sent
+                FROM nbuild_larouchepac.mailing_events_opened o
+                JOIN nbuild_larouchepac.mailing_events_sent s ON o.mailing_id = s.mailing_id
+                WHERE s.created_at >= $1
+                """, date_filter
+            ),
+            # Existing open frequency logic
+            lambda conn: get_counts(conn, 'mailing_events_sent', date_filter),
+            lambda conn: get_counts(conn, 'mailing_events_opened', date_filter),
         )
-        with open('mailing_events_opened_filtered.csv', 'w', newline='') as csvfile:
-            if opened_rows:
-                fieldnames = list(opened_rows[0].keys())
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                for row in opened_rows:
-                    writer.writerow(dict(row))
-            else:
-                csvfile.write('')
-
-        # Existing open frequency logic
-        sent_counts = await get_counts(conn, 'mailing_events_sent', date_filter)
-        opened_counts = await get_counts(conn, 'mailing_events_opened', date_filter)
 
         results = []
         for signup_id, sent in sent_counts.items():
@@ -82,9 +69,7 @@ async def main():
             for r in results:
                 writer.writerow(r)
         print("Exported to email_open_frequency.csv")
-        print("Exported mailing_events_sent_filtered.csv and mailing_events_opened_filtered.csv")
-    finally:
-        await conn.close()
+        print(f"Exported {sent_path} and {opened_path}")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,246 @@
+# src/engagement_rollup.py
+"""
+Per-signup, per-month engagement rollup, maintained incrementally
+
+analytics.engagement_monthly holds, for each signup, month and
+broadcaster, the number of distinct mailings sent, opened and clicked.
+Each (signup, mailing) pair counts once per event type, in the month and
+under the broadcaster of its first send: an open or click counts toward
+the send it answers, so a cutoff month selects the same mailings for all
+three counts and open rates stay within [0, 1]. Opens and clicks of
+pairs with no send at the time they are rolled up are not counted.
+Machine opens are not excluded (see email_open_frequency_v2.py for the
+filtered counts). Every update only reads events newer than the
+per-table created_at watermark in analytics.engagement_rollup_state, so
+open-frequency queries for any cutoff become sums over a small table
+instead of scans of the raw event tables.
+
+The rollup lives outside the snapshot schema, so restoring a newer
+snapshot keeps it; after restoring an older or rewritten snapshot, run
+with --rebuild. Updates look up each new pair's send and earlier events
+per (signup, mailing); without the (mailing_id, signup_id, created_at)
+indexes from src/check_indexes.py they scan the tables.
+
+Usage:
+    python src/engagement_rollup.py
+    python src/engagement_rollup.py --rebuild
+    python src/engagement_rollup.py --since 2025-01-01 --export email_open_frequency.csv
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# Add the repo root to path (src.*)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import db
+
+SOURCE_SCHEMA = "nbuild_larouchepac"
+ROLLUP_SCHEMA = os.getenv("ROLLUP_SCHEMA", "analytics")
+
+# Rollup column -> raw event table
+SOURCES = {
+    'sent': 'mailing_events_sent',
+    'opened': 'mailing_events_opened',
+    'clicked': 'mailing_events_clicked',
+}
+
+SCHEMA_SQL = f"""
+    CREATE SCHEMA IF NOT EXISTS {ROLLUP_SCHEMA};
+    CREATE TABLE IF NOT EXISTS {ROLLUP_SCHEMA}.engagement_monthly (
+        signup_id bigint NOT NULL,
+        month date NOT NULL,
+        broadcaster_id bigint,
+        sent integer NOT NULL DEFAULT 0,
+        opened integer NOT NULL DEFAULT 0,
+        clicked integer NOT NULL DEFAULT 0,
+        CONSTRAINT engagement_monthly_key UNIQUE NULLS NOT DISTINCT (signup_id, month, broadcaster_id)
+    );
+    CREATE INDEX IF NOT EXISTS engagement_monthly_month
+        ON {ROLLUP_SCHEMA}.engagement_monthly (month) INCLUDE (signup_id, broadcaster_id, sent, opened, clicked);
+    CREATE TABLE IF NOT EXISTS {ROLLUP_SCHEMA}.engagement_rollup_state (
+        source_table text PRIMARY KEY,
+        watermark timestamp NOT NULL,
+        updated_at timestamptz NOT NULL DEFAULT now()
+    );
+"""
+
+
+def _new_pairs_sql(table: str, incremental: bool) -> str:
+    """
+    (signup, mailing) pairs with events in ($1, $2], with the time and
+    broadcaster of the pair's first send; on an incremental run, pairs
+    that already had an event at or before the watermark ($1) were counted
+    before and are dropped with an anti-join
+    """
+    conditions = []
+    if incremental:
+        conditions.append(f"""NOT EXISTS (
+            SELECT 1 FROM {SOURCE_SCHEMA}.{table} seen
+            WHERE seen.mailing_id = pairs.mailing_id
+              AND seen.signup_id = pairs.signup_id
+              AND seen.created_at <= $1
+        )""")
+    if table == SOURCES['sent']:
+        where = f"WHERE {conditions[0]}" if conditions else ""
+        return f"""
+            SELECT * FROM (
+                SELECT signup_id, mailing_id, min(created_at) AS first_at, min(broadcaster_id) AS broadcaster_id
+                FROM {SOURCE_SCHEMA}.{table}
+                WHERE created_at > $1 AND created_at <= $2
+                GROUP BY signup_id, mailing_id
+            ) pairs
+            {where}
+        """
+    where = " AND ".join(["send.first_at IS NOT NULL"] + conditions)
+    return f"""
+        SELECT pairs.signup_id, pairs.mailing_id, send.first_at, send.broadcaster_id
+        FROM (
+            SELECT DISTINCT signup_id, mailing_id
+            FROM {SOURCE_SCHEMA}.{table}
+            WHERE created_at > $1 AND created_at <= $2
+        ) pairs
+        CROSS JOIN LATERAL (
+            SELECT min(created_at) AS first_at, min(broadcaster_id) AS broadcaster_id
+            FROM {SOURCE_SCHEMA}.{SOURCES['sent']} sent
+            WHERE sent.mailing_id = pairs.mailing_id
+              AND sent.signup_id = pairs.signup_id
+        ) send
+        WHERE {where}
+    """
+
+
+def _merge_sql(column: str, table: str, incremental: bool) -> str:
+    return f"""
+        INSERT INTO {ROLLUP_SCHEMA}.engagement_monthly AS rollup (signup_id, month, broadcaster_id, {column})
+        SELECT signup_id, date_trunc('month', first_at)::date, broadcaster_id, count(*)
+        FROM ({_new_pairs_sql(table, incremental)}) new_pairs
+        GROUP BY 1, 2, 3
+        ON CONFLICT ON CONSTRAINT engagement_monthly_key
+        DO UPDATE SET {column} = rollup.{column} + EXCLUDED.{column}
+    """
+
+
+async def ensure_schema(conn):
+    await conn.execute(SCHEMA_SQL)
+
+
+async def rebuild(conn):
+    """Empty the rollup and its watermarks (the next update re-reads everything)"""
+    await ensure_schema(conn)
+    async with conn.transaction():
+        await conn.execute(f"TRUNCATE {ROLLUP_SCHEMA}.engagement_monthly")
+        await conn.execute(f"DELETE FROM {ROLLUP_SCHEMA}.engagement_rollup_state")
+
+
+async def update_rollup(conn) -> List[Dict[str, Any]]:
+    """
+    Fold events newer than each table's watermark into the rollup; each
+    table's merge and watermark move commit together
+
+    Returns per-table: column, previous and new watermark, rollup rows
+    touched, seconds
+    """
+    await ensure_schema(conn)
+    results = []
+    for column, table in SOURCES.items():
+        start = time.perf_counter()
+        async with conn.transaction():
+            watermark = await conn.fetchval(
+                f"SELECT watermark FROM {ROLLUP_SCHEMA}.engagement_rollup_state WHERE source_table = $1",
+                table
+            )
+            high_mark = await conn.fetchval(f"SELECT max(created_at) FROM {SOURCE_SCHEMA}.{table}")
+            touched = 0
+            new_watermark = watermark
+            if high_mark is not None and (watermark is None or high_mark > watermark):
+                incremental = watermark is not None
+                status = await conn.execute(_merge_sql(column, table, incremental),
+                                            watermark if incremental else datetime.min, high_mark)
+                touched = int(status.split()[-1])
+                new_watermark = high_mark
+                await conn.execute(f"""
+                    INSERT INTO {ROLLUP_SCHEMA}.engagement_rollup_state (source_table, watermark)
+                    VALUES ($1, $2)
+                    ON CONFLICT (source_table) DO UPDATE SET watermark = EXCLUDED.watermark, updated_at = now()
+                """, table, high_mark)
+        results.append({
+            'column': column,
+            'table': table,
+            'previous_watermark': watermark,
+            'watermark': new_watermark,
+            'rows_touched': touched,
+            'seconds': round(time.perf_counter() - start, 3),
+        })
+    return results
+
+
+def open_frequency_sql(excluded_broadcaster: bool = True) -> str:
+    """
+    Per-signup sent/opened/clicked totals for mailings first sent from $1's
+    month on; with excluded_broadcaster, $2 is a broadcaster_id to leave
+    out (rows with no broadcaster are left out too, as in
+    email_open_frequency_v2.py). Unlike that script's counts, the cutoff
+    is rounded down to its month and machine opens are included.
+    """
+    broadcaster_filter = "AND broadcaster_id <> $2" if excluded_broadcaster else ""
+    return f"""
+        SELECT signup_id,
+               sum(sent)::integer AS sent_count,
+               sum(opened)::integer AS opened_count,
+               sum(clicked)::integer AS clicked_count,
+               sum(opened)::float8 / sum(sent) AS open_frequency
+        FROM {ROLLUP_SCHEMA}.engagement_monthly
+        WHERE month >= date_trunc('month', $1::timestamp)::date {broadcaster_filter}
+        GROUP BY signup_id
+        HAVING sum(sent) > 0
+        ORDER BY open_frequency DESC, signup_id
+    """
+
+
+async def fetch_open_frequencies(conn, since: datetime, excluded_broadcaster_id: Optional[int] = None):
+    if excluded_broadcaster_id is None:
+        return await conn.fetch(open_frequency_sql(False), since)
+    return await conn.fetch(open_frequency_sql(True), since, excluded_broadcaster_id)
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rebuild', action='store_true', help="Drop the rollup contents and rebuild from scratch")
+    parser.add_argument('--since', type=lambda s: datetime.strptime(s, '%Y-%m-%d'),
+                        help="With --export: count engagement from this date's month on")
+    parser.add_argument('--exclude-broadcaster', type=int, default=None,
+                        help="With --export: leave out this broadcaster_id (e.g. 1062)")
+    parser.add_argument('--export', help="Write per-signup open frequency from the rollup to this CSV")
+    args = parser.parse_args(argv)
+
+    conn = await db.connect()
+    try:
+        if args.rebuild:
+            await rebuild(conn)
+            print(f"Cleared {ROLLUP_SCHEMA}.engagement_monthly")
+
+        for result in await update_rollup(conn):
+            print(f"{result['table']}: {result['rows_touched']} rollup rows updated in {result['seconds']}s "
+                  f"(watermark {result['previous_watermark']} -> {result['watermark']})")
+
+        if args.export:
+            rows = await fetch_open_frequencies(conn, args.since or datetime(1970, 1, 1),
+                                                args.exclude_broadcaster)
+            with open(args.export, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(["signup_id", "sent_count", "opened_count", "clicked_count", "open_frequency"])
+                writer.writerows(rows)
+            print(f"Exported {len(rows)} signups to {args.export}")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
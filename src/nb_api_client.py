@@ -7,13 +7,14 @@ Enhanced with proper OAuth 2.0 refresh token flow for production use
 import requests
 import json
 import time
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 from datetime import datetime, timedelta
 import logging
 import os
+import threading
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# No logging.basicConfig here: importing the client shouldn't configure
+# (or slow down) the caller's logging - the entry point sets handlers up
 logger = logging.getLogger(__name__)
 
 
@@ -22,6 +23,92 @@ class NationBuilderAPIError(Exception):
     pass
 
 
+class CircuitOpenError(NationBuilderAPIError):
+    """Raised without sending a request while the circuit breaker is open"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Fails requests fast once the API looks down
+    
+    failure_threshold consecutive failures (5xx, 401/403 and any requests
+    exception: timeouts, connection errors, broken chunked responses...)
+    open the circuit; requests then raise CircuitOpenError without being
+    sent. After reset_timeout seconds one probe request is let through
+    (half-open): success closes the circuit, failure opens it again. 429s
+    count neither way, nor do 401s answered by a token refresh (the retry
+    is what counts) or exceptions from outside requests.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    @property
+    def is_open(self) -> bool:
+        return self.state == 'open'
+    
+    def before_request(self):
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            if self.state == 'closed':
+                return
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+            if self.state == 'half_open' and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            raise CircuitOpenError(f"Circuit open after {self.consecutive_failures} consecutive failures "
+                                   f"(next probe in {retry_in:.0f}s)")
+    
+    def reset(self):
+        """Close the circuit and forget past failures (e.g. at the start of a new run)"""
+        with self._lock:
+            self.state = 'closed'
+            self.consecutive_failures = 0
+            self._opened_at = 0.0
+            self._probe_in_flight = False
+    
+    def discard_result(self):
+        """Finish a sent request without counting it (e.g. a 401 about to be retried)"""
+        with self._lock:
+            self._probe_in_flight = False
+    
+    def record_result(self, status_code: Optional[int], error: Optional[Exception] = None):
+        """Update the state from one sent request's outcome"""
+        if error is not None:
+            failed = isinstance(error, requests.RequestException)
+        else:
+            failed = status_code is not None and (status_code >= 500 or status_code in (401, 403))
+        with self._lock:
+            self._probe_in_flight = False
+            if error is None and status_code == 429:
+                return
+            if error is not None and not failed:
+                # Not an answer from the API either way
+                return
+            if not failed:
+                self.consecutive_failures = 0
+                self.state = 'closed'
+                return
+            self.consecutive_failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and
+                                             self.consecutive_failures >= self.failure_threshold):
+                if self.state == 'closed':
+                    logger.warning(f"Circuit breaker opened after {self.consecutive_failures} consecutive failures")
+                self.state = 'open'
+                self.times_opened += 1
+                self._opened_at = time.monotonic()
+
+
 class NationBuilderClient:
     """
     NationBuilder API v2 Client
@@ -31,23 +118,70 @@ class NationBuilderClient:
     """
     
     def __init__(self, nation_slug: str, access_token: str, refresh_token: str = None, 
-                 client_id: str = None, client_secret: str = None):
+                 client_id: str = None, client_secret: str = None,
+                 reference_cache_ttl: float = 3600, base_url: str = None,
+                 oauth_url: str = None, transport: requests.adapters.BaseAdapter = None,
+                 concurrency_limiter=None, request_timeout: float = None,
+                 circuit_breaker: CircuitBreaker = None):
         self.nation_slug = nation_slug
         self.access_token = access_token
         self.refresh_token = refresh_token
         self.client_id = client_id
         self.client_secret = client_secret
-        self.base_url = f"https://{nation_slug}.nationbuilder.com/api/v2"
-        self.oauth_url = f"https://{nation_slug}.nationbuilder.com/oauth/token"
+        # base_url/oauth_url override the nation's hosts, e.g. to point at
+        # benchmarks/mock_nb_server.py
+        self.base_url = (base_url or f"https://{nation_slug}.nationbuilder.com/api/v2").rstrip('/')
+        self.oauth_url = oauth_url or f"https://{nation_slug}.nationbuilder.com/oauth/token"
         
-        # Track token refresh attempts to prevent infinite loops
-        self._refresh_attempts = 0
+        # Token refreshes (or retries on a token another thread refreshed)
+        # allowed per request, to prevent infinite loops
         self._max_refresh_attempts = 2
+        # Serialize refreshes when requests run on several threads; the
+        # refresh token rotates, so only one thread may spend it
+        self._refresh_lock = threading.Lock()
+        
+        # time.time() of the last request that got a non-error response
+        self.last_success_at: Optional[float] = None
+        
+        # Optional nb_concurrency.AIMDConcurrencyLimiter gating how many API
+        # requests are in flight across threads
+        self.concurrency_limiter = concurrency_limiter
+        # Seconds before a request times out (None: wait indefinitely)
+        self.request_timeout = request_timeout
+        # Stops sending requests while the API keeps failing
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        
+        # Called with a dict describing each HTTP request (see _send)
+        self.request_hooks: List[Callable[[Dict[str, Any]], None]] = []
+        
+        # List slugs already seen per prefix lookup, so repeated slug checks
+        # within a run don't go back to the API
+        self._list_slug_cache: Dict[str, set] = {}
+        
+        # Reference data (paths, path steps, tags) rarely changes; keep it for
+        # reference_cache_ttl seconds so repeated lookups don't refetch it
+        self.reference_cache_ttl = reference_cache_ttl
+        self._reference_cache: Dict[tuple, tuple] = {}
         
         # Initialize session
         self.session = requests.Session()
         self._update_session_headers()
         
+        # Optional requests adapter for API and OAuth calls (e.g. the
+        # cassette recorder/replayer in nb_cassette)
+        self.transport: Optional[requests.adapters.BaseAdapter] = None
+        if transport is not None:
+            self.mount_transport(transport)
+        
+    def mount_transport(self, adapter: requests.adapters.BaseAdapter):
+        """Send all API and OAuth requests through adapter"""
+        from urllib.parse import urlsplit
+        
+        for url in (self.base_url, self.oauth_url):
+            parts = urlsplit(url)
+            self.session.mount(f"{parts.scheme}://{parts.netloc}", adapter)
+        self.transport = adapter
+        
     def _update_session_headers(self):
         """Update session headers with current access token"""
         self.session.headers.update({
@@ -76,14 +210,17 @@ class NationBuilderClient:
             'client_secret': self.client_secret
         }
         
-        # Make refresh request (don't use self.session to avoid auth headers)
+        # Sent through the session (connection reuse, mounted adapters) but
+        # without its bearer token: None drops the session's Authorization
         refresh_headers = {
             'Content-Type': 'application/x-www-form-urlencoded',
-            'Accept': 'application/json'
+            'Accept': 'application/json',
+            'Authorization': None
         }
         
         try:
-            response = requests.post(self.oauth_url, data=refresh_data, headers=refresh_headers)
+            response = self.session.post(self.oauth_url, data=refresh_data, headers=refresh_headers,
+                                         timeout=self.request_timeout)
             
             if response.status_code == 200:
                 token_data = response.json()
@@ -159,38 +296,130 @@ class NationBuilderClient:
             logger.debug(f"Could not update .env file: {e}")
             # This is non-critical, so we don't raise an exception
     
+    def _cached_reference(self, key: tuple, loader) -> Dict[str, Any]:
+        """Return cached reference data for key, calling loader() when missing or expired"""
+        cached = self._reference_cache.get(key)
+        if cached and time.time() - cached[0] < self.reference_cache_ttl:
+            return cached[1]
+        data = loader()
+        self._reference_cache[key] = (time.time(), data)
+        return data
+    
+    def clear_reference_cache(self):
+        """Drop cached paths, path steps and tags"""
+        self._reference_cache.clear()
+    
+    def reset_run_state(self):
+        """
+        Forget what only holds for one run, e.g. before reusing the client:
+        cached list slugs and the circuit breaker's state. Reference data
+        keeps its TTL.
+        """
+        self._list_slug_cache.clear()
+        self.circuit_breaker.reset()
+    
+    def add_request_hook(self, hook: Callable[[Dict[str, Any]], None]):
+        """
+        Register a callable that receives one dict per HTTP request:
+        method, url, path (relative to base_url), status_code (None if the
+        request raised), elapsed (seconds), bytes_sent, bytes_received, error
+        """
+        self.request_hooks.append(hook)
+    
+    def remove_request_hook(self, hook: Callable[[Dict[str, Any]], None]):
+        """Unregister a hook added with add_request_hook (no-op if absent)"""
+        if hook in self.request_hooks:
+            self.request_hooks.remove(hook)
+    
+    def _send(self, method: str, url: str, defer_unauthorized: bool = False, **kwargs) -> requests.Response:
+        """
+        Send one HTTP request on the session, reporting it to the request hooks
+
+        With defer_unauthorized a 401 isn't counted by the circuit breaker:
+        the caller refreshes the token and retries, and the retry counts.
+        """
+        if self.request_timeout is not None:
+            kwargs.setdefault('timeout', self.request_timeout)
+        self.circuit_breaker.before_request()
+        limiter = self.concurrency_limiter
+        token = limiter.acquire() if limiter is not None else None
+        start = time.perf_counter()
+        response = None
+        error = None
+        try:
+            response = self.session.request(method, url, **kwargs)
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            status_code = response.status_code if response is not None else None
+            if defer_unauthorized and status_code == 401:
+                self.circuit_breaker.discard_result()
+            else:
+                self.circuit_breaker.record_result(status_code, error)
+            if limiter is not None:
+                limiter.release(token, status_code, error)
+            if self.request_hooks:
+                self._run_request_hooks(method, url, response, error, time.perf_counter() - start)
+    
+    def _run_request_hooks(self, method: str, url: str, response: Optional[requests.Response],
+                           error: Optional[Exception], elapsed: float):
+        body = getattr(getattr(response, 'request', None), 'body', None)
+        event = {
+            'method': method,
+            'url': url,
+            'path': url[len(self.base_url):].split('?')[0] if url.startswith(self.base_url) else url,
+            'status_code': response.status_code if response is not None else None,
+            'elapsed': elapsed,
+            'bytes_sent': len(body) if body else 0,
+            'bytes_received': len(response.content or b'') if response is not None else 0,
+            'error': type(error).__name__ if error is not None else None
+        }
+        for hook in list(self.request_hooks):
+            try:
+                hook(event)
+            except Exception as e:
+                # Metrics must never break a request
+                logger.debug(f"Request hook failed: {e}")
+    
     def _make_request(self, method: str, url: str, **kwargs) -> requests.Response:
         """
         Make an HTTP request with automatic token refresh on 401 errors
         This is the key method that handles token expiration transparently
         """
-        # Reset refresh attempts counter for new requests
-        if self._refresh_attempts >= self._max_refresh_attempts:
-            self._refresh_attempts = 0
-        
-        # Make the initial request
-        response = self.session.request(method, url, **kwargs)
-        
-        # Handle 401 (Unauthorized) - likely expired token
-        if response.status_code == 401 and self._refresh_attempts < self._max_refresh_attempts:
-            logger.info(" Got 401 Unauthorized, attempting token refresh...")
-            self._refresh_attempts += 1
+        refresh_attempts = 0
+        while True:
+            sent_token = self.access_token
+            can_refresh = refresh_attempts < self._max_refresh_attempts
+            # CircuitOpenError propagates: the caller defers the work
+            response = self._send(method, url, defer_unauthorized=can_refresh, **kwargs)
+            
+            # Handle 401 (Unauthorized) - likely expired token
+            if response.status_code != 401 or not can_refresh:
+                break
+            refresh_attempts += 1
             
             try:
-                # Try to refresh the token
-                self.refresh_access_token()
-                
-                # Retry the original request with the new token
-                logger.debug(" Retrying original request with refreshed token...")
-                response = self.session.request(method, url, **kwargs)
-                
-                if response.status_code != 401:
-                    logger.info(" Request successful after token refresh")
-                    self._refresh_attempts = 0  # Reset counter on success
-                    
+                # Refresh the token, unless another thread already did while
+                # this request was in flight - then just retry on its token
+                with self._refresh_lock:
+                    if self.access_token == sent_token:
+                        logger.info(" Got 401 Unauthorized, attempting token refresh...")
+                        self.refresh_access_token()
             except NationBuilderAPIError as e:
                 logger.error(f" Token refresh failed: {e}")
-                # Don't retry further, let the 401 response be handled downstream
+                # The deferred 401 stands; let it be handled downstream
+                self.circuit_breaker.record_result(response.status_code)
+                break
+            
+            logger.debug(" Retrying original request with refreshed token...")
+        
+        if refresh_attempts and response.status_code != 401:
+            logger.info(" Request successful after token refresh")
+        
+        if response.status_code < 400:
+            self.last_success_at = time.time()
         
         return response
     
@@ -271,7 +500,7 @@ class NationBuilderClient:
     
     def get_signup_tags(self, filters: Dict[str, Any] = None, 
                        page_size: int = 100) -> Dict[str, Any]:
-        """Get signup tags with optional filtering"""
+        """Get signup tags with optional filtering (cached, see reference_cache_ttl)"""
         url = f"{self.base_url}/signup_tags"
         params = {'page[size]': min(page_size, 100)}
         
@@ -279,15 +508,21 @@ class NationBuilderClient:
             for key, value in filters.items():
                 params[f'filter[{key}]'] = value
                 
-        response = self._make_request('GET', url, params=params)
-        return self._handle_response(response)
+        return self._cached_reference(
+            ('signup_tags', tuple(sorted(params.items()))),
+            lambda: self._handle_response(self._make_request('GET', url, params=params))
+        )
     
     def get_signup_taggings(self, filters: Dict[str, Any] = None,
                            include: List[str] = None,
-                           page_size: int = 100) -> Dict[str, Any]:
+                           page_size: int = 100,
+                           page_number: int = 1) -> Dict[str, Any]:
         """Get signup taggings (relationships between signups and tags)"""
         url = f"{self.base_url}/signup_taggings"
-        params = {'page[size]': min(page_size, 100)}
+        params = {
+            'page[size]': min(page_size, 100),
+            'page[number]': page_number
+        }
         
         if filters:
             for key, value in filters.items():
@@ -319,17 +554,21 @@ class NationBuilderClient:
         return self._handle_response(response)
     
     def get_paths(self) -> Dict[str, Any]:
-        """Get all paths in the nation"""
+        """Get all paths in the nation (cached, see reference_cache_ttl)"""
         url = f"{self.base_url}/paths"
-        response = self._make_request('GET', url)
-        return self._handle_response(response)
+        return self._cached_reference(
+            ('paths',),
+            lambda: self._handle_response(self._make_request('GET', url))
+        )
     
     def get_path_steps(self, path_id: str) -> Dict[str, Any]:
-        """Get steps for a specific path"""
+        """Get steps for a specific path (cached, see reference_cache_ttl)"""
         url = f"{self.base_url}/path_steps"
         params = {'filter[path_id]': path_id}
-        response = self._make_request('GET', url, params=params)
-        return self._handle_response(response)
+        return self._cached_reference(
+            ('path_steps', str(path_id)),
+            lambda: self._handle_response(self._make_request('GET', url, params=params))
+        )
     
     def add_signup_to_path_step(self, signup_id: str, path_step_id: str) -> Dict[str, Any]:
         """Add a signup to a path step"""
@@ -414,6 +653,55 @@ class NationBuilderClient:
 
 
 
+    def get_lists(self, filters: Dict[str, Any] = None,
+                  page_size: int = 100) -> Dict[str, Any]:
+        """
+        Get lists with optional filtering
+        
+        Args:
+            filters: Dictionary of filters, simple ({'slug': 'x'}) or with an
+                     operator ({'slug': {'prefix': '_250813i_c_'}})
+            page_size: Number of results per page (max 100)
+        """
+        url = f"{self.base_url}/lists"
+        params = {'page[size]': min(page_size, 100)}
+        
+        if filters:
+            for key, value in filters.items():
+                if isinstance(value, dict):
+                    for operator, filter_value in value.items():
+                        params[f'filter[{key}][{operator}]'] = filter_value
+                else:
+                    params[f'filter[{key}]'] = value
+        
+        response = self._make_request('GET', url, params=params)
+        return self._handle_response(response)
+
+    def get_list_slugs_with_prefix(self, prefix: str) -> set:
+        """
+        Return the slugs of all lists whose slug starts with prefix.
+        
+        Follows the response's links.next through every page (100 lists per
+        page). One lookup per prefix per client; later calls (and lists
+        created through this client) are served from the cache.
+        """
+        if prefix not in self._list_slug_cache:
+            from urllib.parse import urljoin
+            
+            slugs = set()
+            data = self.get_lists(filters={'slug': {'prefix': prefix}})
+            while True:
+                lists = data.get('data', [])
+                slugs.update(lst.get('attributes', {}).get('slug') for lst in lists)
+                next_url = (data.get('links') or {}).get('next')
+                if not next_url or not lists:
+                    break
+                # links.next may be relative to the nation's host
+                response = self._make_request('GET', urljoin(self.base_url, next_url))
+                data = self._handle_response(response)
+            self._list_slug_cache[prefix] = slugs
+        return self._list_slug_cache[prefix]
+
     def list_exists(self, slug: str) -> Optional[Dict[str, Any]]:
         """Check if a list with the given slug exists. Returns list dict if found, else None."""
         url = f"{self.base_url}/lists"
@@ -444,7 +732,14 @@ class NationBuilderClient:
             }
         }
         response = self._make_request('POST', url, json=data)
-        return self._handle_response(response)
+        result = self._handle_response(response)
+        
+        # Keep cached prefix lookups in step with the list we just made
+        for prefix, slugs in self._list_slug_cache.items():
+            if slug.startswith(prefix):
+                slugs.add(slug)
+        
+        return result
 
     # def add_people_to_list(self, list_id: str, signup_ids: List[str]) -> Dict[str, Any]:
     #     """Add multiple people to a list by list ID and signup IDs."""
@@ -483,22 +778,124 @@ class NationBuilderClient:
     #     logger.info(f"   ⬅️ Response text: {response.text}")
     #     return self._handle_response(response)
     
-    def add_people_to_list(self, list_id: str, signup_ids: List[str]) -> Dict[str, Any]:
-        """Add multiple people to a list by list ID and signup IDs using the async endpoint."""
+    def add_people_to_list(self, list_id: str, signup_ids: List[str],
+                           max_payload_bytes: int = 50_000, max_chunk_size: int = 1000,
+                           max_workers: int = 4, max_retries: int = 2) -> Dict[str, Any]:
+        """
+        Add multiple people to a list by list ID and signup IDs using the async endpoint.
+        
+        Large ID sets are split into chunks that keep each PATCH body under
+        max_payload_bytes, sent concurrently. A chunk that hits a 429, 5xx or
+        network error is retried on its own (up to max_retries times) without
+        resending the others; other failures aren't retried.
+        
+        Returns a summary: chunk counts, signups added, and the signup IDs of
+        any chunks that still failed after retries.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        
+        chunks = self._chunk_signup_ids(list_id, signup_ids, max_payload_bytes, max_chunk_size)
+        logger.info(f"    Adding {len(signup_ids)} signups to list {list_id} in {len(chunks)} chunk(s)")
+        
+        chunk_results = []
+        if chunks:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as executor:
+                futures = [
+                    executor.submit(self._add_chunk_to_list, list_id, chunk, index, len(chunks), max_retries)
+                    for index, chunk in enumerate(chunks, start=1)
+                ]
+                for future in as_completed(futures):
+                    chunk_results.append(future.result())
+        chunk_results.sort(key=lambda r: r['chunk'])
+        
+        failed_signup_ids = [
+            signup_id
+            for r in chunk_results if not r['success']
+            for signup_id in r['signup_ids']
+        ]
+        chunks_failed = sum(1 for r in chunk_results if not r['success'])
+        if chunks_failed:
+            logger.warning(f"    {chunks_failed}/{len(chunks)} chunk(s) failed for list {list_id} "
+                           f"({len(failed_signup_ids)} signups not added)")
+        
+        return {
+            'list_id': list_id,
+            'chunks_total': len(chunks),
+            'chunks_succeeded': len(chunks) - chunks_failed,
+            'chunks_failed': chunks_failed,
+            'signups_added': len(signup_ids) - len(failed_signup_ids),
+            'failed_signup_ids': failed_signup_ids,
+            'chunks': [{k: v for k, v in r.items() if k != 'signup_ids'} for r in chunk_results]
+        }
+
+    @staticmethod
+    def _chunk_signup_ids(list_id: str, signup_ids: List[str], max_payload_bytes: int,
+                          max_chunk_size: int) -> List[List[str]]:
+        """Split signup IDs into chunks whose add_signups payload fits in max_payload_bytes"""
+        envelope_bytes = len(json.dumps(
+            {"data": {"id": list_id, "type": "lists", "signup_ids": []}}
+        ))
+        chunks = []
+        chunk = []
+        chunk_bytes = envelope_bytes
+        for signup_id in signup_ids:
+            # Quoted/encoded ID plus the ", " separator json.dumps puts between items
+            id_bytes = len(json.dumps(signup_id)) + 2
+            if chunk and (chunk_bytes + id_bytes > max_payload_bytes or len(chunk) >= max_chunk_size):
+                chunks.append(chunk)
+                chunk = []
+                chunk_bytes = envelope_bytes
+            chunk.append(signup_id)
+            chunk_bytes += id_bytes
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _add_chunk_to_list(self, list_id: str, chunk: List[str], index: int,
+                           total_chunks: int, max_retries: int) -> Dict[str, Any]:
+        """Send one add_signups chunk, retrying just this chunk on failure"""
         url = f"{self.base_url}/lists/{list_id}/add_signups"
         data = {
             "data": {
                 "id": list_id,
                 "type": "lists",
-                "signup_ids": signup_ids
+                "signup_ids": chunk
             }
         }
-        logger.info(f"    PATCH {url}")
-        logger.info(f"    Payload: {json.dumps(data)}")
-        response = self._make_request('PATCH', url, json=data)
-        logger.info(f"    Response status: {response.status_code}")
-        logger.info(f"    Response text: {response.text}")
-        return self._handle_response(response)
+        
+        attempts = 0
+        last_error = None
+        while attempts <= max_retries:
+            attempts += 1
+            status_code = None
+            try:
+                response = self._make_request('PATCH', url, json=data)
+                status_code = response.status_code
+                logger.debug(f"    PATCH {url} chunk {index}/{total_chunks} -> {response.status_code}")
+                # The async endpoint may accept with an empty body
+                if response.status_code >= 400 or response.text:
+                    self._handle_response(response)
+                logger.info(f"    Chunk {index}/{total_chunks} added ({len(chunk)} signups, "
+                            f"attempt {attempts})")
+                return {'chunk': index, 'size': len(chunk), 'attempts': attempts,
+                        'success': True, 'error': None, 'signup_ids': chunk}
+            except (NationBuilderAPIError, requests.RequestException) as e:
+                last_error = str(e)
+                # Only throttling, server errors and network errors can pass on
+                # a retry; other 4xx (400, 413, 422), an open circuit or a
+                # failed token refresh fail the same way every time
+                retryable = (isinstance(e, requests.RequestException) or
+                             (status_code is not None and (status_code == 429 or status_code >= 500)))
+                if not retryable:
+                    logger.warning(f"    Chunk {index}/{total_chunks} failed (attempt {attempts}, "
+                                   f"not retrying): {e}")
+                    break
+                logger.warning(f"    Chunk {index}/{total_chunks} failed (attempt {attempts}): {e}")
+                if attempts <= max_retries:
+                    time.sleep(0.5 * 2 ** (attempts - 1))
+        
+        return {'chunk': index, 'size': len(chunk), 'attempts': attempts,
+                'success': False, 'error': last_error, 'signup_ids': chunk}
 
     def get_path_journey_for_signup(self, signup_id: str, path_id: str) -> Optional[Dict[str, Any]]:
         """Return the path journey for a signup and path, or None if not found."""
@@ -513,6 +910,32 @@ class NationBuilderClient:
         journeys = data.get('data', [])
         return journeys[0] if journeys else None
 
+    def get_path_journeys_for_signups(self, signup_ids: List[str], path_id: str,
+                                      batch_size: int = 100) -> Dict[str, Dict[str, Any]]:
+        """
+        Path journeys on path_id for many signups, by signup ID, fetching up
+        to batch_size signups per request (filter[signup_id]=1,2,3)
+        """
+        url = f"{self.base_url}/path_journeys"
+        journeys = {}
+        for start in range(0, len(signup_ids), batch_size):
+            batch = [str(signup_id) for signup_id in signup_ids[start:start + batch_size]]
+            page = 1
+            while True:
+                params = {
+                    'filter[signup_id]': ','.join(batch),
+                    'filter[path_id]': path_id,
+                    'page[size]': 100,
+                    'page[number]': page
+                }
+                data = self._handle_response(self._make_request('GET', url, params=params)).get('data', [])
+                for journey in data:
+                    journeys[str(journey['attributes'].get('signup_id'))] = journey
+                if len(data) < 100:
+                    break
+                page += 1
+        return journeys
+
     def update_path_journey_step(self, journey_id: str, step_id: str) -> Dict[str, Any]:
         """Update the current step of an existing path journey."""
         url = f"{self.base_url}/path_journeys/{journey_id}"
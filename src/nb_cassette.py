@@ -0,0 +1,251 @@
+# src/nb_cassette.py
+"""
+HTTP cassettes for NationBuilderClient: record real request/response pairs
+(with timing) once, replay them offline later
+
+Both classes are requests transport adapters, attached with
+NationBuilderClient(transport=...) or client.mount_transport(...).
+
+Cassettes are JSON (gzip-compressed when the path ends in .gz). Bearer
+tokens are never stored; OAuth request bodies and token values are
+redacted.
+"""
+
+import gzip
+import json
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_VERSION = 1
+
+# Response headers worth keeping (the client looks at these)
+KEPT_HEADERS = ('Content-Type', 'Retry-After')
+
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def _endpoint(method: str, path: str) -> str:
+    """GET /api/v2/lists/789/add_signups -> GET /api/v2/lists/{id}/add_signups"""
+    return f"{method.upper()} {_ID_SEGMENT.sub('/{id}', path)}"
+
+
+def _canonical_query(query: str) -> str:
+    return urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+
+def _canonical_body(body) -> Optional[str]:
+    if not body:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    try:
+        return json.dumps(json.loads(body), sort_keys=True, separators=(',', ':'))
+    except ValueError:
+        return body
+
+
+def _is_oauth(path: str) -> bool:
+    return path.rstrip('/').endswith('/oauth/token')
+
+
+def _redact_token_response(text: str) -> str:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return text
+    for key in ('access_token', 'refresh_token'):
+        if key in data:
+            data[key] = f"redacted-{key}"
+    return json.dumps(data)
+
+
+def load_cassette(path: str) -> Dict[str, Any]:
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_cassette(path: str, cassette: Dict[str, Any]):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        json.dump(cassette, f, separators=(',', ':'))
+
+
+class CassetteRecorder(BaseAdapter):
+    """
+    Pass requests through to `inner` (a real HTTPAdapter by default) and
+    record each interaction; call save() to write the cassette
+    """
+
+    def __init__(self, path: str, inner: BaseAdapter = None):
+        super().__init__()
+        self.path = path
+        self.inner = inner or HTTPAdapter()
+        self.interactions: List[Dict[str, Any]] = []
+        self.started_at = datetime.now()
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        offset = time.monotonic() - self._start
+        start = time.monotonic()
+        response = self.inner.send(request, **kwargs)
+        elapsed = time.monotonic() - start
+
+        oauth = _is_oauth(url.path)
+        text = response.text
+        interaction = {
+            'method': request.method.upper(),
+            'path': url.path,
+            'query': _canonical_query(url.query),
+            # Refresh requests carry the refresh token and client secret
+            'body': None if oauth else _canonical_body(request.body),
+            'status': response.status_code,
+            'headers': {k: response.headers[k] for k in KEPT_HEADERS if k in response.headers},
+            'response': _redact_token_response(text) if oauth else text,
+            'elapsed': round(elapsed, 6),
+            'offset': round(offset, 6),
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+        return response
+
+    def save(self) -> str:
+        with self._lock:
+            interactions = list(self.interactions)
+        save_cassette(self.path, {
+            'version': CASSETTE_VERSION,
+            'recorded_at': self.started_at.isoformat(timespec='seconds'),
+            'duration_seconds': round(time.monotonic() - self._start, 3),
+            'interactions': interactions,
+        })
+        return self.path
+
+    def close(self):
+        self.inner.close()
+
+
+class CassetteReplayer(BaseAdapter):
+    """
+    Answer requests from a recorded cassette, without any network
+
+    Requests are matched on method, path, query and body, in recorded
+    order. Requests whose query or body changed (e.g. a list slug with a
+    different date) fall back to the next unused interaction for the same
+    endpoint. Anything else gets a 404 and is counted in `unmatched`.
+
+    latency_scale: sleep each interaction's recorded latency times this
+    (1.0 = original timing, 0 = as fast as possible)
+    """
+
+    def __init__(self, cassette, latency_scale: float = 0.0):
+        super().__init__()
+        if isinstance(cassette, str):
+            cassette = load_cassette(cassette)
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+        self._exact: Dict[tuple, deque] = {}
+        self._by_endpoint: Dict[str, deque] = {}
+        for index, interaction in enumerate(cassette.get('interactions', [])):
+            self._exact.setdefault(self._key(interaction['method'], interaction['path'],
+                                             interaction['query'], interaction['body']), deque()).append(index)
+            self._by_endpoint.setdefault(_endpoint(interaction['method'], interaction['path']),
+                                         deque()).append(index)
+        self._used = set()
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+        self.fallback_matches = 0
+        self.unmatched: List[str] = []
+        self.replayed_latency = 0.0
+
+    @staticmethod
+    def _key(method: str, path: str, query: str, body: Optional[str]) -> tuple:
+        if _is_oauth(path):
+            return (method, path, '', None)
+        return (method, path, query, body)
+
+    def _next(self, queue: Optional[deque]) -> Optional[int]:
+        while queue:
+            index = queue.popleft()
+            if index not in self._used:
+                self._used.add(index)
+                return index
+        return None
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        method = request.method.upper()
+        key = self._key(method, url.path, _canonical_query(url.query), _canonical_body(request.body))
+        endpoint = _endpoint(method, url.path)
+
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            index = self._next(self._exact.get(key))
+            if index is None:
+                index = self._next(self._by_endpoint.get(endpoint))
+                if index is not None:
+                    self.fallback_matches += 1
+                else:
+                    self.unmatched.append(f"{method} {url.path}?{url.query}")
+
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+        if index is None:
+            response.status_code = 404
+            response.reason = 'Not In Cassette'
+            response._content = json.dumps({'errors': [{'title': 'Not in cassette'}]}).encode('utf-8')
+            response.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+            return response
+
+        interaction = self.cassette['interactions'][index]
+        if self.latency_scale:
+            time.sleep(interaction['elapsed'] * self.latency_scale)
+        with self._lock:
+            self.replayed_latency += interaction['elapsed']
+
+        response.status_code = interaction['status']
+        try:
+            response.reason = HTTPStatus(interaction['status']).phrase
+        except ValueError:
+            response.reason = ''
+        response._content = interaction['response'].encode('utf-8')
+        response.headers = CaseInsensitiveDict(interaction['headers'])
+        return response
+
+    def summary(self) -> Dict[str, Any]:
+        """Calls per endpoint in the replay vs the recording"""
+        recorded: Dict[str, int] = {}
+        for interaction in self.cassette.get('interactions', []):
+            endpoint = _endpoint(interaction['method'], interaction['path'])
+            recorded[endpoint] = recorded.get(endpoint, 0) + 1
+        with self._lock:
+            replayed = dict(self.calls)
+            return {
+                'recorded_calls': sum(recorded.values()),
+                'replayed_calls': sum(replayed.values()),
+                'recorded_seconds': self.cassette.get('duration_seconds'),
+                'recorded_latency_seconds': round(sum(i['elapsed'] for i in self.cassette.get('interactions', [])), 3),
+                'replayed_latency_seconds': round(self.replayed_latency, 3),
+                'fallback_matches': self.fallback_matches,
+                'unmatched': list(self.unmatched),
+                'endpoints': {
+                    endpoint: {'recorded': recorded.get(endpoint, 0), 'replayed': replayed.get(endpoint, 0)}
+                    for endpoint in sorted(set(recorded) | set(replayed))
+                },
+            }
+
+    def close(self):
+        pass
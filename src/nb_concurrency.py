@@ -0,0 +1,142 @@
+# src/nb_concurrency.py
+"""
+Adaptive (AIMD) limit on in-flight NationBuilder requests
+
+The limit grows by one every time a full window of requests (as many as
+the current limit) completes with healthy latency and few errors, and is
+cut multiplicatively on 429s, timeouts/connection errors, or a window
+p95 well above the baseline. Attach it with
+NationBuilderClient(concurrency_limiter=...); worker pools can then be
+sized for the ceiling and the limiter keeps the actual in-flight
+requests near what the API will take tonight.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+
+# Responses that mean "slow down" rather than "this request was bad"
+OVERLOAD_STATUS_CODES = (429, 503)
+
+
+def _p95(values: List[float]) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(0.95 * len(ordered))) - 1)]
+
+
+class AIMDConcurrencyLimiter:
+    """
+    initial_limit / min_limit / max_limit: in-flight requests
+    increase_step: added to the limit after each healthy window
+    decrease_factor: the limit is multiplied by this on overload
+    latency_tolerance: a window p95 above baseline p95 times this is overload
+    max_error_rate: windows with more 5xx than this don't grow the limit
+    """
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 32,
+                 increase_step: float = 1.0, decrease_factor: float = 0.5,
+                 latency_tolerance: float = 2.0, max_error_rate: float = 0.05):
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("Need 1 <= min_limit <= max_limit")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.max_error_rate = max_error_rate
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._window_latencies: List[float] = []
+        self._window_errors = 0
+        self._baseline_p95: Optional[float] = None
+        # Requests started before the last cut were sent at the old limit;
+        # their overload signals don't justify cutting again
+        self._last_decrease_at = float('-inf')
+
+        self.peak_in_flight = 0
+        self.increases = 0
+        self.decreases: Dict[str, int] = {}
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> float:
+        """Block until a slot is free; returns a token to pass to release()"""
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+            return time.monotonic()
+
+    def release(self, token: float, status_code: Optional[int] = None,
+                error: Optional[BaseException] = None):
+        """Free the slot taken by acquire() and adjust the limit from the outcome"""
+        elapsed = time.monotonic() - token
+        with self._condition:
+            self._in_flight -= 1
+            if status_code in OVERLOAD_STATUS_CODES:
+                self._decrease(token, 'throttled')
+            elif isinstance(error, (requests.Timeout, requests.ConnectionError)):
+                self._decrease(token, 'timeout')
+            elif error is None:
+                self._window_latencies.append(elapsed)
+                if status_code is not None and status_code >= 500:
+                    self._window_errors += 1
+                if len(self._window_latencies) >= self.limit:
+                    self._end_window(token)
+            self._condition.notify_all()
+
+    def _end_window(self, token: float):
+        p95 = _p95(self._window_latencies)
+        error_rate = self._window_errors / len(self._window_latencies)
+        self._window_latencies = []
+        self._window_errors = 0
+
+        if self._baseline_p95 is None:
+            self._baseline_p95 = p95
+        elif p95 > self._baseline_p95 * self.latency_tolerance:
+            self._decrease(token, 'latency')
+            return
+        else:
+            # Follow slow drift (e.g. the API getting busier overnight), but
+            # never faster than a tenth of the way per window
+            self._baseline_p95 = min(p95, 0.9 * self._baseline_p95 + 0.1 * p95)
+
+        if error_rate <= self.max_error_rate and self._limit < self.max_limit:
+            self._limit = min(self.max_limit, self._limit + self.increase_step)
+            self.increases += 1
+
+    def _decrease(self, token: float, reason: str):
+        if token < self._last_decrease_at:
+            return
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+        self._last_decrease_at = time.monotonic()
+        self._window_latencies = []
+        self._window_errors = 0
+        self.decreases[reason] = self.decreases.get(reason, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'in_flight': self._in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'baseline_p95_ms': round(self._baseline_p95 * 1000, 1) if self._baseline_p95 is not None else None,
+                'increases': self.increases,
+                'decreases': dict(self.decreases),
+            }
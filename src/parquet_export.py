@@ -0,0 +1,184 @@
+# src/parquet_export.py
+"""
+Export snapshot event tables to Parquet, partitioned by month
+
+Writes <out>/<table>/month=YYYY-MM/part-0.parquet for the mailing event
+tables and signup_taggings, with int32 IDs and microsecond timestamps,
+zstd-compressed and sorted by created_at. Analyses can then re-read the
+data (memory-mapped, only the columns and months they need) without a
+database.
+
+Each month is pulled with COPY (using the created_at index from
+check_indexes.py) into a temporary CSV that Arrow parses in C++, so no
+Python objects are built per row. Rows with no created_at are not
+exported. Re-export only recent months after a new snapshot with --since.
+
+Usage:
+    python src/parquet_export.py --out parquet
+    python src/parquet_export.py --out parquet --since 2025-06 --tables mailing_events_opened
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.fs as pa_fs
+import pyarrow.parquet as pq
+
+# Add the repo root to path (src.*)
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import db
+from src.event_exports import copy_query_to_csv
+
+SCHEMA = "nbuild_larouchepac"
+PARQUET_DIR = os.getenv("PARQUET_DIR", "parquet")
+COMPRESSION = "zstd"
+
+# NB IDs fit in int32; a cast that doesn't fails the export rather than wrapping
+EVENT_SCHEMA = pa.schema([
+    ('signup_id', pa.int32()),
+    ('mailing_id', pa.int32()),
+    ('created_at', pa.timestamp('us')),
+    ('broadcaster_id', pa.int32()),
+])
+
+TAGGING_SCHEMA = pa.schema([
+    ('id', pa.int32()),
+    ('tag_id', pa.int32()),
+    ('signup_id', pa.int32()),
+    ('created_at', pa.timestamp('us')),
+])
+
+EXPORT_TABLES = {
+    'mailing_events_sent': EVENT_SCHEMA,
+    'mailing_events_opened': EVENT_SCHEMA,
+    'mailing_events_clicked': EVENT_SCHEMA,
+    'mailing_events_machine_opened': EVENT_SCHEMA,
+    'mailing_events_bounced': EVENT_SCHEMA,
+    'signup_taggings': TAGGING_SCHEMA,
+}
+
+MONTH_PARTITIONING = ds.partitioning(pa.schema([('month', pa.string())]), flavor='hive')
+
+
+def _next_month(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def month_starts(first: datetime, last: datetime) -> List[datetime]:
+    """First day of every month from first's month to last's month"""
+    months = []
+    month = datetime(first.year, first.month, 1)
+    while month <= last:
+        months.append(month)
+        month = _next_month(month)
+    return months
+
+
+def month_path(root: str, table: str, month: datetime) -> str:
+    return os.path.join(root, table, f"month={month:%Y-%m}", "part-0.parquet")
+
+
+async def export_month(conn, table: str, month: datetime, root: str = PARQUET_DIR, schema: str = SCHEMA) -> int:
+    """Write one month of a table to its Parquet partition; returns the rows written"""
+    arrow_schema = EXPORT_TABLES[table]
+    path = month_path(root, table, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    csv_path = f"{path}.csv.tmp"
+    try:
+        rows = await copy_query_to_csv(conn, csv_path, f"""
+            SELECT {', '.join(arrow_schema.names)}
+            FROM {schema}.{table}
+            WHERE created_at >= $1 AND created_at < $2
+            ORDER BY created_at
+        """, month, _next_month(month))
+        if rows == 0:
+            if os.path.exists(path):
+                os.remove(path)
+            return 0
+        events = pa_csv.read_csv(csv_path, convert_options=pa_csv.ConvertOptions(
+            column_types=arrow_schema, timestamp_parsers=[pa_csv.ISO8601]
+        )).cast(arrow_schema)
+    finally:
+        if os.path.exists(csv_path):
+            os.remove(csv_path)
+
+    tmp_path = f"{path}.tmp"
+    pq.write_table(events, tmp_path, compression=COMPRESSION)
+    os.replace(tmp_path, path)
+    return rows
+
+
+async def export_table(conn, table: str, root: str = PARQUET_DIR, since: Optional[datetime] = None,
+                       schema: str = SCHEMA) -> Dict[str, Any]:
+    """
+    Export every month of a table (from since's month on, if given);
+    returns table, months, rows, megabytes on disk and seconds
+    """
+    start = time.perf_counter()
+    first, last = await conn.fetchrow(f"SELECT min(created_at), max(created_at) FROM {schema}.{table}")
+    months = month_starts(max(first, since) if since else first, last) if first else []
+
+    rows = 0
+    size = 0
+    for month in months:
+        month_rows = await export_month(conn, table, month, root, schema)
+        rows += month_rows
+        if month_rows:
+            size += os.path.getsize(month_path(root, table, month))
+    return {
+        'table': table,
+        'months': len(months),
+        'rows': rows,
+        'mb': round(size / 1024 / 1024, 1),
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+
+
+def dataset(table: str, root: str = PARQUET_DIR) -> ds.Dataset:
+    """An exported table as a memory-mapped Arrow dataset (with a month column from the partitions)"""
+    return ds.dataset(os.path.join(root, table), format='parquet', partitioning=MONTH_PARTITIONING,
+                      filesystem=pa_fs.LocalFileSystem(use_mmap=True))
+
+
+def read_table(table: str, root: str = PARQUET_DIR, columns: Optional[List[str]] = None,
+               since: Optional[datetime] = None) -> pa.Table:
+    """
+    Load an exported table, optionally only some columns and rows from
+    since on (whole months outside the range are never opened)
+    """
+    data = dataset(table, root)
+    row_filter = None
+    if since is not None:
+        row_filter = (ds.field('month') >= f"{since:%Y-%m}") & (ds.field('created_at') >= pa.scalar(since, pa.timestamp('us')))
+    return data.to_table(columns=columns or EXPORT_TABLES[table].names, filter=row_filter)
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', default=PARQUET_DIR, help="Output directory (default: PARQUET_DIR or ./parquet)")
+    parser.add_argument('--tables', nargs='+', choices=list(EXPORT_TABLES), default=list(EXPORT_TABLES))
+    parser.add_argument('--since', type=lambda s: datetime.strptime(s, '%Y-%m'),
+                        help="Only (re-)export months from YYYY-MM on")
+    args = parser.parse_args(argv)
+
+    conn = await db.connect()
+    try:
+        for table in args.tables:
+            result = await export_table(conn, table, args.out, args.since)
+            print(f"{table}: {result['rows']} rows in {result['months']} months, "
+                  f"{result['mb']} MB in {result['seconds']}s")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+# tests/nb_path_nightly/test_dead_letter_utils.py
+
+import pytest
+
+from nb_path_updates.nb_path_nightly.utils import dead_letter_utils
+
+
+@pytest.fixture(autouse=True)
+def isolated_state_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("NB_STATE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_failures_accumulate_attempts_per_signup():
+    dead_letter_utils.record_failure("clickers", "123", "NationBuilderAPIError", "API Error 500",
+                                     {'action': 'create', 'signup_id': '123'})
+    dead_letter_utils.record_failure("clickers", "456", "ReadTimeout", "timed out")
+    dead_letter_utils.record_failure("clickers", "123", "NationBuilderAPIError", "API Error 429")
+    
+    entries = dead_letter_utils.load_dead_letters("clickers")
+    
+    assert set(entries) == {"123", "456"}
+    assert entries["123"]['attempts'] == 2
+    assert entries["123"]['error'] == "API Error 429"
+    assert entries["123"]['first_failed_at'] <= entries["123"]['failed_at']
+    assert entries["456"]['attempts'] == 1
+    assert entries["456"]['error_class'] == "ReadTimeout"
+
+
+def test_resolve_drops_signups_and_ignores_truncated_lines(isolated_state_dir):
+    dead_letter_utils.record_failure("clickers", "123", "ReadTimeout", "timed out")
+    dead_letter_utils.record_failure("clickers", "456", "ReadTimeout", "timed out")
+    with open(isolated_state_dir / "clickers_dead_letters.jsonl", 'a', encoding='utf-8') as f:
+        f.write('{"signup_id": "78')
+    
+    dead_letter_utils.resolve("clickers", ["123"])
+    
+    assert set(dead_letter_utils.load_dead_letters("clickers")) == {"456"}
+    
+    dead_letter_utils.resolve("clickers", ["456"])
+    assert dead_letter_utils.load_dead_letters("clickers") == {}
+
+
+def test_max_attempts_from_env(monkeypatch):
+    assert dead_letter_utils.max_attempts() == dead_letter_utils.MAX_ATTEMPTS
+    monkeypatch.setenv("NB_DEAD_LETTER_MAX_ATTEMPTS", "2")
+    assert dead_letter_utils.max_attempts() == 2
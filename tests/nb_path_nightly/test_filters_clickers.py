@@ -3,7 +3,6 @@
 import sys
 import os
 import pytest
-import tempfile
 from unittest.mock import Mock, patch
 from datetime import datetime
 
@@ -16,6 +15,14 @@ from nb_path_updates.nb_path_nightly.filters import clickers
 from src.nb_api_client import NationBuilderAPIError
 
 
+@pytest.fixture(autouse=True)
+def isolated_state_dir(tmp_path, monkeypatch):
+    """Keep carried-over (pending) signups and exports out of the real outputs folder"""
+    monkeypatch.setenv("NB_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("NB_OUTPUT_DIR", str(tmp_path / "outputs"))
+    return tmp_path / "state"
+
+
 class DummyLogger:
     def __init__(self):
         self.messages = []
@@ -54,7 +61,7 @@ class DummyClient:
         self.journey_type = journey_type
         self.base_url = "https://test.nationbuilder.com/api/v2"
     
-    def get_signup_taggings(self, filters=None, page_size=100):
+    def get_signup_taggings(self, filters=None, page_size=100, page_number=1):
         """Return mock signup taggings"""
         if filters and filters.get('tag_id') == "14890":
             return {
@@ -83,6 +90,14 @@ class DummyClient:
         """Mock list existence check - always return None (doesn't exist)"""
         return None
     
+    def get_list_slugs_with_prefix(self, prefix):
+        """Mock prefix lookup - no lists exist yet"""
+        return set()
+    
+    def get_path_steps(self, path_id):
+        """Mock path steps - the target step only"""
+        return {'data': [{'id': '1380', 'type': 'path_steps', 'attributes': {'path_id': path_id, 'name': 'Clicked'}}]}
+    
     def create_list(self, slug, name, author_id):
         """Mock list creation"""
         return {
@@ -173,6 +188,14 @@ class DummyClient:
         else:
             return DummyResponse({'data': []})
     
+    def get_path_journeys_for_signups(self, signup_ids, path_id, batch_size=100):
+        """Mock batched journey lookup"""
+        journeys = {}
+        for signup_id in signup_ids:
+            for journey in self._get_mock_journey_response(signup_id).json().get('data', []):
+                journeys[signup_id] = journey
+        return journeys
+    
     def update_path_journey_step(self, journey_id, step_id):
         """Mock journey step update"""
         if self.journey_type == "error":
@@ -204,30 +227,48 @@ def test_find_signup_ids_with_tag_id():
     assert "456" in signup_ids
 
 
-def test_export_signup_ids_to_csv():
+def test_export_signup_ids_to_csv(tmp_path, monkeypatch):
     """Test CSV export functionality"""
     logger = DummyLogger()
+    monkeypatch.setenv("NB_OUTPUT_DIR", str(tmp_path))
+    
+    filepath = clickers.export_signup_ids_to_csv(["123", "456"], "14890", logger)
+    
+    assert filepath is not None
+    assert os.path.dirname(filepath) == str(tmp_path)
+    
+    # Read and verify CSV content
+    with open(filepath, 'r') as f:
+        content = f.read()
+        assert "123" in content
+        assert "456" in content
+        assert "14890" in content
+
+
+def test_resolve_list_slug_first_of_day():
+    """Test slug resolution when no list exists for today"""
+    client = DummyClient()
+    logger = DummyLogger()
     
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Temporarily change the output directory
-        original_dirname = clickers.__file__
-        clickers.__file__ = os.path.join(temp_dir, "clickers.py")
+    assert clickers.resolve_list_slug(client, "_250813i_c_", logger) == "_250813i_c_1"
+
+
+def test_resolve_list_slug_skips_taken_suffixes():
+    """Test slug resolution picks the next free suffix from one lookup"""
+    class TakenClient(DummyClient):
+        def __init__(self):
+            super().__init__()
+            self.lookups = 0
         
-        try:
-            filepath = clickers.export_signup_ids_to_csv(["123", "456"], "14890", logger)
-            
-            assert filepath is not None
-            assert os.path.exists(filepath)
-            
-            # Read and verify CSV content
-            with open(filepath, 'r') as f:
-                content = f.read()
-                assert "123" in content
-                assert "456" in content
-                assert "14890" in content
-                
-        finally:
-            clickers.__file__ = original_dirname
+        def get_list_slugs_with_prefix(self, prefix):
+            self.lookups += 1
+            return {f"{prefix}1", f"{prefix}2", f"{prefix}10"}
+    
+    client = TakenClient()
+    logger = DummyLogger()
+    
+    assert clickers.resolve_list_slug(client, "_250813i_c_", logger) == "_250813i_c_3"
+    assert client.lookups == 1
 
 
 def test_process_signup_path_journey_create():
@@ -393,7 +434,7 @@ def test_run_filter_no_admin_id():
 def test_run_filter_no_signups():
     """Test run_filter when no signups found"""
     class EmptyClient(DummyClient):
-        def get_signup_taggings(self, filters=None, page_size=100):
+        def get_signup_taggings(self, filters=None, page_size=100, page_number=1):
             return {'data': []}
     
     client = EmptyClient()
@@ -404,4 +445,296 @@ def test_run_filter_no_signups():
     assert result['people_count'] == 0
     assert result['csv_filename'] is None
     assert result['list_slug'] is None
-    assert result['list_id'] is None
\ No newline at end of file
+    assert result['list_id'] is None
+
+
+def test_find_signup_ids_most_recent_first():
+    """Test signup IDs come back newest tagging first, across pages"""
+    class PagedClient(DummyClient):
+        def get_signup_taggings(self, filters=None, page_size=100, page_number=1):
+            if page_number == 1:
+                return {'data': [
+                    {'attributes': {'signup_id': str(i), 'created_at': f"2025-08-13T00:{i % 60:02d}:00"}}
+                    for i in range(100)
+                ]}
+            if page_number == 2:
+                return {'data': [
+                    {'attributes': {'signup_id': '500', 'created_at': "2025-08-13T23:00:00"}}
+                ]}
+            return {'data': []}
+    
+    signup_ids = clickers.find_signup_ids_with_tag_id(PagedClient(), "14890", DummyLogger())
+    
+    assert len(signup_ids) == 101
+    assert signup_ids[0] == '500'
+
+
+class ExpiredDeadline:
+    unlimited = False
+    
+    def can_start(self, units=1):
+        return False
+    
+    def remaining(self):
+        return 0.0
+    
+    def record_unit(self, seconds):
+        pass
+
+
+class OneSignupDeadline(ExpiredDeadline):
+    def __init__(self):
+        self.units = 0
+    
+    def can_start(self, units=1):
+        return self.units < 1
+    
+    def record_unit(self, seconds):
+        self.units += 1
+
+
+def test_run_filter_deadline_defers_remaining(monkeypatch):
+    """Test that a low budget stops new writes and saves the remainder"""
+    monkeypatch.setenv("NB_ADMIN_SIGNUP_ID", "admin123")
+    
+    result = clickers.run_filter(DummyClient(), DummyLogger(), deadline=OneSignupDeadline())
+    
+    assert result['path_updates_successful'] == 1
+    assert result['path_updates_deferred'] == 1
+    assert len(clickers.scheduling_utils.load_pending(clickers.FILTER_KEY)) == 1
+
+
+def test_run_filter_expired_deadline_skips_writes(monkeypatch):
+    """Test that no list or journey writes start once the budget is gone"""
+    monkeypatch.setenv("NB_ADMIN_SIGNUP_ID", "admin123")
+    
+    class NoWriteClient(DummyClient):
+        def create_list(self, slug, name, author_id):
+            raise AssertionError("should not create a list past the deadline")
+    
+    result = clickers.run_filter(NoWriteClient(), DummyLogger(), deadline=ExpiredDeadline())
+    
+    assert result['path_updates_successful'] == 0
+    assert result['path_updates_deferred'] == 2
+    assert sorted(clickers.scheduling_utils.load_pending(clickers.FILTER_KEY)) == ['123', '456']
+
+
+def test_run_filter_picks_up_pending_signups(monkeypatch):
+    """Test that signups left by a previous run are processed and cleared"""
+    monkeypatch.setenv("NB_ADMIN_SIGNUP_ID", "admin123")
+    clickers.scheduling_utils.save_pending(clickers.FILTER_KEY, ['456', '777'])
+    
+    result = clickers.run_filter(DummyClient(), DummyLogger())
+    
+    assert result['people_count'] == 3
+    assert result['path_updates_successful'] == 3
+    assert clickers.scheduling_utils.load_pending(clickers.FILTER_KEY) == []
+
+
+def test_process_path_journeys_concurrently():
+    """Test that max_workers > 1 overlaps journeys and still counts every signup"""
+    import threading
+    import time
+    
+    class SlowClient(DummyClient):
+        def __init__(self):
+            super().__init__(journey_type="none")
+            self.lock = threading.Lock()
+            self.active = 0
+            self.peak = 0
+        
+        def create_path_journey(self, signup_id, path_id, step_id):
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(0.01)
+            with self.lock:
+                self.active -= 1
+            return super().create_path_journey(signup_id, path_id, step_id)
+    
+    client = SlowClient()
+    signup_ids = [str(i) for i in range(60)]
+    
+    successful, errors, deferred = clickers.process_path_journeys(
+        client, signup_ids, DummyLogger(), max_workers=4
+    )
+    
+    assert (successful, errors, deferred) == (60, 0, [])
+    assert 1 < client.peak <= 4
+    # The last checkpoint only holds signups after the finished prefix
+    assert len(clickers.scheduling_utils.load_pending(clickers.FILTER_KEY)) <= 60 - 50
+
+
+def test_run_filter_journey_workers_from_env(monkeypatch):
+    """Test that NB_JOURNEY_WORKERS sets the journey concurrency"""
+    monkeypatch.setenv("NB_ADMIN_SIGNUP_ID", "admin123")
+    monkeypatch.setenv("NB_JOURNEY_WORKERS", "3")
+    seen = {}
+    
+    def fake_process(client, signup_ids, logger, deadline=None, max_workers=1):
+        seen['max_workers'] = max_workers
+        return len(signup_ids), 0, []
+    
+    monkeypatch.setattr(clickers, 'process_path_journeys', fake_process)
+    
+    result = clickers.run_filter(DummyClient(), DummyLogger())
+    
+    assert seen['max_workers'] == 3
+    assert result['path_updates_successful'] == 2
+
+
+class FlakyClient(DummyClient):
+    """Creating a journey fails for the listed signups until they're retried `failures` times"""
+    
+    def __init__(self, failing_ids, failures=1):
+        super().__init__(journey_type="none")
+        self.remaining = {signup_id: failures for signup_id in failing_ids}
+        self.lookups = []
+    
+    def get_path_journeys_for_signups(self, signup_ids, path_id, batch_size=100):
+        self.lookups.append(list(signup_ids))
+        return super().get_path_journeys_for_signups(signup_ids, path_id, batch_size)
+    
+    def create_path_journey(self, signup_id, path_id, step_id):
+        if self.remaining.get(signup_id):
+            self.remaining[signup_id] -= 1
+            raise NationBuilderAPIError("API Error 503")
+        return super().create_path_journey(signup_id, path_id, step_id)
+
+
+def test_failed_journeys_are_dead_lettered_and_retried_in_bulk():
+    """Test that failures are recorded with their payload and recovered by one batched retry"""
+    client = FlakyClient({"2", "5"})
+    signup_ids = [str(i) for i in range(8)]
+    
+    successful, errors, deferred = clickers.process_path_journeys(client, signup_ids, DummyLogger())
+    entries = clickers.dead_letter_utils.load_dead_letters(clickers.FILTER_KEY)
+    
+    assert (successful, errors) == (6, 2)
+    assert set(entries) == {"2", "5"}
+    assert entries["2"]['error_class'] == "NationBuilderAPIError"
+    assert entries["2"]['payload']['action'] == "create"
+    
+    counts = clickers.retry_dead_letters(client, DummyLogger())
+    
+    assert counts == {'retried': 2, 'recovered': 2, 'failed': 0, 'exhausted': 0}
+    assert client.lookups == [["2", "5"]]
+    assert clickers.dead_letter_utils.load_dead_letters(clickers.FILTER_KEY) == {}
+
+
+def test_dead_letters_stop_retrying_after_max_attempts(monkeypatch):
+    """Test that a signup that keeps failing is left in the store once it hits the attempt limit"""
+    monkeypatch.setenv("NB_DEAD_LETTER_MAX_ATTEMPTS", "2")
+    client = FlakyClient({"1"}, failures=5)
+    
+    clickers.process_path_journeys(client, ["1"], DummyLogger())
+    first = clickers.retry_dead_letters(client, DummyLogger())
+    second = clickers.retry_dead_letters(client, DummyLogger())
+    
+    # Reported as exhausted by the retry that hit the limit, not by every run after it
+    assert first == {'retried': 1, 'recovered': 0, 'failed': 0, 'exhausted': 1}
+    assert second == {'retried': 0, 'recovered': 0, 'failed': 0, 'exhausted': 0}
+    assert clickers.dead_letter_utils.load_dead_letters(clickers.FILTER_KEY)["1"]['attempts'] == 2
+
+
+def test_dead_letters_from_this_run_wait_for_the_next(monkeypatch):
+    """Test that run_filter only retries failures recorded before it started"""
+    monkeypatch.setenv("NB_ADMIN_SIGNUP_ID", "admin123")
+    client = FlakyClient({"123"})
+    
+    result = clickers.run_filter(client, DummyLogger(), max_workers=1)
+    entries = clickers.dead_letter_utils.load_dead_letters(clickers.FILTER_KEY)
+    
+    assert result['path_updates_errors'] == 1
+    assert result['path_updates_recovered'] == 0
+    assert client.lookups == []
+    assert entries["123"]['attempts'] == 1
+
+
+
+def test_dead_letter_cleared_when_main_pass_succeeds(monkeypatch):
+    """Test that a signup dead-lettered by an earlier run and done tonight isn't retried or counted as recovered"""
+    monkeypatch.setenv("NB_ADMIN_SIGNUP_ID", "admin123")
+    clickers.dead_letter_utils.record_failure(clickers.FILTER_KEY, "123", "ReadTimeout", "timed out")
+    client = FlakyClient(set())
+    
+    result = clickers.run_filter(client, DummyLogger(), max_workers=1)
+    
+    assert result['path_updates_successful'] == 2
+    assert result['path_updates_recovered'] == 0
+    assert client.lookups == []
+    assert clickers.dead_letter_utils.load_dead_letters(clickers.FILTER_KEY) == {}
+
+def test_circuit_open_retry_is_not_an_attempt():
+    """Test that a retry refused by the open circuit breaker leaves the attempt count alone"""
+    from src.nb_api_client import CircuitOpenError
+    
+    class TrippingClient(DummyClient):
+        def __init__(self):
+            super().__init__(journey_type="none")
+        
+        def create_path_journey(self, signup_id, path_id, step_id):
+            raise CircuitOpenError("circuit open")
+    
+    clickers.dead_letter_utils.record_failure(clickers.FILTER_KEY, "7", "ReadTimeout", "timed out")
+    
+    counts = clickers.retry_dead_letters(TrippingClient(), DummyLogger())
+    
+    assert counts == {'retried': 0, 'recovered': 0, 'failed': 0, 'exhausted': 0}
+    assert clickers.dead_letter_utils.load_dead_letters(clickers.FILTER_KEY)["7"]['attempts'] == 1
+
+
+def test_run_filter_retries_previous_dead_letters(monkeypatch):
+    """Test that run_filter recovers failures left by an earlier run"""
+    monkeypatch.setenv("NB_ADMIN_SIGNUP_ID", "admin123")
+    clickers.dead_letter_utils.record_failure(clickers.FILTER_KEY, "999", "ReadTimeout", "timed out")
+    
+    result = clickers.run_filter(DummyClient(), DummyLogger())
+    
+    assert result['path_updates_recovered'] == 1
+    assert result['path_updates_dead_lettered'] == 0
+    assert clickers.dead_letter_utils.load_dead_letters(clickers.FILTER_KEY) == {}
+
+
+def test_open_circuit_stops_journeys_and_defers_the_rest(monkeypatch):
+    """Test that once the circuit breaker opens, the rest of the signups are saved for the next run"""
+    from src.nb_api_client import CircuitBreaker
+    
+    class DownClient(DummyClient):
+        def __init__(self):
+            super().__init__(journey_type="none")
+            self.circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+            self.writes = 0
+        
+        def create_path_journey(self, signup_id, path_id, step_id):
+            self.circuit_breaker.before_request()
+            self.writes += 1
+            self.circuit_breaker.record_result(503)
+            raise NationBuilderAPIError("API Error 503")
+    
+    monkeypatch.setenv("NB_ADMIN_SIGNUP_ID", "admin123")
+    monkeypatch.setattr(DownClient, 'get_signup_taggings', lambda self, filters=None, page_size=100, page_number=1: {
+        'data': [{'attributes': {'signup_id': str(i)}} for i in range(6)] if page_number == 1 else []
+    })
+    client = DownClient()
+    
+    result = clickers.run_filter(client, DummyLogger(), max_workers=1)
+    
+    assert client.writes == 2
+    assert result['path_updates_errors'] == 2
+    assert result['path_updates_deferred'] == 4
+    assert set(clickers.dead_letter_utils.load_dead_letters(clickers.FILTER_KEY)) == {"0", "1"}
+    assert clickers.scheduling_utils.load_pending(clickers.FILTER_KEY) == ["2", "3", "4", "5"]
+
+
+def test_describe_path_step():
+    """Test that the target step's name is looked up and a step missing from the path is logged"""
+    logger = DummyLogger()
+    assert clickers.describe_path_step(DummyClient(), logger) == 'Clicked'
+    
+    class OtherStepsClient(DummyClient):
+        def get_path_steps(self, path_id):
+            return {'data': [{'id': '1381', 'type': 'path_steps', 'attributes': {'name': 'Other'}}]}
+    
+    assert clickers.describe_path_step(OtherStepsClient(), logger) is None
+    assert logger.messages[-1].startswith("ERROR:") and '1380' in logger.messages[-1]
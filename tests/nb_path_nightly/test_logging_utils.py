@@ -0,0 +1,104 @@
+# tests/nb_path_nightly/test_logging_utils.py
+
+import logging
+import os
+
+from nb_path_updates.nb_path_nightly.utils import logging_utils
+
+
+def make_logger(name):
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    return logger
+
+
+def test_queue_logging_writes_file_after_stop(tmp_path):
+    log_filepath = str(tmp_path / "run.log")
+    logger = make_logger("test_queue_logging_writes_file")
+    handler = logging_utils.buffered_rotating_file_handler(
+        log_filepath, logging.Formatter('%(levelname)s - %(message)s')
+    )
+    
+    logging_utils.setup_queue_logging(logger, [handler])
+    for i in range(5):
+        logger.info(f"signup {i}")
+    logging_utils.stop_queue_logging()
+    
+    with open(log_filepath, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines == [f"INFO - signup {i}" for i in range(5)]
+
+
+def test_queue_logging_respects_handler_level(tmp_path):
+    log_filepath = str(tmp_path / "run.log")
+    logger = make_logger("test_queue_logging_level")
+    handler = logging_utils.buffered_rotating_file_handler(
+        log_filepath, logging.Formatter('%(message)s'), level=logging.WARNING
+    )
+    
+    logging_utils.setup_queue_logging(logger, [handler])
+    logger.info("quiet")
+    logger.warning("loud")
+    logging_utils.stop_queue_logging()
+    
+    with open(log_filepath, encoding='utf-8') as f:
+        assert f.read().splitlines() == ["loud"]
+
+
+def test_buffered_file_handler_rotates_by_size(tmp_path):
+    log_filepath = str(tmp_path / "run.log")
+    logger = make_logger("test_queue_logging_rotation")
+    handler = logging_utils.buffered_rotating_file_handler(
+        log_filepath, logging.Formatter('%(message)s'),
+        max_bytes=200, backup_count=2, buffer_capacity=10
+    )
+    
+    logging_utils.setup_queue_logging(logger, [handler])
+    for i in range(50):
+        logger.info("x" * 40)
+    logging_utils.stop_queue_logging()
+    
+    assert os.path.exists(log_filepath + ".1")
+    assert os.path.getsize(log_filepath) <= 200
+
+
+def test_setup_queue_logging_replaces_previous_listener(tmp_path):
+    logger = make_logger("test_queue_logging_replace")
+    first = logging_utils.setup_queue_logging(logger, [logging.NullHandler()])
+    second = logging_utils.setup_queue_logging(logger, [logging.NullHandler()])
+    
+    assert [listener for _, _, listener in logging_utils._queue_listeners.values()] == [second]
+    assert first._thread is None
+    assert len(logger.handlers) == 1
+    logging_utils.stop_queue_logging()
+
+
+def test_reconfiguring_one_logger_keeps_the_others_listener(tmp_path):
+    log_filepath = str(tmp_path / "other.log")
+    other = make_logger("test_queue_logging_other")
+    handler = logging.FileHandler(log_filepath)
+    other_listener = logging_utils.setup_queue_logging(other, [handler])
+    logger = make_logger("test_queue_logging_reconfigured")
+    logging_utils.setup_queue_logging(logger, [logging.NullHandler()])
+    logging_utils.setup_queue_logging(logger, [logging.NullHandler()])
+    
+    assert other_listener._thread is not None
+    other.warning("still drained")
+    
+    logging_utils.stop_queue_logging(other)
+    assert other.handlers == []
+    assert logger.handlers and "test_queue_logging_reconfigured" in logging_utils._queue_listeners
+    with open(log_filepath) as f:
+        assert "still drained" in f.read()
+    logging_utils.stop_queue_logging()
+    assert logger.handlers == []
+
+
+def test_filter_formatter_does_not_color_shared_record():
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "hello", None, None)
+    
+    colored = logging_utils.FilterFormatter('%(levelname)s - %(message)s').format(record)
+    
+    assert '\033[' in colored
+    assert record.levelname == "INFO"
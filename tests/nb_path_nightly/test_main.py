@@ -0,0 +1,167 @@
+# tests/nb_path_nightly/test_main.py
+
+import os
+import sys
+from types import SimpleNamespace
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(project_root, 'nb_path_updates', 'nb_path_nightly'))
+
+from nb_path_updates.nb_path_nightly import main as nightly_main
+
+
+def test_prioritize_filters_cheapest_first():
+    expensive = SimpleNamespace(FILTER_NAME="expensive", FILTER_COST=5)
+    cheap = SimpleNamespace(FILTER_NAME="cheap", FILTER_COST=1)
+    default = SimpleNamespace(FILTER_NAME="default")
+    
+    ordered = nightly_main.prioritize_filters([expensive, default, cheap])
+    
+    assert [m.FILTER_NAME for m in ordered] == ["default", "cheap", "expensive"]
+
+
+def test_build_deadline_subtracts_margin():
+    deadline = nightly_main.build_deadline(540, margin_seconds=60)
+    
+    assert deadline.budget_seconds == 480
+
+
+def test_build_deadline_without_limit():
+    assert nightly_main.build_deadline(None).unlimited
+
+
+def test_parse_args_deadline(monkeypatch):
+    monkeypatch.delenv('NB_RUN_DEADLINE_SECONDS', raising=False)
+    
+    args = nightly_main.parse_args(['--deadline-seconds', '540', '--deadline-margin', '30'])
+    
+    assert args.deadline_seconds == 540
+    assert args.deadline_margin == 30
+    assert nightly_main.parse_args([]).deadline_seconds is None
+
+
+def test_run_filter_module_passes_deadline():
+    seen = {}
+    
+    def run_filter(client, logger, deadline=None):
+        seen['deadline'] = deadline
+        return {'people_count': 3, 'path_updates_deferred': 1}
+    
+    module = SimpleNamespace(FILTER_NAME="fake", run_filter=run_filter)
+    deadline = nightly_main.build_deadline(600)
+    
+    result = nightly_main.run_filter_module(module, client=None, logger=nightly_main.logging.getLogger("test"),
+                                            deadline=deadline)
+    
+    assert seen['deadline'] is deadline
+    assert result['success'] is True
+    assert result['path_updates_deferred'] == 1
+
+
+def test_token_recently_used_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setenv("NB_STATE_DIR", str(tmp_path))
+    client = SimpleNamespace(access_token="token-a", last_success_at=nightly_main.time.time())
+    
+    assert not nightly_main.token_recently_used("token-a")
+    
+    nightly_main.record_token_use(client)
+    
+    assert nightly_main.token_recently_used("token-a")
+    assert not nightly_main.token_recently_used("token-b")
+    assert not nightly_main.token_recently_used("token-a", max_age_seconds=0)
+
+
+def test_record_token_use_skips_unused_client(tmp_path, monkeypatch):
+    monkeypatch.setenv("NB_STATE_DIR", str(tmp_path))
+    
+    nightly_main.record_token_use(SimpleNamespace(access_token="token-a", last_success_at=None))
+    
+    assert not nightly_main.token_recently_used("token-a")
+
+
+def test_load_client_reuses_warm_client(monkeypatch):
+    monkeypatch.setenv('NB_NATION_SLUG', 'testnation')
+    monkeypatch.setenv('NB_PA_TOKEN', 'token-a')
+    nightly_main.reset_client_cache()
+    
+    try:
+        first = nightly_main.load_client()
+        second = nightly_main.load_client()
+        fresh = nightly_main.load_client(reuse=False)
+        
+        assert first is second
+        assert fresh is not first
+        assert nightly_main.load_client() is fresh
+    finally:
+        nightly_main.reset_client_cache()
+
+
+def test_load_client_resets_run_state_of_reused_client(monkeypatch):
+    monkeypatch.setenv('NB_NATION_SLUG', 'testnation')
+    monkeypatch.setenv('NB_PA_TOKEN', 'token-a')
+    nightly_main.reset_client_cache()
+    
+    try:
+        client = nightly_main.load_client()
+        client._list_slug_cache['_250813i_c_'] = {'_250813i_c_1'}
+        client._cached_reference(('paths',), lambda: {'data': []})
+        for _ in range(client.circuit_breaker.failure_threshold):
+            client.circuit_breaker.record_result(503)
+        assert client.circuit_breaker.is_open
+        
+        assert nightly_main.load_client() is client
+        assert client._list_slug_cache == {}
+        assert client.circuit_breaker.state == 'closed'
+        # Reference data outlives the invocation (within its TTL)
+        assert ('paths',) in client._reference_cache
+    finally:
+        nightly_main.reset_client_cache()
+
+
+def test_run_filter_module_counts_api_calls():
+    hooks = []
+    client = SimpleNamespace(
+        add_request_hook=hooks.append,
+        remove_request_hook=hooks.remove
+    )
+    
+    def run_filter(client, logger):
+        for _ in range(3):
+            for hook in list(hooks):
+                hook({'method': 'GET', 'path': '/signups', 'status_code': 200, 'elapsed': 0.01})
+        return {'people_count': 1}
+    
+    module = SimpleNamespace(FILTER_NAME="fake", run_filter=run_filter)
+    
+    result = nightly_main.run_filter_module(module, client, nightly_main.logging.getLogger("test"))
+    
+    assert result['api_calls'] == 3
+    assert hooks == []
+
+
+def test_run_filter_module_profile(monkeypatch):
+    calls = {}
+    
+    def fake_profile_call(fn, label, output_dir=None, top_n=25):
+        calls['label'] = label
+        calls['top_n'] = top_n
+        return fn(), {'prof_file': 'x.prof', 'alloc_file': 'x.txt', 'traced_peak_mb': 1.0, 'peak_rss_mb': 50.0}
+    
+    monkeypatch.setattr(nightly_main.profiling_utils, 'profile_call', fake_profile_call)
+    module = SimpleNamespace(FILTER_NAME="fake", FILTER_KEY="fake_key",
+                             run_filter=lambda client, logger: {'people_count': 1})
+    
+    result = nightly_main.run_filter_module(module, None, nightly_main.logging.getLogger("test"),
+                                            profile=True, profile_top=7)
+    
+    assert calls == {'label': 'fake_key', 'top_n': 7}
+    assert result['profile_file'] == 'x.prof'
+    assert result['success'] is True
+
+
+def test_parse_args_profile():
+    args = nightly_main.parse_args(['--profile', '--profile-top', '10'])
+    
+    assert args.profile is True
+    assert args.profile_top == 10
+    assert nightly_main.parse_args([]).profile is False
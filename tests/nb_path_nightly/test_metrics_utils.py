@@ -0,0 +1,98 @@
+# tests/nb_path_nightly/test_metrics_utils.py
+
+import json
+import os
+
+from nb_path_updates.nb_path_nightly.utils import metrics_utils
+
+
+def event(path, status=200, elapsed=0.02, method='GET', error=None):
+    return {
+        'method': method, 'url': f"https://x/api/v2{path}", 'path': path,
+        'status_code': status, 'elapsed': elapsed,
+        'bytes_sent': 10, 'bytes_received': 100, 'error': error
+    }
+
+
+def test_normalize_endpoint_collapses_ids():
+    assert metrics_utils.normalize_endpoint('/path_journeys/123/reactivate') == '/path_journeys/{id}/reactivate'
+    assert metrics_utils.normalize_endpoint('/lists/789') == '/lists/{id}'
+    assert metrics_utils.normalize_endpoint('/signup_taggings') == '/signup_taggings'
+
+
+def test_percentile():
+    samples = [float(i) for i in range(1, 101)]
+    
+    assert metrics_utils.percentile(samples, 50) == 50.0
+    assert metrics_utils.percentile(samples, 95) == 95.0
+    assert metrics_utils.percentile([], 95) is None
+
+
+def test_api_metrics_groups_by_endpoint():
+    metrics = metrics_utils.ApiMetrics()
+    metrics.record(event('/path_journeys/1/reactivate', method='PATCH'))
+    metrics.record(event('/path_journeys/2/reactivate', method='PATCH', status=500, elapsed=0.3))
+    metrics.record(event('/signup_taggings', status=None, error='ReadTimeout'))
+    
+    data = metrics.to_dict()
+    by_endpoint = {(e['method'], e['endpoint']): e for e in data['endpoints']}
+    reactivate = by_endpoint[('PATCH', '/path_journeys/{id}/reactivate')]
+    
+    assert reactivate['calls'] == 2
+    assert reactivate['errors'] == 1
+    assert reactivate['status_codes'] == {'200': 1, '500': 1}
+    assert reactivate['latency_buckets']['0.05'] == 1
+    assert reactivate['latency_buckets']['0.5'] == 2
+    assert by_endpoint[('GET', '/signup_taggings')]['status_codes'] == {'ReadTimeout': 1}
+    assert data['summary']['api_calls'] == 3
+    assert data['summary']['api_errors'] == 2
+
+
+def test_phase_timings_accumulate():
+    metrics = metrics_utils.ApiMetrics()
+    with metrics.phase('connect'):
+        pass
+    with metrics.phase('connect'):
+        pass
+    
+    assert list(metrics.to_dict()['phases']) == ['connect']
+
+
+def test_prometheus_output():
+    metrics = metrics_utils.ApiMetrics()
+    metrics.record(event('/lists/789/add_signups', method='PATCH', elapsed=0.2))
+    
+    text = metrics.to_prometheus()
+    
+    assert 'nb_api_requests_total{method="PATCH",endpoint="/lists/{id}/add_signups",status="200"} 1' in text
+    assert 'nb_api_request_duration_seconds_bucket{method="PATCH",endpoint="/lists/{id}/add_signups",le="0.25"} 1' in text
+    assert 'nb_api_request_duration_seconds_bucket{method="PATCH",endpoint="/lists/{id}/add_signups",le="0.1"} 0' in text
+    assert 'nb_run_duration_seconds' in text
+
+
+def test_write_run_metrics(tmp_path):
+    metrics = metrics_utils.ApiMetrics()
+    metrics.record(event('/signups'))
+    results = [{'filter_name': 'Email Clickers Filter', 'success': True, 'people_count': 2, 'api_calls': 1}]
+    
+    files = metrics_utils.write_run_metrics(metrics, results, output_dir=str(tmp_path))
+    
+    with open(files['json'], encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['summary']['api_calls'] == 1
+    assert data['filters'][0]['api_calls'] == 1
+    with open(files['prometheus'], encoding='utf-8') as f:
+        assert 'nb_api_requests_total' in f.read()
+
+
+def test_write_run_metrics_replaces_one_prometheus_file(tmp_path):
+    metrics = metrics_utils.ApiMetrics()
+    metrics_utils.write_run_metrics(metrics, [], output_dir=str(tmp_path))
+    metrics.record(event('/signups'))
+    
+    files = metrics_utils.write_run_metrics(metrics, [], output_dir=str(tmp_path))
+    
+    assert os.path.basename(files['prometheus']) == metrics_utils.PROMETHEUS_FILENAME
+    assert [name for name in os.listdir(tmp_path) if name.endswith(('.prom', '.tmp'))] == ['clickers_metrics.prom']
+    with open(files['prometheus'], encoding='utf-8') as f:
+        assert 'nb_api_requests_total' in f.read()
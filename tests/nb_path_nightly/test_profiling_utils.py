@@ -0,0 +1,65 @@
+# tests/nb_path_nightly/test_profiling_utils.py
+
+import os
+import pstats
+import sys
+
+import pytest
+
+from nb_path_updates.nb_path_nightly.utils import profiling_utils
+
+
+def allocate():
+    return [str(i) * 10 for i in range(10_000)]
+
+
+def test_profile_call_writes_reports(tmp_path):
+    result, info = profiling_utils.profile_call(allocate, "Email Clickers", output_dir=str(tmp_path), top_n=5)
+    
+    assert len(result) == 10_000
+    assert '_email_clickers_profile_' in os.path.basename(info['prof_file'])
+    assert pstats.Stats(info['prof_file']).total_calls > 0
+    with open(info['alloc_file'], encoding='utf-8') as f:
+        report = f.read()
+    assert "Top 5 allocation sites" in report
+    assert "test_profiling_utils.py" in report
+    assert info['traced_peak_mb'] > 0
+
+
+def test_profile_call_writes_reports_when_fn_raises(tmp_path):
+    def boom():
+        raise ValueError("filter failed")
+    
+    with pytest.raises(ValueError):
+        profiling_utils.profile_call(boom, "clickers", output_dir=str(tmp_path))
+    
+    assert any(name.endswith('.prof') for name in os.listdir(tmp_path))
+    assert any(name.endswith('.txt') for name in os.listdir(tmp_path))
+
+
+def test_peak_rss_mb():
+    peak = profiling_utils.peak_rss_mb()
+    
+    assert peak is None or peak > 0
+
+
+def worker_only(n):
+    return sum(range(n))
+
+
+def test_profile_call_includes_worker_threads(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    
+    def run_workers():
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            return list(executor.map(worker_only, [1000] * 6))
+    
+    _, info = profiling_utils.profile_call(run_workers, "clickers", output_dir=str(tmp_path))
+    
+    functions = {name for (_, _, name) in pstats.Stats(info['prof_file']).stats}
+    assert 'worker_only' in functions
+    if sys.version_info < (3, 12):
+        assert info['profiled_threads'] > 1
+    else:
+        # One profiler sees every thread (a per-thread one couldn't be enabled)
+        assert info['profiled_threads'] is None
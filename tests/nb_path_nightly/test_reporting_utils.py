@@ -0,0 +1,58 @@
+# tests/nb_path_nightly/test_reporting_utils.py
+
+import csv
+import os
+
+from nb_path_updates.nb_path_nightly.utils import reporting_utils
+
+
+def test_generate_summary_report_columns(tmp_path, monkeypatch):
+    monkeypatch.setenv("NB_OUTPUT_DIR", str(tmp_path / "outputs"))
+    monkeypatch.setenv("NB_RUN_HISTORY_DB", str(tmp_path / "history.sqlite3"))
+    results = [{
+        'filter_name': 'Email Clickers Filter',
+        'success': True,
+        'people_count': 2,
+        'csv_filename': 'clickers.csv',
+        'path_updates_successful': 1,
+        'path_updates_errors': 0,
+        'path_updates_deferred': 1,
+        'peak_rss_mb': 84.5,
+        'profile_file': 'clickers.prof',
+        'error': None
+    }]
+    
+    report_filepath = reporting_utils.generate_summary_report(results, "run.log")
+    
+    assert os.path.exists(report_filepath)
+    with open(report_filepath, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]['Success'] == 'YES'
+    assert rows[0]['Path Updates Deferred'] == '1'
+    assert rows[0]['Peak RSS MB'] == '84.5'
+    assert rows[0]['Profile File'] == 'clickers.prof'
+
+
+def test_generate_summary_report_records_history(tmp_path, monkeypatch):
+    monkeypatch.setenv("NB_OUTPUT_DIR", str(tmp_path / "outputs"))
+    history_db = str(tmp_path / "history.sqlite3")
+    results = [{
+        'filter_name': 'Email Clickers Filter',
+        'success': True,
+        'people_count': 4,
+        'csv_filename': 'clickers.csv',
+        'path_updates_successful': 3,
+        'path_updates_errors': 1,
+        'error': None
+    }]
+    
+    report_filepath = reporting_utils.generate_summary_report(
+        results, "run.log", {'duration_seconds': 12.5, 'api_calls': 40, 'latency_p95_ms': 210.0},
+        history_db=history_db
+    )
+    
+    runs = reporting_utils.run_history.load_runs(history_db)
+    assert len(runs) == 1
+    assert runs[0]['report_file'] == report_filepath
+    assert runs[0]['writes'] == 3
+    assert runs[0]['api_calls'] == 40
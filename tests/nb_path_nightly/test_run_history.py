@@ -0,0 +1,86 @@
+# tests/nb_path_nightly/test_run_history.py
+
+from nb_path_updates.nb_path_nightly.utils import run_history
+
+
+def make_result(people_count=10, successful=10, errors=0, success=True):
+    return {
+        'filter_name': 'Email Clickers Filter',
+        'success': success,
+        'people_count': people_count,
+        'path_updates_successful': successful,
+        'path_updates_errors': errors,
+        'path_updates_deferred': 0,
+        'api_calls': 25,
+        'duration_seconds': 30.0,
+        'peak_rss_mb': 80.0,
+        'error': None if success else 'boom'
+    }
+
+
+def record(db_path, duration=30.0, api_calls=25, p95=200.0, **result_kwargs):
+    metrics = {'duration_seconds': duration, 'api_calls': api_calls, 'api_errors': 0,
+               'latency_p95_ms': p95}
+    return run_history.record_run([make_result(**result_kwargs)], metrics, db_path=db_path)
+
+
+def test_record_run_totals(tmp_path):
+    db_path = str(tmp_path / "history.sqlite3")
+    
+    run_id = record(db_path, people_count=4, successful=3, errors=1)
+    
+    run = run_history.load_runs(db_path)[0]
+    assert run['id'] == run_id
+    assert run['people_found'] == 4
+    assert run['writes'] == 3
+    assert run['errors'] == 1
+    assert run['api_calls'] == 25
+    assert run['p95_latency_ms'] == 200.0
+    assert run['api_calls_per_person'] == 25 / 4
+
+
+def test_record_run_counts_failed_filter_as_error(tmp_path):
+    db_path = str(tmp_path / "history.sqlite3")
+    
+    record(db_path, success=False, people_count=0, successful=0)
+    
+    run = run_history.load_runs(db_path)[0]
+    assert run['success'] == 0
+    assert run['errors'] == 1
+    assert run['api_calls_per_person'] is None
+
+
+def test_compare_flags_slow_and_expensive_runs(tmp_path):
+    db_path = str(tmp_path / "history.sqlite3")
+    for duration in (30.0, 32.0, 29.0, 31.0):
+        record(db_path, duration=duration)
+    record(db_path, duration=90.0, api_calls=80)
+    
+    comparisons = run_history.compare_to_trailing_median(run_history.load_runs(db_path), window=7)
+    
+    assert [c['flags'] for c in comparisons[:-1]] == [[]]
+    flagged = {flag['metric']: flag for flag in comparisons[-1]['flags']}
+    assert set(flagged) == {'duration_seconds', 'api_calls', 'api_calls_per_person'}
+    assert flagged['duration_seconds']['median'] == 30.5
+    assert flagged['duration_seconds']['ratio'] == 2.95
+
+
+def test_compare_needs_min_history(tmp_path):
+    db_path = str(tmp_path / "history.sqlite3")
+    record(db_path)
+    record(db_path, duration=500.0)
+    
+    assert run_history.compare_to_trailing_median(run_history.load_runs(db_path)) == []
+
+
+def test_compare_cli_exit_status(tmp_path, capsys):
+    db_path = str(tmp_path / "history.sqlite3")
+    for _ in range(3):
+        record(db_path)
+    
+    assert run_history.main(['--db', db_path, 'compare']) == 0
+    
+    record(db_path, errors=5, successful=5)
+    
+    assert run_history.main(['--db', db_path, 'compare']) == 1
+    assert 'errors: 5 vs median 0' in capsys.readouterr().out
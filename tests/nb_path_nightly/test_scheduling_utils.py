@@ -0,0 +1,52 @@
+# tests/nb_path_nightly/test_scheduling_utils.py
+
+import pytest
+
+from nb_path_updates.nb_path_nightly.utils import scheduling_utils
+
+
+@pytest.fixture(autouse=True)
+def isolated_state_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("NB_STATE_DIR", str(tmp_path))
+
+
+def test_unlimited_deadline_always_allows_work():
+    deadline = scheduling_utils.RunDeadline(None)
+    
+    assert deadline.unlimited
+    assert deadline.can_start(units=10_000)
+    assert not deadline.expired()
+
+
+def test_deadline_accounts_for_average_unit_cost():
+    deadline = scheduling_utils.RunDeadline(100, reserve_seconds=10)
+    
+    assert deadline.can_start()
+    
+    # Pretend each unit takes 50s: one more fits, two more don't
+    deadline.record_unit(50)
+    assert deadline.can_start(units=1)
+    assert not deadline.can_start(units=2)
+
+
+def test_expired_deadline_stops_work():
+    deadline = scheduling_utils.RunDeadline(0)
+    
+    assert deadline.expired()
+    assert not deadline.can_start()
+
+
+def test_pending_round_trip():
+    scheduling_utils.save_pending("clickers", ["1", "2"], reason="deadline")
+    
+    assert scheduling_utils.load_pending("clickers") == ["1", "2"]
+    
+    scheduling_utils.clear_pending("clickers")
+    assert scheduling_utils.load_pending("clickers") == []
+
+
+def test_save_empty_pending_clears():
+    scheduling_utils.save_pending("clickers", ["1"])
+    scheduling_utils.save_pending("clickers", [])
+    
+    assert scheduling_utils.load_pending("clickers") == []
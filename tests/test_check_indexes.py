@@ -0,0 +1,83 @@
+import asyncio
+
+from src import check_indexes
+
+SENT_CREATED_AT = check_indexes.WANTED_INDEXES[0]
+
+
+class FakeConnection:
+    """Stands in for an asyncpg connection answering the catalog queries"""
+
+    def __init__(self, columns, indexes, invalid=()):
+        self.columns = columns
+        self.indexes = indexes
+        self.invalid = invalid
+        self.executed = []
+
+    async def fetch(self, query, *args):
+        if query == check_indexes.COLUMNS_SQL:
+            return [{'table_name': table, 'columns': columns} for table, columns in self.columns.items()]
+        if query == check_indexes.INVALID_INDEXES_SQL:
+            return [{'index_name': name} for name in self.invalid]
+        return self.indexes
+
+    async def execute(self, query, *args):
+        self.executed.append(query)
+
+
+def test_create_index_sql_includes_covered_columns():
+    assert check_indexes.create_index_sql(SENT_CREATED_AT, concurrently=True) == (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS mailing_events_sent_created_at_idx "
+        "ON nbuild_larouchepac.mailing_events_sent (created_at) INCLUDE (signup_id, mailing_id, broadcaster_id)"
+    )
+
+
+def test_index_satisfies_matches_leading_key_and_covered_columns():
+    wanted = {'columns': ("mailing_id",), 'include': ()}
+    assert check_indexes.index_satisfies({'key_count': 2, 'columns': ["mailing_id", "signup_id"]}, wanted)
+    assert not check_indexes.index_satisfies({'key_count': 2, 'columns': ["signup_id", "mailing_id"]}, wanted)
+
+    # Included columns may be key or INCLUDE columns of the existing index
+    assert check_indexes.index_satisfies(
+        {'key_count': 2, 'columns': ["created_at", "signup_id", "mailing_id", "broadcaster_id"]}, SENT_CREATED_AT)
+    assert not check_indexes.index_satisfies({'key_count': 1, 'columns': ["created_at"]}, SENT_CREATED_AT)
+
+
+def test_inspect_reports_present_missing_and_skipped():
+    event_columns = ["signup_id", "mailing_id", "created_at", "broadcaster_id"]
+    conn = FakeConnection(
+        columns={
+            'mailing_events_sent': event_columns,
+            'mailing_events_opened': event_columns,
+            'mailing_events_clicked': event_columns,
+            'signup_taggings': ["id", "signup_id", "created_at"],
+        },
+        indexes=[{'table_name': 'mailing_events_sent', 'index_name': 'restored_sent_idx', 'key_count': 1,
+                  'columns': ["created_at", "signup_id", "mailing_id", "broadcaster_id"]}],
+    )
+
+    report = {(entry['table'], entry['index']): entry
+              for entry in asyncio.run(check_indexes.inspect(conn))}
+    statuses = {entry['table']: entry['status'] for entry in report.values()
+                if entry['table'] in ('signup_taggings', 'path_journeys')}
+
+    assert report[('mailing_events_sent', 'restored_sent_idx')]['status'] == 'present'
+    assert report[('mailing_events_opened', 'mailing_events_opened_created_at_idx')]['status'] == 'missing'
+    assert statuses == {'signup_taggings': 'skipped', 'path_journeys': 'skipped'}
+    assert report[('signup_taggings', 'signup_taggings_tag_id_signup_id_idx')]['reason'] == "missing columns: tag_id"
+
+
+def test_invalid_index_from_failed_concurrent_build_is_dropped_and_rebuilt():
+    event_columns = ["signup_id", "mailing_id", "created_at", "broadcaster_id"]
+    conn = FakeConnection(columns={'mailing_events_sent': event_columns}, indexes=[],
+                          invalid=['mailing_events_sent_created_at_idx'])
+
+    report = asyncio.run(check_indexes.ensure_indexes(conn, concurrently=True, explain=False))
+    ddl = [query for query in conn.executed if 'INDEX' in query]
+
+    assert report[0]['status'] == 'rebuilt'
+    assert report[3]['status'] == 'created'  # mailing_events_sent (mailing_id, signup_id, created_at)
+    assert ddl[:2] == [
+        "DROP INDEX CONCURRENTLY IF EXISTS nbuild_larouchepac.mailing_events_sent_created_at_idx",
+        check_indexes.create_index_sql(SENT_CREATED_AT, concurrently=True),
+    ]
@@ -0,0 +1,62 @@
+import asyncio
+
+from src import db
+
+
+class FakePool:
+    """Stands in for an asyncpg pool, tracking how many connections are out at once"""
+
+    def __init__(self):
+        self.in_use = 0
+        self.peak_in_use = 0
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                pool.in_use += 1
+                pool.peak_in_use = max(pool.peak_in_use, pool.in_use)
+                return pool
+
+            async def __aexit__(self, *exc):
+                pool.in_use -= 1
+
+        return Acquire()
+
+    async def fetch(self, query, *args):
+        await asyncio.sleep(0.01)
+        return [(query, args)]
+
+
+def test_connect_kwargs_prefer_database_url_and_merge_settings(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "postgresql://analyst@db/campaign")
+
+    kwargs = db.connect_kwargs(server_settings={'work_mem': '1GB'}, timeout=5)
+
+    assert kwargs['dsn'] == "postgresql://analyst@db/campaign"
+    assert 'host' not in kwargs
+    assert kwargs['server_settings'] == {**db.ANALYTICS_SETTINGS, 'work_mem': '1GB'}
+    assert kwargs['statement_cache_size'] == db.STATEMENT_CACHE_SIZE
+    assert kwargs['timeout'] == 5
+
+
+def test_connect_kwargs_fall_back_to_postgres_vars(monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+
+    kwargs = db.connect_kwargs()
+
+    assert {key: kwargs[key] for key in db.DB_CONFIG} == db.DB_CONFIG
+    assert kwargs['server_settings']['work_mem'] == db.ANALYTICS_SETTINGS['work_mem']
+
+
+def test_fetch_concurrently_runs_queries_on_separate_connections():
+    pool = FakePool()
+
+    results = asyncio.run(db.fetch_concurrently(pool, {
+        'sent': ("SELECT sent", 1),
+        'opened': ("SELECT opened", 2),
+    }))
+
+    assert results == {'sent': [("SELECT sent", (1,))], 'opened': [("SELECT opened", (2,))]}
+    assert pool.peak_in_use == 2
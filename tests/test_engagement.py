@@ -0,0 +1,135 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src import engagement
+
+
+def events(*rows):
+    signup_id, mailing_id, created_at = zip(*rows) if rows else ((), (), ())
+    return engagement.make_events(signup_id, mailing_id, created_at)
+
+
+def python_distinct_counts(rows):
+    """The per-row set building the engine replaces"""
+    counts = {}
+    for signup_id, mailing_id, _ in rows:
+        counts.setdefault(signup_id, set()).add(mailing_id)
+    return {signup_id: len(mailings) for signup_id, mailings in counts.items()}
+
+
+def test_distinct_counts_match_python_sets():
+    rng = np.random.default_rng(0)
+    rows = list(zip(rng.integers(1, 50, 2000).tolist(), rng.integers(1, 30, 2000).tolist(),
+                    ['2025-01-01'] * 2000))
+
+    signup_id, counts = engagement.distinct_counts(events(*rows))
+
+    assert dict(zip(signup_id.tolist(), counts.tolist())) == python_distinct_counts(rows)
+
+
+def test_distinct_pairs_keep_earliest_event():
+    pairs = engagement.distinct_pairs(events(
+        (2, 7, '2025-03-01'), (1, 7, '2025-02-01'), (2, 7, '2025-01-15'), (1, 8, '2025-01-01'),
+    ))
+
+    assert pairs['signup_id'].tolist() == [1, 1, 2]
+    assert pairs['mailing_id'].tolist() == [7, 8, 7]
+    assert pairs['created_at'].astype('datetime64[D]').astype(str).tolist() == ['2025-02-01', '2025-01-01', '2025-01-15']
+
+
+def test_open_frequencies_count_opens_of_sent_mailings_only():
+    sent = events((1, 10, '2025-01-01'), (1, 11, '2025-01-02'), (2, 10, '2025-01-01'), (3, 12, '2025-01-05'))
+    opened = events(
+        (1, 10, '2025-01-01'), (1, 10, '2025-01-03'),  # reopened: still one mailing
+        (2, 10, '2025-01-02'),
+        (2, 99, '2025-01-02'),  # mailing not in sent
+        (4, 10, '2025-01-02'),  # signup with no sends
+    )
+
+    frequencies = engagement.open_frequencies(sent, opened)
+
+    assert frequencies['signup_id'].tolist() == [2, 1, 3]
+    assert frequencies['sent_count'].tolist() == [1, 2, 1]
+    assert frequencies['opened_count'].tolist() == [1, 1, 0]
+    assert frequencies['open_frequency'].tolist() == [1.0, 0.5, 0.0]
+
+
+def test_empty_events():
+    signup_id, counts = engagement.distinct_counts(events())
+    assert len(signup_id) == 0 and len(counts) == 0
+    assert len(engagement.distinct_pairs(events())['created_at']) == 0
+
+
+def test_engagement_scores_nest_windows_and_attribute_opens_to_sends():
+    sent = events(
+        (1, 10, '2025-06-28'),  # 2 days before as_of
+        (1, 11, '2025-05-01'),  # 60 days
+        (1, 12, '2024-01-01'),  # beyond every window
+        (1, 13, '2025-07-05'),  # after as_of: ignored
+        (2, 10, '2025-06-01'),  # 29 days
+    )
+    opened = events((1, 10, '2025-06-29'), (1, 10, '2025-06-30'), (1, 12, '2025-06-29'), (2, 11, '2025-06-02'))
+    clicked = events((1, 12, '2025-06-29'))
+
+    scores = engagement.engagement_scores(sent, opened, clicked, as_of=np.datetime64('2025-06-30'),
+                                          windows=(30, 90), half_life_days=30)
+
+    assert scores['signup_id'].tolist() == [1, 2]
+    assert scores['sent_30d'].tolist() == [1, 1]
+    assert scores['sent_90d'].tolist() == [2, 1]
+    assert scores['sent_lifetime'].tolist() == [3, 1]
+    # Opens count toward their mailing's send, however late they happen
+    assert scores['opened_30d'].tolist() == [1, 0]
+    assert scores['opened_lifetime'].tolist() == [2, 0]
+    assert scores['clicked_90d'].tolist() == [0, 0]
+    assert scores['click_rate_lifetime'].tolist() == pytest.approx([1 / 3, 0])
+    assert scores['open_rate_90d'].tolist() == [0.5, 0.0]
+
+    # Recent sends weigh more: the opened send is 2 days old, the others 60 and 547
+    weights = 0.5 ** (np.array([2, 60, 547]) / 30)
+    assert scores['recency_open_rate'][0] == pytest.approx((weights[0] + weights[2]) / weights.sum())
+    assert scores['recency_click_rate'][1] == 0.0
+
+
+
+def test_engagement_scores_ignore_opens_and_clicks_after_as_of():
+    sent = events((1, 10, '2025-06-01'), (1, 11, '2025-06-10'))
+    opened = events((1, 10, '2025-06-02'), (1, 11, '2025-07-01'))  # the second is opened after as_of
+    clicked = events((1, 11, '2025-07-01'))
+
+    scores = engagement.engagement_scores(sent, opened, clicked, as_of=np.datetime64('2025-06-30'))
+    latest = engagement.engagement_scores(sent, opened, clicked)
+
+    assert scores['opened_lifetime'].tolist() == [1]
+    assert scores['clicked_lifetime'].tolist() == [0]
+    # Without as_of, engagement after the latest send still counts
+    assert latest['opened_lifetime'].tolist() == [2]
+    assert latest['clicked_lifetime'].tolist() == [1]
+
+def test_exclude_machine_opens_compares_counts_per_pair():
+    opened = events((1, 10, '2025-01-01T08:00'), (1, 10, '2025-01-02T09:00'), (2, 10, '2025-01-01T08:00'),
+                    (1, 11, '2025-01-01T08:00'), (2, 11, '2025-01-01T08:00'))
+    # Timestamps needn't match the open they were recorded with
+    machine_opened = events((1, 10, '2025-01-01T08:00:01'), (2, 11, '2025-01-01T07:59'),
+                            (3, 10, '2025-01-01T08:00'))
+
+    human = engagement.exclude_machine_opens(opened, machine_opened)
+
+    # (1, 10) has an open beyond its machine open: a person read it, all its opens stay
+    assert list(zip(human['signup_id'].tolist(), human['mailing_id'].tolist())) == [(1, 10), (1, 10), (2, 10), (1, 11)]
+
+
+def test_open_frequencies_with_machine_opens_and_clicks():
+    sent = events((1, 10, '2025-01-01'), (1, 11, '2025-01-01'), (2, 10, '2025-01-01'))
+    opened = events((1, 10, '2025-01-01T08:00'), (1, 11, '2025-01-01T08:00'), (2, 10, '2025-01-01T08:00'))
+    machine_opened = events((1, 11, '2025-01-01T08:00'), (2, 10, '2025-01-01T08:00'))
+    clicked = events((1, 10, '2025-01-01T08:05'), (2, 10, '2025-01-01T08:05'), (2, 99, '2025-01-01T08:05'))
+
+    frequencies = engagement.open_frequencies(sent, opened, clicked, machine_opened)
+
+    assert frequencies['signup_id'].tolist() == [1, 2]
+    assert frequencies['opened_count'].tolist() == [1, 0]
+    assert frequencies['clicked_count'].tolist() == [1, 1]
+    # A click without a counted open leaves click-to-open at 0 rather than dividing by zero
+    assert frequencies['click_to_open_rate'].tolist() == [1.0, 0.0]
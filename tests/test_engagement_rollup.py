@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime
+
+from src import engagement_rollup
+
+
+class FakeConnection:
+    """Stands in for an asyncpg connection: canned watermarks and high marks, records statements"""
+
+    def __init__(self, watermarks, high_marks):
+        self.watermarks = watermarks
+        self.high_marks = high_marks
+        self.executed = []
+
+    def transaction(self):
+        class Transaction:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Transaction()
+
+    async def fetchval(self, query, *args):
+        if 'engagement_rollup_state' in query:
+            return self.watermarks.get(args[0])
+        table = query.split('.')[-1].strip()
+        return self.high_marks.get(table)
+
+    async def execute(self, query, *args):
+        self.executed.append((query, args))
+        if 'engagement_rollup_state (source_table' in query:
+            self.watermarks[args[0]] = args[1]
+        return "INSERT 0 3"
+
+
+def test_new_pairs_anti_join_only_on_incremental_runs():
+    full = engagement_rollup._new_pairs_sql('mailing_events_sent', incremental=False)
+    incremental = engagement_rollup._new_pairs_sql('mailing_events_sent', incremental=True)
+
+    assert 'NOT EXISTS' not in full
+    assert 'NOT EXISTS' in incremental and 'seen.created_at <= $1' in incremental
+    assert 'GROUP BY signup_id, mailing_id' in full
+
+
+def test_opens_are_attributed_to_the_pairs_first_send():
+    sql = engagement_rollup._new_pairs_sql('mailing_events_opened', incremental=True)
+
+    # Month and broadcaster come from the send; opens with no send drop out
+    assert 'mailing_events_sent sent' in sql
+    assert 'min(created_at) AS first_at, min(broadcaster_id) AS broadcaster_id' in sql
+    assert 'send.first_at IS NOT NULL AND NOT EXISTS' in sql
+    assert 'nbuild_larouchepac.mailing_events_opened seen' in sql
+
+
+def test_merge_adds_to_existing_rollup_rows():
+    sql = engagement_rollup._merge_sql('clicked', 'mailing_events_clicked', incremental=True)
+
+    assert 'ON CONFLICT ON CONSTRAINT engagement_monthly_key' in sql
+    assert 'DO UPDATE SET clicked = rollup.clicked + EXCLUDED.clicked' in sql
+    assert "date_trunc('month', first_at)" in sql
+
+
+def test_update_rollup_moves_watermarks():
+    march, april = datetime(2025, 3, 1), datetime(2025, 4, 1)
+    conn = FakeConnection(
+        watermarks={'mailing_events_opened': march, 'mailing_events_clicked': april},
+        high_marks={'mailing_events_sent': april, 'mailing_events_opened': april, 'mailing_events_clicked': april},
+    )
+
+    results = {result['column']: result for result in asyncio.run(engagement_rollup.update_rollup(conn))}
+    merges = [(query, args) for query, args in conn.executed if 'engagement_monthly AS rollup' in query]
+
+    # First run reads everything; the opened table only what came after its watermark
+    assert [args for _, args in merges] == [(datetime.min, april), (march, april)]
+    assert 'NOT EXISTS' not in merges[0][0] and 'NOT EXISTS' in merges[1][0]
+    assert results['sent']['watermark'] == april and results['sent']['rows_touched'] == 3
+    # Nothing newer than the clicked watermark: no merge, watermark unchanged
+    assert results['clicked']['rows_touched'] == 0
+    assert conn.watermarks == {'mailing_events_sent': april, 'mailing_events_opened': april,
+                               'mailing_events_clicked': april}
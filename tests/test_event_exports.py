@@ -0,0 +1,46 @@
+import asyncio
+
+from src import event_exports
+
+
+class FakeCopyConnection:
+    """Stands in for asyncpg's copy_from_query: writes CSV bytes to a path or coroutine"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = []
+
+    async def copy_from_query(self, query, *args, output, format, header):
+        self.calls.append((args, format, header))
+        if callable(output):
+            for start in range(0, len(self.payload), 7):
+                await output(self.payload[start:start + 7])
+        else:
+            with open(output, 'wb') as f:
+                f.write(self.payload)
+        rows = self.payload.count(b"\n") - 1
+        return f"COPY {rows}"
+
+
+def test_copy_export_plain_and_gzipped(tmp_path):
+    import gzip
+
+    payload = b"signup_id,mailing_id\n1,2\n3,4\n"
+    conn = FakeCopyConnection(payload)
+    plain = str(tmp_path / "sent.csv")
+    packed = str(tmp_path / "sent.csv.gz")
+
+    assert asyncio.run(event_exports.copy_query_to_csv(conn, plain, "SELECT ...", 'cutoff')) == 2
+    assert asyncio.run(event_exports.copy_query_to_csv(conn, packed, "SELECT ...", 'cutoff')) == 2
+
+    assert open(plain, 'rb').read() == payload
+    assert gzip.open(packed).read() == payload
+    assert conn.calls == [(('cutoff',), 'csv', True)] * 2
+
+
+def test_export_path_follows_export_gzip(monkeypatch):
+    monkeypatch.delenv("EXPORT_GZIP", raising=False)
+    assert event_exports.export_path("mailing_events_sent_filtered") == "mailing_events_sent_filtered.csv"
+    monkeypatch.setenv("EXPORT_GZIP", "1")
+    assert event_exports.export_path("events") == "events.csv.gz"
+    assert event_exports.export_path("events", compress=False) == "events.csv"
@@ -0,0 +1,206 @@
+import json
+
+from benchmarks.mock_nb_server import MockNation
+
+AUTH = {'Authorization': 'Bearer mock-token'}
+
+
+def call(nation, method, path, query=None, body=None, headers=AUTH):
+    raw = json.dumps(body).encode('utf-8') if body is not None else b''
+    return nation.handle(method, f"/api/v2{path}", query or {}, raw, headers)
+
+
+def test_synthetic_taggings_paginate():
+    nation = MockNation.synthetic(tagged_signups=150, journeys=50)
+
+    first = call(nation, 'GET', '/signup_taggings', {'filter[tag_id]': '14890', 'page[size]': '100'})
+    second = call(nation, 'GET', '/signup_taggings',
+                  {'filter[tag_id]': '14890', 'page[size]': '100', 'page[number]': '2'})
+
+    assert first[0] == 200
+    assert len(first[1]['data']) == 100
+    assert len(second[1]['data']) == 50
+    assert len(nation.journeys) == 50
+
+
+def test_journey_create_update_reactivate():
+    nation = MockNation.synthetic(tagged_signups=2)
+    active = nation.add_journey('1', '1109', '11091', 'active')
+    inactive = nation.add_journey('2', '1109', '11091', 'abandoned')
+    step = {'data': {'attributes': {'current_step_id': '1380'}}}
+
+    assert call(nation, 'PATCH', f'/path_journeys/{active}', body=step)[0] == 200
+    assert call(nation, 'PATCH', f'/path_journeys/{inactive}', body=step)[0] == 422
+    assert call(nation, 'PATCH', f'/path_journeys/{inactive}/reactivate', body=step)[0] == 200
+    assert nation.journeys[inactive][2:4] == ['1380', 'active']
+
+    create = {'data': {'attributes': {'signup_id': '3', 'path_id': '1109', 'current_step_id': '1380'}}}
+    assert call(nation, 'POST', '/path_journeys', body=create)[0] == 201
+    assert call(nation, 'POST', '/path_journeys', body=create)[0] == 422
+
+    journeys = call(nation, 'GET', '/path_journeys', {'filter[signup_id]': '3'})[1]['data']
+    assert [j['attributes']['current_step_id'] for j in journeys] == ['1380']
+
+
+def test_lists_prefix_lookup_and_add_signups():
+    nation = MockNation.synthetic(tagged_signups=5)
+    created = call(nation, 'POST', '/lists', body={'data': {
+        'attributes': {'slug': '_250813i_c_1', 'name': 'x'},
+        'relationships': {'author': {'data': {'type': 'signups', 'id': '1'}}}
+    }})
+    list_id = created[1]['data']['id']
+
+    found = call(nation, 'GET', '/lists', {'filter[slug][prefix]': '_250813i_c_'})[1]['data']
+    added = call(nation, 'PATCH', f'/lists/{list_id}/add_signups',
+                 body={'data': {'id': list_id, 'type': 'lists', 'signup_ids': ['1', '2']}})
+
+    assert created[0] == 201
+    assert [lst['attributes']['slug'] for lst in found] == ['_250813i_c_1']
+    assert added[:2] == (202, None)
+    assert nation.list_members[list_id] == {'1', '2'}
+
+
+def test_expired_token_refresh_rotates():
+    nation = MockNation.synthetic(tagged_signups=1, token_ttl_seconds=600)
+    nation.expire_tokens()
+
+    assert call(nation, 'GET', '/paths')[0] == 401
+
+    status, tokens, _ = nation.handle('POST', '/oauth/token', {},
+                                      b'grant_type=refresh_token&refresh_token=mock-refresh', {})
+    assert status == 200
+    assert call(nation, 'GET', '/paths', headers={'Authorization': f"Bearer {tokens['access_token']}"})[0] == 200
+
+    # The spent refresh token can't be used again
+    reused = nation.handle('POST', '/oauth/token', {},
+                           b'grant_type=refresh_token&refresh_token=mock-refresh', {})
+    assert reused[0] == 400
+
+
+def test_list_prefix_lookup_follows_next_links():
+    from benchmarks.mock_nb_server import mount_mock_nation
+    from src.nb_api_client import NationBuilderClient
+
+    nation = MockNation.synthetic(tagged_signups=1)
+    for i in range(1, 251):
+        nation.lists[str(i)] = {'slug': f'_250813i_c_{i}', 'name': f'_250813i_c_{i}'}
+    nation.lists['251'] = {'slug': 'other', 'name': 'other'}
+    client = NationBuilderClient(nation_slug="mock", access_token="mock-token")
+    mount_mock_nation(client, nation)
+    nation.reset_stats()
+
+    slugs = client.get_list_slugs_with_prefix('_250813i_c_')
+
+    assert slugs == {f'_250813i_c_{i}' for i in range(1, 251)}
+    assert nation.stats()['requests'] == 3
+
+
+def test_rate_limit_and_injected_errors():
+    limited = MockNation.synthetic(tagged_signups=1, rate_limit_rps=2)
+    statuses = [call(limited, 'GET', '/paths')[0] for _ in range(4)]
+
+    failing = MockNation.synthetic(tagged_signups=1, error_rate=1.0)
+
+    assert statuses[:2] == [200, 200]
+    assert 429 in statuses[2:]
+    assert call(failing, 'GET', '/paths')[0] in (500, 502, 503)
+    assert limited.stats()['faults']['rate_limited'] >= 1
+
+
+def test_seed_from_data_sample():
+    nation = MockNation.from_data_sample()
+
+    taggings = call(nation, 'GET', '/signup_taggings', {'filter[tag_id]': '14890', 'page[size]': '100'})
+
+    assert len(nation.journeys) == 100
+    assert len(taggings[1]['data']) > 0
+
+
+def test_adapter_serves_client_and_token_refresh():
+    from benchmarks.mock_nb_server import mount_mock_nation
+    from src.nb_api_client import NationBuilderClient
+
+    nation = MockNation.synthetic(tagged_signups=3, token_ttl_seconds=600)
+    client = NationBuilderClient(nation_slug="mock", access_token="mock-token",
+                                 refresh_token="mock-refresh", client_id="id", client_secret="secret")
+    mount_mock_nation(client, nation)
+    nation.expire_tokens()
+
+    taggings = client.get_signup_taggings(filters={'tag_id': '14890'})
+
+    assert len(taggings['data']) == 3
+    assert client.access_token != "mock-token"
+    assert nation.stats()['faults']['token_refreshes'] == 1
+
+
+def test_clickers_run_against_mock_nation(tmp_path, monkeypatch):
+    import logging
+    from benchmarks.mock_nb_server import mount_mock_nation
+    from nb_path_updates.nb_path_nightly.filters import clickers
+    from src.nb_api_client import NationBuilderClient
+
+    monkeypatch.setenv("NB_STATE_DIR", str(tmp_path))
+    monkeypatch.setenv("NB_ADMIN_SIGNUP_ID", "1")
+    monkeypatch.setattr(clickers, 'export_signup_ids_to_csv', lambda *args: None)
+    nation = MockNation.synthetic(tagged_signups=40, journeys=200)
+    client = NationBuilderClient(nation_slug="mock", access_token="mock-token")
+    mount_mock_nation(client, nation)
+
+    result = clickers.run_filter(client, logging.getLogger("test"), max_workers=4)
+
+    assert result['path_updates_successful'] == 40
+    assert nation.list_members[result['list_id']] == {str(i) for i in range(1, 41)}
+    for signup_id in range(1, 41):
+        on_path = [nation.journeys[jid] for jid in nation.journeys_by_signup[str(signup_id)]
+                   if nation.journeys[jid][1] == '1109']
+        assert [j[2:4] for j in on_path] == [['1380', 'active']]
+
+
+def test_batched_journey_lookup_for_many_signups():
+    from benchmarks.mock_nb_server import mount_mock_nation
+    from src.nb_api_client import NationBuilderClient
+
+    nation = MockNation.synthetic(tagged_signups=250)
+    for signup_id in ('3', '150', '240'):
+        nation.add_journey(signup_id, '1109', '11091', 'active')
+    nation.add_journey('7', '999', '11091', 'active')
+    client = NationBuilderClient(nation_slug='mock', access_token='mock-token')
+    mount_mock_nation(client, nation)
+    nation.reset_stats()
+
+    journeys = client.get_path_journeys_for_signups([str(i) for i in range(1, 251)], '1109')
+
+    assert sorted(journeys, key=int) == ['3', '150', '240']
+    assert nation.stats()['requests'] == 3
+
+
+def test_token_expiry_under_concurrent_journey_workers(tmp_path, monkeypatch):
+    import logging
+    from benchmarks.mock_nb_server import mount_mock_nation
+    from nb_path_updates.nb_path_nightly.filters import clickers
+    from src.nb_api_client import NationBuilderClient
+
+    monkeypatch.setenv("NB_STATE_DIR", str(tmp_path))
+    monkeypatch.setenv("NB_ADMIN_SIGNUP_ID", "1")
+    monkeypatch.setattr(clickers, 'export_signup_ids_to_csv', lambda *args: None)
+    nation = MockNation.synthetic(tagged_signups=200)
+    client = NationBuilderClient(nation_slug="mock", access_token="mock-token",
+                                 refresh_token="mock-refresh", client_id="id", client_secret="secret")
+    mount_mock_nation(client, nation)
+
+    # Every token expires once the journey updates are under way
+    seen = []
+
+    def expire_mid_run(event):
+        seen.append(event)
+        if len(seen) == 60:
+            nation.expire_tokens()
+
+    client.add_request_hook(expire_mid_run)
+
+    result = clickers.run_filter(client, logging.getLogger("test"), max_workers=8)
+
+    assert result['path_updates_successful'] == 200
+    assert result['path_updates_dead_lettered'] == 0
+    assert client.circuit_breaker.times_opened == 0
+    assert nation.stats()['faults']['token_refreshes'] == 1
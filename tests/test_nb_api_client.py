@@ -1,2 +1,367 @@
+import json
+import time
+
+import pytest
+import requests
+
+from src.nb_api_client import NationBuilderAPIError, NationBuilderClient
+
+
+class DummyResponse:
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+        self.text = str(data)
+
+    def json(self):
+        return self.data
+
+
+def make_client():
+    return NationBuilderClient(nation_slug="test", access_token="token")
+
+
 def test_dummy():
     assert True
+
+
+def test_get_list_slugs_with_prefix_is_cached(monkeypatch):
+    client = make_client()
+    calls = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append((method, url, kwargs.get('params')))
+        return DummyResponse({'data': [
+            {'id': '1', 'attributes': {'slug': '_250813i_c_1'}},
+            {'id': '2', 'attributes': {'slug': '_250813i_c_2'}},
+        ]})
+
+    monkeypatch.setattr(client, '_make_request', fake_request)
+
+    assert client.get_list_slugs_with_prefix('_250813i_c_') == {'_250813i_c_1', '_250813i_c_2'}
+    assert client.get_list_slugs_with_prefix('_250813i_c_') == {'_250813i_c_1', '_250813i_c_2'}
+    assert len(calls) == 1
+    assert calls[0][2]['filter[slug][prefix]'] == '_250813i_c_'
+
+
+def test_create_list_updates_slug_cache(monkeypatch):
+    client = make_client()
+    client._list_slug_cache['_250813i_c_'] = {'_250813i_c_1'}
+
+    monkeypatch.setattr(
+        client, '_make_request',
+        lambda method, url, **kwargs: DummyResponse({'data': {'id': '5', 'type': 'lists'}})
+    )
+
+    client.create_list('_250813i_c_2', '_250813i_c_2', 'admin')
+
+    assert client.get_list_slugs_with_prefix('_250813i_c_') == {'_250813i_c_1', '_250813i_c_2'}
+
+
+def test_chunk_signup_ids_respects_payload_size():
+    signup_ids = [str(100000 + i) for i in range(500)]
+
+    chunks = NationBuilderClient._chunk_signup_ids('789', signup_ids, max_payload_bytes=1000,
+                                                   max_chunk_size=1000)
+
+    assert [sid for chunk in chunks for sid in chunk] == signup_ids
+    for chunk in chunks:
+        payload = {"data": {"id": "789", "type": "lists", "signup_ids": chunk}}
+        assert len(json.dumps(payload)) <= 1000
+
+
+def test_chunk_signup_ids_respects_chunk_size():
+    chunks = NationBuilderClient._chunk_signup_ids('789', [str(i) for i in range(25)],
+                                                   max_payload_bytes=50_000, max_chunk_size=10)
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+
+
+def test_add_people_to_list_retries_only_failed_chunk(monkeypatch):
+    client = make_client()
+    sent = []
+    failed_once = set()
+
+    def fake_request(method, url, **kwargs):
+        chunk = kwargs['json']['data']['signup_ids']
+        sent.append(chunk[0])
+        if chunk[0] == '10' and '10' not in failed_once:
+            failed_once.add('10')
+            return DummyResponse({'errors': ['boom']}, status_code=500)
+        return DummyResponse({'data': {'id': '789', 'type': 'lists'}})
+
+    monkeypatch.setattr(client, '_make_request', fake_request)
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+
+    result = client.add_people_to_list('789', [str(i) for i in range(25)], max_chunk_size=10)
+
+    assert result['chunks_total'] == 3
+    assert result['chunks_failed'] == 0
+    assert result['signups_added'] == 25
+    assert sorted(sent) == ['0', '10', '10', '20']
+    assert [c['attempts'] for c in result['chunks']] == [1, 2, 1]
+
+
+def test_add_people_to_list_reports_failed_signups(monkeypatch):
+    client = make_client()
+
+    def fake_request(method, url, **kwargs):
+        chunk = kwargs['json']['data']['signup_ids']
+        if chunk[0] == '0':
+            return DummyResponse({'errors': ['too large']}, status_code=413)
+        return DummyResponse({'data': {'id': '789', 'type': 'lists'}})
+
+    monkeypatch.setattr(client, '_make_request', fake_request)
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+
+    result = client.add_people_to_list('789', [str(i) for i in range(15)],
+                                       max_chunk_size=10, max_retries=1)
+
+    assert result['chunks_failed'] == 1
+    assert result['signups_added'] == 5
+    assert result['failed_signup_ids'] == [str(i) for i in range(10)]
+
+
+def test_add_people_to_list_does_not_retry_client_errors(monkeypatch):
+    client = make_client()
+    sent = []
+    sleeps = []
+
+    def fake_request(method, url, **kwargs):
+        chunk = kwargs['json']['data']['signup_ids']
+        sent.append(chunk[0])
+        if chunk[0] == '0':
+            return DummyResponse({'errors': ['too large']}, status_code=413)
+        if sent.count('10') == 1:
+            raise requests.ConnectionError("connection reset")
+        return DummyResponse({'data': {'id': '789', 'type': 'lists'}})
+
+    monkeypatch.setattr(client, '_make_request', fake_request)
+    monkeypatch.setattr(time, 'sleep', sleeps.append)
+
+    result = client.add_people_to_list('789', [str(i) for i in range(15)], max_chunk_size=10)
+
+    # The 413 chunk fails the same way every time: sent once, no backoff
+    assert sent.count('0') == 1
+    assert [c['attempts'] for c in result['chunks']] == [1, 2]
+    assert result['failed_signup_ids'] == [str(i) for i in range(10)]
+    assert sleeps == [0.5]
+
+
+def test_reference_data_is_cached_until_ttl(monkeypatch):
+    client = make_client()
+    calls = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append(url)
+        return DummyResponse({'data': [{'id': '1109', 'type': 'paths'}]})
+
+    monkeypatch.setattr(client, '_make_request', fake_request)
+
+    client.get_paths()
+    client.get_paths()
+    client.get_path_steps('1109')
+    client.get_path_steps('1109')
+    assert len(calls) == 2
+
+    client.reference_cache_ttl = 0
+    client.get_paths()
+    assert len(calls) == 3
+
+    client.reference_cache_ttl = 3600
+    client.clear_reference_cache()
+    client.get_path_steps('1109')
+    assert len(calls) == 4
+
+
+class FakeSession:
+    """Stands in for requests.Session: returns canned responses in order"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.headers = {}
+
+    def request(self, method, url, **kwargs):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def make_http_response(status_code, body=b'{"data": []}'):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body
+    response.request = requests.Request('GET', 'https://test.nationbuilder.com').prepare()
+    return response
+
+
+def test_request_hooks_receive_each_request():
+    client = make_client()
+    client.session = FakeSession([make_http_response(200), make_http_response(500, b'{}'),
+                                  requests.ConnectionError("down")])
+    events = []
+    client.add_request_hook(events.append)
+
+    client._make_request('GET', f"{client.base_url}/lists/789")
+    client._make_request('GET', f"{client.base_url}/signups")
+    try:
+        client._make_request('GET', f"{client.base_url}/signups")
+    except requests.ConnectionError:
+        pass
+
+    assert [e['status_code'] for e in events] == [200, 500, None]
+    assert events[0]['path'] == '/lists/789'
+    assert events[0]['bytes_received'] == len(b'{"data": []}')
+    assert events[2]['error'] == 'ConnectionError'
+
+    client.remove_request_hook(events.append)
+    client.session = FakeSession([make_http_response(200)])
+    client._make_request('GET', f"{client.base_url}/signups")
+    assert len(events) == 3
+
+
+def test_failing_request_hook_does_not_break_request():
+    client = make_client()
+    client.session = FakeSession([make_http_response(200)])
+
+    def broken_hook(event):
+        raise RuntimeError("metrics bug")
+
+    client.add_request_hook(broken_hook)
+
+    assert client._make_request('GET', f"{client.base_url}/signups").status_code == 200
+
+
+def test_base_url_override():
+    client = NationBuilderClient(nation_slug="test", access_token="token",
+                                 base_url="http://127.0.0.1:8765/api/v2/",
+                                 oauth_url="http://127.0.0.1:8765/oauth/token")
+
+    assert client.base_url == "http://127.0.0.1:8765/api/v2"
+    assert client.oauth_url == "http://127.0.0.1:8765/oauth/token"
+    assert make_client().base_url == "https://test.nationbuilder.com/api/v2"
+
+
+def test_circuit_breaker_fails_fast_then_probes():
+    from src.nb_api_client import CircuitBreaker, CircuitOpenError
+
+    client = make_client()
+    client.circuit_breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    client.session = FakeSession([make_http_response(500, b'{}'), make_http_response(429, b'{}'),
+                                  requests.ReadTimeout("slow"), make_http_response(503, b'{}'),
+                                  make_http_response(500, b'{}'), make_http_response(200)])
+    client._make_request('GET', f"{client.base_url}/signups")
+    client._make_request('GET', f"{client.base_url}/signups")
+    with pytest.raises(requests.ReadTimeout):
+        client._make_request('GET', f"{client.base_url}/signups")
+    client._make_request('GET', f"{client.base_url}/signups")
+
+    # Three failures in a row (the 429 doesn't count either way): open, nothing sent
+    assert client.circuit_breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        client._make_request('GET', f"{client.base_url}/signups")
+    assert len(client.session.responses) == 2
+
+    # After the reset timeout one probe goes out; a failed probe reopens at once
+    client.circuit_breaker.reset_timeout = 0
+    client._make_request('GET', f"{client.base_url}/signups")
+    assert client.circuit_breaker.is_open
+    assert client.circuit_breaker.times_opened == 2
+
+    client._make_request('GET', f"{client.base_url}/signups")
+    assert client.circuit_breaker.state == 'closed'
+    assert client.circuit_breaker.consecutive_failures == 0
+
+
+def test_circuit_breaker_lets_one_probe_through_while_half_open():
+    from src.nb_api_client import CircuitBreaker, CircuitOpenError
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_result(500)
+    breaker.before_request()
+
+    assert breaker.state == 'half_open'
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record_result(422)
+    assert breaker.state == 'closed'
+
+
+
+def test_circuit_breaker_counts_every_requests_exception():
+    from src.nb_api_client import CircuitBreaker
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    breaker.record_result(None, requests.exceptions.ChunkedEncodingError("connection broken"))
+    breaker.record_result(None, requests.exceptions.ContentDecodingError("bad gzip"))
+    assert breaker.is_open
+
+    # A half-open probe failing the same way opens it again
+    breaker.before_request()
+    breaker.record_result(None, requests.exceptions.ChunkedEncodingError("connection broken"))
+    assert breaker.is_open
+
+    # Errors from outside requests count neither way
+    breaker.before_request()
+    breaker.record_result(None, ValueError("bad adapter"))
+    assert breaker.state == 'half_open' and breaker.consecutive_failures == 3
+
+def test_refreshed_401_does_not_count_toward_circuit_breaker():
+    from src.nb_api_client import CircuitBreaker
+
+    client = make_client()
+    client.circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    client.session = FakeSession([make_http_response(401, b'{}'), make_http_response(200)])
+    client.refresh_access_token = lambda: setattr(client, 'access_token', 'fresh')
+
+    assert client._make_request('GET', f"{client.base_url}/signups").status_code == 200
+    assert client.circuit_breaker.state == 'closed'
+
+    # A 401 the refresh can't fix still counts
+    client.session = FakeSession([make_http_response(401, b'{}')])
+
+    def failed_refresh():
+        raise NationBuilderAPIError("refresh token revoked")
+
+    client.refresh_access_token = failed_refresh
+    assert client._make_request('GET', f"{client.base_url}/signups").status_code == 401
+    assert client.circuit_breaker.is_open
+
+
+def test_401_after_another_thread_refreshed_retries_on_new_token():
+    client = make_client()
+    refreshes = []
+    client.refresh_access_token = lambda: refreshes.append(1)
+
+    class RotatingSession(FakeSession):
+        def request(self, method, url, **kwargs):
+            # Another worker refreshes while this request is in flight
+            if len(self.responses) == 2:
+                client.access_token = 'rotated'
+            return super().request(method, url, **kwargs)
+
+    client.session = RotatingSession([make_http_response(401, b'{}'), make_http_response(200)])
+
+    assert client._make_request('GET', f"{client.base_url}/signups").status_code == 200
+    assert refreshes == []
+
+
+def test_refresh_attempts_are_counted_per_request():
+    client = make_client()
+    client.refresh_access_token = lambda: setattr(client, 'access_token', client.access_token + '!')
+    sent = []
+
+    class InterleavedSession(FakeSession):
+        def request(self, method, url, **kwargs):
+            sent.append(url)
+            if url.endswith('/a') and len(sent) == 1:
+                # Other workers burn through their refreshes while /a is in flight
+                client._make_request('GET', f"{client.base_url}/b")
+                client._make_request('GET', f"{client.base_url}/b")
+                return make_http_response(401, b'{}')
+            return make_http_response(200 if url.endswith('/a') else 401, b'{}')
+
+    client.session = InterleavedSession([])
+
+    assert client._make_request('GET', f"{client.base_url}/a").status_code == 200
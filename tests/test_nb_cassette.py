@@ -0,0 +1,121 @@
+import gzip
+import json
+import logging
+import os
+
+from benchmarks.mock_nb_server import MockNation, MockNationAdapter, mount_mock_nation
+from src.nb_api_client import NationBuilderClient
+from src.nb_cassette import CassetteRecorder, CassetteReplayer, load_cassette
+
+
+def make_recording_client(tmp_path, nation):
+    client = NationBuilderClient(nation_slug="mock", access_token="mock-token",
+                                 refresh_token="mock-refresh", client_id="id", client_secret="secret")
+    mount_mock_nation(client, nation)
+    recorder = CassetteRecorder(str(tmp_path / "run.cassette.json.gz"), inner=MockNationAdapter(nation))
+    client.mount_transport(recorder)
+    return client, recorder
+
+
+def make_replay_client(cassette_path, **kwargs):
+    client = NationBuilderClient(nation_slug="mock", access_token="other-token",
+                                 refresh_token="other-refresh", client_id="id", client_secret="secret",
+                                 base_url="http://mock.nationbuilder.invalid/api/v2",
+                                 oauth_url="http://mock.nationbuilder.invalid/oauth/token")
+    replayer = CassetteReplayer(cassette_path, **kwargs)
+    client.mount_transport(replayer)
+    return client, replayer
+
+
+def test_record_and_replay_round_trip(tmp_path):
+    nation = MockNation.synthetic(tagged_signups=3, journeys=10, token_ttl_seconds=600)
+    client, recorder = make_recording_client(tmp_path, nation)
+    nation.expire_tokens()
+
+    recorded = client.get_signup_taggings(filters={'tag_id': '14890'})
+    list_obj = client.create_list('_x_1', '_x_1', '1')
+    path = recorder.save()
+
+    replay_client, replayer = make_replay_client(path)
+    replay_client.access_token = "redacted"
+    replay_client._update_session_headers()
+
+    assert replay_client.get_signup_taggings(filters={'tag_id': '14890'}) == recorded
+    assert replay_client.create_list('_x_1', '_x_1', '1') == list_obj
+    summary = replayer.summary()
+    assert summary['recorded_calls'] == summary['replayed_calls'] == 4
+    assert summary['unmatched'] == []
+
+
+def test_cassette_has_no_secrets(tmp_path):
+    nation = MockNation.synthetic(tagged_signups=1, token_ttl_seconds=600)
+    client, recorder = make_recording_client(tmp_path, nation)
+    nation.expire_tokens()
+    client.get_paths()
+
+    with gzip.open(recorder.save(), 'rt', encoding='utf-8') as f:
+        raw = f.read()
+
+    assert 'mock-token' not in raw
+    assert 'mock-refresh' not in raw
+    assert 'secret' not in raw
+    assert client.access_token not in raw
+
+
+def test_replay_falls_back_to_endpoint_and_flags_unknown(tmp_path):
+    nation = MockNation.synthetic(tagged_signups=1)
+    client, recorder = make_recording_client(tmp_path, nation)
+    client.create_list('_250101i_c_1', '_250101i_c_1', '1')
+    path = recorder.save()
+
+    replay_client, replayer = make_replay_client(path)
+    created = replay_client.create_list('_251019i_c_1', '_251019i_c_1', '1')
+    missing = replay_client._make_request('GET', f"{replay_client.base_url}/paths")
+
+    assert created['data']['id'] == '1'
+    assert replayer.fallback_matches == 1
+    assert missing.status_code == 404
+    assert len(replayer.summary()['unmatched']) == 1
+
+
+def test_replay_scaled_latency(tmp_path):
+    cassette = {'version': 1, 'duration_seconds': 1.0, 'interactions': [{
+        'method': 'GET', 'path': '/api/v2/paths', 'query': '', 'body': None, 'status': 200,
+        'headers': {'Content-Type': 'application/json'}, 'response': json.dumps({'data': []}),
+        'elapsed': 0.2, 'offset': 0.0,
+    }]}
+    client, replayer = make_replay_client(cassette, latency_scale=0.25)
+
+    import time
+    start = time.perf_counter()
+    client.get_paths()
+
+    assert time.perf_counter() - start >= 0.05
+    assert replayer.summary()['replayed_latency_seconds'] == 0.2
+
+
+def test_replay_nightly_matches_recording(tmp_path, monkeypatch):
+    from benchmarks import replay_cassette
+
+    monkeypatch.syspath_prepend(replay_cassette.NIGHTLY_DIR)
+    from nb_path_updates.nb_path_nightly import main as nightly_main
+
+    for key in ('NB_STATE_DIR', 'NB_RUN_HISTORY_DB', 'NB_OUTPUT_DIR'):
+        monkeypatch.setenv(key, str(tmp_path / "recording" / key))
+    monkeypatch.setenv('NB_ADMIN_SIGNUP_ID', '1')
+    nation = MockNation.synthetic(tagged_signups=12, journeys=60)
+    client, recorder = make_recording_client(tmp_path, nation)
+    metrics = nightly_main.metrics_utils.ApiMetrics()
+    recorded_results = nightly_main.run_nightly(client, logging.getLogger("test"), None,
+                                                nightly_main.build_deadline(None), metrics)
+    path = recorder.save()
+
+    comparison = replay_cassette.replay(path, output_dir=str(tmp_path / "replay"))
+
+    assert comparison['results'][0]['path_updates_successful'] == recorded_results[0]['path_updates_successful']
+    assert comparison['replayed_calls'] == comparison['recorded_calls']
+    assert comparison['unmatched'] == []
+    assert load_cassette(path)['interactions']
+    # The replay's reports land in output_dir and its environment is undone
+    assert any(name.endswith('.prom') for name in os.listdir(tmp_path / "replay"))
+    assert os.environ['NB_OUTPUT_DIR'] == str(tmp_path / "recording" / "NB_OUTPUT_DIR")
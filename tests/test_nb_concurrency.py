@@ -0,0 +1,115 @@
+import threading
+import time
+
+import requests
+
+from src.nb_api_client import NationBuilderClient
+from src.nb_concurrency import AIMDConcurrencyLimiter
+from tests.test_nb_api_client import FakeSession, make_http_response
+
+
+def complete(limiter, count, latency=0.01, status_code=200, error=None):
+    """Run `count` requests through the limiter, each taking `latency` seconds"""
+    for _ in range(count):
+        token = limiter.acquire()
+        limiter.release(token - latency, status_code, error)
+
+
+def test_limit_grows_one_per_healthy_window_up_to_max():
+    limiter = AIMDConcurrencyLimiter(initial_limit=2, max_limit=4)
+
+    complete(limiter, 2)
+    assert limiter.limit == 3
+    complete(limiter, 3)
+    assert limiter.limit == 4
+    complete(limiter, 4 + 4)
+    assert limiter.limit == 4
+    assert limiter.snapshot()['increases'] == 2
+
+
+def test_throttling_and_timeouts_cut_the_limit():
+    limiter = AIMDConcurrencyLimiter(initial_limit=16, max_limit=16)
+
+    complete(limiter, 1, latency=0, status_code=429)
+    assert limiter.limit == 8
+    complete(limiter, 1, latency=0, error=requests.ReadTimeout())
+    assert limiter.limit == 4
+    complete(limiter, 5, latency=0, error=requests.ConnectionError())
+    assert limiter.limit == 1
+    assert limiter.snapshot()['decreases'] == {'throttled': 1, 'timeout': 6}
+
+
+def test_requests_started_before_a_cut_do_not_cut_again():
+    limiter = AIMDConcurrencyLimiter(initial_limit=8, max_limit=8)
+    tokens = [limiter.acquire() for _ in range(4)]
+
+    for token in tokens:
+        limiter.release(token, 429)
+
+    assert limiter.limit == 4
+    assert limiter.snapshot()['decreases'] == {'throttled': 1}
+
+
+def test_rising_p95_cuts_and_server_errors_hold_the_limit():
+    limiter = AIMDConcurrencyLimiter(initial_limit=4, max_limit=8, latency_tolerance=2.0)
+    complete(limiter, 4, latency=0.01)
+
+    assert limiter.limit == 5
+
+    complete(limiter, 5, latency=0.05)
+    assert limiter.limit == 2
+    assert limiter.snapshot()['decreases'] == {'latency': 1}
+
+    complete(limiter, 2, latency=0.01, status_code=500)
+    assert limiter.limit == 2
+
+
+def test_acquire_blocks_at_the_limit():
+    limiter = AIMDConcurrencyLimiter(initial_limit=1, max_limit=1)
+    token = limiter.acquire()
+    acquired = threading.Event()
+
+    def worker():
+        limiter.release(limiter.acquire(), 200)
+        acquired.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert not acquired.wait(0.05)
+
+    limiter.release(token, 200)
+    assert acquired.wait(1)
+    thread.join()
+    assert limiter.in_flight == 0
+    assert limiter.peak_in_flight == 1
+
+
+def test_client_requests_go_through_the_limiter():
+    limiter = AIMDConcurrencyLimiter(initial_limit=4, max_limit=4)
+    client = NationBuilderClient(nation_slug='test', access_token='token', concurrency_limiter=limiter)
+    client.session = FakeSession([make_http_response(429, b'{}'), requests.ReadTimeout("slow")])
+
+    client._make_request('GET', f"{client.base_url}/signups")
+    try:
+        client._make_request('GET', f"{client.base_url}/signups")
+    except requests.ReadTimeout:
+        pass
+
+    assert limiter.in_flight == 0
+    assert limiter.snapshot()['decreases'] == {'throttled': 1, 'timeout': 1}
+    assert limiter.limit == 1
+
+
+def test_client_passes_request_timeout():
+    seen = {}
+
+    class RecordingSession(FakeSession):
+        def request(self, method, url, **kwargs):
+            seen.update(kwargs)
+            return super().request(method, url, **kwargs)
+
+    client = NationBuilderClient(nation_slug='test', access_token='token', request_timeout=12.5)
+    client.session = RecordingSession([make_http_response(200)])
+    client._make_request('GET', f"{client.base_url}/signups")
+
+    assert seen['timeout'] == 12.5
@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src import parquet_export
+
+
+class FakeCopyConnection:
+    """Stands in for an asyncpg connection whose COPY writes fixed CSV text"""
+
+    def __init__(self, csv_by_month):
+        self.csv_by_month = csv_by_month
+
+    async def copy_from_query(self, query, *args, output, **options):
+        assert options == {'format': 'csv', 'header': True}
+        body = self.csv_by_month.get(args[0], "")
+        with open(output, 'w') as f:
+            f.write("signup_id,mailing_id,created_at,broadcaster_id\n" + body)
+        return f"COPY {body.count(chr(10))}"
+
+
+def test_month_starts_crosses_years():
+    assert parquet_export.month_starts(datetime(2024, 11, 20), datetime(2025, 2, 1)) == [
+        datetime(2024, 11, 1), datetime(2024, 12, 1), datetime(2025, 1, 1), datetime(2025, 2, 1)
+    ]
+
+
+def test_export_month_round_trips_with_compact_types(tmp_path):
+    conn = FakeCopyConnection({
+        datetime(2025, 1, 1): "1,10,2025-01-05 10:00:00,1062\n2,10,2025-01-20 08:30:00.25,\n",
+        datetime(2025, 2, 1): "1,11,2025-02-02 09:00:00,1001\n",
+    })
+
+    for month in (datetime(2025, 1, 1), datetime(2025, 2, 1)):
+        asyncio.run(parquet_export.export_month(conn, 'mailing_events_sent', month, str(tmp_path)))
+
+    events = parquet_export.read_table('mailing_events_sent', str(tmp_path))
+    assert events.schema == parquet_export.EVENT_SCHEMA
+    assert sorted(events.to_pylist(), key=lambda event: event['created_at']) == [
+        {'signup_id': 1, 'mailing_id': 10, 'created_at': datetime(2025, 1, 5, 10), 'broadcaster_id': 1062},
+        {'signup_id': 2, 'mailing_id': 10, 'created_at': datetime(2025, 1, 20, 8, 30, 0, 250000),
+         'broadcaster_id': None},
+        {'signup_id': 1, 'mailing_id': 11, 'created_at': datetime(2025, 2, 2, 9), 'broadcaster_id': 1001},
+    ]
+
+    recent = parquet_export.read_table('mailing_events_sent', str(tmp_path), ['mailing_id'],
+                                       since=datetime(2025, 1, 10))
+    assert recent.column_names == ['mailing_id']
+    assert sorted(recent.column('mailing_id').to_pylist()) == [10, 11]
+
+
+def test_empty_month_removes_stale_partition(tmp_path):
+    month = datetime(2025, 1, 1)
+    asyncio.run(parquet_export.export_month(
+        FakeCopyConnection({month: "1,10,2025-01-05 10:00:00,1062\n"}), 'mailing_events_sent', month, str(tmp_path)))
+
+    rows = asyncio.run(parquet_export.export_month(
+        FakeCopyConnection({}), 'mailing_events_sent', month, str(tmp_path)))
+
+    assert rows == 0
+    assert not (tmp_path / 'mailing_events_sent' / 'month=2025-01' / 'part-0.parquet').exists()
+    assert list((tmp_path / 'mailing_events_sent' / 'month=2025-01').iterdir()) == []